@@ -0,0 +1,16 @@
+"""Page script timed by benchmark.run through AppTest; renders one dashboard for BENCH_ACCOUNT/BENCH_PAGE"""
+import json
+import os
+
+from page.admin_page import admin_dashboard
+from page.manager_page import manager_dashboard
+from page.marketing_page import marketing_dashboard
+
+DASHBOARDS = {
+    "Quản trị viên": admin_dashboard,
+    "Quản lý": manager_dashboard,
+    "Marketing": marketing_dashboard,
+}
+
+account = json.loads(os.environ["BENCH_ACCOUNT"])
+DASHBOARDS[account["role"]](account, os.environ.get("BENCH_PAGE", "guests"))
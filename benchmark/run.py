@@ -0,0 +1,288 @@
+"""
+Benchmark services, DataFrame building and full page scripts on the SQLite backend.
+
+    python -m benchmark.run                               # seed benchmark/bench.db on first use, run, save results
+    python -m benchmark.run --guests 100000               # smaller dataset (new --db to reseed)
+    python -m benchmark.run --save-baseline               # also write benchmark/baseline.json
+    python -m benchmark.run --compare benchmark/baseline.json   # exit 1 when something got slower
+
+Each case reports p50/p95/mean latency in ms and, when it returns rows,
+throughput in rows per second.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARK_DIR)
+ROLES = {"admin": "Quản trị viên", "manager": "Quản lý", "marketing": "Marketing"}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="BeKind performance benchmark (SQLite backend)")
+    parser.add_argument("--db", default=os.path.join(BENCHMARK_DIR, "bench.db"), help="SQLite file, seeded if empty")
+    parser.add_argument("--accounts", type=int, default=500)
+    parser.add_argument("--houses", type=int, default=5000)
+    parser.add_argument("--guests", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per service/DataFrame case")
+    parser.add_argument("--page-repeat", type=int, default=3, help="timed runs per page script")
+    parser.add_argument("--only", choices=["services", "dataframes", "pages"], action="append",
+                        help="run only these sections (repeatable)")
+    parser.add_argument("--output", help="results file (default benchmark/results/<timestamp>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="also write benchmark/baseline.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown before flagging (0.2 = 20%%)")
+    return parser.parse_args()
+
+def configure(db_path: str) -> None:
+    """Point the services at the benchmark database before anything imports library.supabase"""
+    sys.path.insert(0, ROOT)
+    os.environ["DATA_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = db_path
+    from config import settings
+    # config loads .env with override=True, so set the attributes as well
+    settings.DATA_BACKEND = "sqlite"
+    settings.SQLITE_PATH = db_path
+
+def _row_count(result) -> Optional[int]:
+    data = result[0] if isinstance(result, tuple) else result
+    if isinstance(data, dict) and isinstance(data.get("rows"), list):
+        return len(data["rows"])
+    if hasattr(data, "__len__") and not isinstance(data, (str, bytes)):
+        return len(data)
+    return None
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))]
+
+def measure(fn: Callable, repeat: int, setup: Callable = None, warmup: int = 1) -> Dict:
+    """Time ``repeat`` calls of fn after ``warmup`` untimed ones; setup runs untimed before each call"""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    durations, rows = [], None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        result = fn()
+        durations.append((time.perf_counter() - started) * 1000)
+        rows = _row_count(result)
+    mean = sum(durations) / len(durations)
+    return {
+        "p50_ms": round(_percentile(durations, 50), 3),
+        "p95_ms": round(_percentile(durations, 95), 3),
+        "mean_ms": round(mean, 3),
+        "rows": rows,
+        "rows_per_s": round(rows / (mean / 1000)) if rows and mean else None,
+    }
+
+def pick_accounts(client) -> Dict[str, Dict]:
+    """The admin, and the manager and marketer with the most guests (worst case for scoped pages)"""
+    admin = client.run("""SELECT id, full_name, role FROM "Account" WHERE role = 'Quản trị viên' ORDER BY id LIMIT 1""")
+    manager = client.run("""
+        SELECT a.id, a.full_name, a.role FROM "Guest" g
+        JOIN "House" h ON h.id = g.house_id JOIN "Account" a ON a.id = h.manager_id
+        GROUP BY a.id ORDER BY COUNT(*) DESC LIMIT 1""")
+    marketer = client.run("""
+        SELECT a.id, a.full_name, a.role FROM "Guest" g JOIN "Account" a ON a.id = g.marketer_id
+        GROUP BY a.id ORDER BY COUNT(*) DESC LIMIT 1""")
+    return {name: dict(rows[0]) for name, rows in (("admin", admin), ("manager", manager), ("marketing", marketer))}
+
+def _walk_pages(pages: int, **kwargs):
+    """Follow next_cursor for ``pages`` pages; returns every row seen"""
+    from service.guest_service import get_guests_page
+    rows, cursor = [], None
+    for _ in range(pages):
+        page, _ = get_guests_page(cursor=cursor, **kwargs)
+        rows.extend(page["rows"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    return rows
+
+def bench_services(accounts: Dict[str, Dict], repeat: int) -> Dict[str, Dict]:
+    from config import settings
+    from library.cache import invalidate_reference_data
+    from library.cache import invalidate
+    from service.analytics_service import (KPI_NAMESPACE, get_dashboard_kpis, get_guest_analytics_snapshot,
+                                           get_guest_funnel, get_guest_trends, get_time_to_close)
+    from service.guest_service import (VIETNAM_TZ, created_bound, get_guests_page, get_guests_with_details,
+                                       get_houses_name_map, get_houses_with_managers_map, get_marketers_name_map)
+
+    results = {}
+    now = datetime.now(timezone.utc)
+    # The same UTC bound the guest list filter sends for "created since" a Vietnam day
+    last_month = {"created_from": created_bound((now.astimezone(VIETNAM_TZ) - timedelta(days=30)).date()),
+                  "status": ["Đang chăm sóc", "Gần xem"]}
+    for name, account in accounts.items():
+        scope = {"account_id": account["id"], "role": account["role"]}
+        page_kwargs = dict(scope, page_size=settings.GUEST_PAGE_SIZE, count=settings.GUEST_COUNT_MODE)
+        results[f"services.get_guests_page.{name}.first"] = measure(lambda: get_guests_page(**page_kwargs), repeat)
+        results[f"services.get_guests_page.{name}.filtered"] = measure(
+            lambda: get_guests_page(filters=last_month, **page_kwargs), repeat)
+        results[f"services.get_guests_page.{name}.sort_name"] = measure(
+            lambda: get_guests_page(sort_by="guest_name", descending=False, **page_kwargs), repeat)
+        results[f"services.get_guests_page.{name}.walk_20"] = measure(lambda: _walk_pages(20, **page_kwargs), repeat)
+        if name != "admin":
+            results[f"services.get_guests_with_details.{name}"] = measure(
+                lambda: get_guests_with_details(**scope), repeat)
+        results[f"services.get_dashboard_kpis.{name}.cold"] = measure(
+            lambda: get_dashboard_kpis(**scope), repeat, setup=lambda: invalidate(KPI_NAMESPACE))
+
+    week_start = (now - timedelta(days=now.weekday())).date().isoformat() + "T00:00:00"
+    results["services.get_guest_analytics_snapshot.week"] = measure(
+        lambda: get_guest_analytics_snapshot(week_start, now.isoformat()), repeat)
+    results["services.get_guest_analytics_snapshot.all"] = measure(get_guest_analytics_snapshot, repeat)
+    year_start = (now - timedelta(days=365)).date().isoformat() + "T00:00:00"
+    for frequency in ("day", "week", "month"):
+        results[f"services.get_guest_trends.year_{frequency}"] = measure(
+            lambda: get_guest_trends(year_start, now.isoformat(), frequency), repeat)
+    results["services.get_guest_trends.year_week_manager"] = measure(
+        lambda: get_guest_trends(year_start, now.isoformat(), "week", "manager", accounts["manager"]["id"]), repeat)
+    for name, service in (("get_guest_funnel", get_guest_funnel), ("get_time_to_close", get_time_to_close)):
+        results[f"services.{name}.week"] = measure(lambda: service(week_start, now.isoformat()), repeat)
+        results[f"services.{name}.all"] = measure(service, repeat)
+
+    manager_id = accounts["manager"]["id"]
+    results["services.get_houses_name_map.cold"] = measure(
+        lambda: get_houses_name_map(manager_id), repeat, setup=invalidate_reference_data)
+    results["services.get_houses_with_managers_map.cold"] = measure(
+        get_houses_with_managers_map, repeat, setup=invalidate_reference_data)
+    results["services.get_marketers_name_map.cold"] = measure(
+        get_marketers_name_map, repeat, setup=invalidate_reference_data)
+    results["services.get_houses_with_managers_map.warm"] = measure(get_houses_with_managers_map, repeat)
+    return results
+
+def bench_dataframes(accounts: Dict[str, Dict], repeat: int) -> Dict[str, Dict]:
+    import pandas as pd
+    from library.supabase import supabase
+    from service.analytics_service import ROLLUP_COLUMNS, _status_table
+    from component.guest_table import guest_frame
+    from service.guest_service import get_guests_with_details
+
+    results = {}
+    for name in ("manager", "marketing"):
+        rows, _ = get_guests_with_details(accounts[name]["id"], accounts[name]["role"])
+        results[f"dataframes.guest_list.{name}"] = measure(lambda: guest_frame(rows), repeat)
+
+    count_rows = supabase.rpc("guest_rollup_counts", {"start_day": None, "end_day": None}).execute().data
+
+    def build_tables():
+        counts = pd.DataFrame(count_rows, columns=ROLLUP_COLUMNS)
+        return _status_table(counts, "manager"), _status_table(counts, "marketer")
+    results["dataframes.analytics_tables"] = measure(build_tables, repeat)
+    return results
+
+def bench_pages(accounts: Dict[str, Dict], repeat: int) -> Dict[str, Dict]:
+    from streamlit.testing.v1 import AppTest
+
+    script = os.path.join(BENCHMARK_DIR, "page_app.py")
+    cases = [(name, page) for name in accounts for page in ("dashboard", "guests")] + [("admin", "houses"), ("admin", "accounts")]
+    results = {}
+    for name, page in cases:
+        os.environ["BENCH_ACCOUNT"] = json.dumps(accounts[name], ensure_ascii=False)
+        os.environ["BENCH_PAGE"] = page
+
+        def run_page():
+            app = AppTest.from_file(script, default_timeout=600).run()
+            if app.exception:
+                raise RuntimeError(f"{name}/{page}: {app.exception[0].value}")
+        results[f"pages.{name}.{page}"] = measure(run_page, repeat)
+    return results
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> int:
+    """Print p50 changes against the baseline; returns how many cases regressed"""
+    regressions = 0
+    print(f"\n{'case':<58} {'baseline':>10} {'current':>10} {'change':>8}")
+    for case, current in results.items():
+        before = baseline.get(case)
+        if not before:
+            print(f"{case:<58} {'-':>10} {current['p50_ms']:>10.2f} {'new':>8}")
+            continue
+        change = current["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        # Sub-millisecond cases are mostly noise
+        regressed = change > tolerance and current["p50_ms"] - before["p50_ms"] > 1
+        regressions += regressed
+        flag = "  <-- slower" if regressed else ""
+        print(f"{case:<58} {before['p50_ms']:>10.2f} {current['p50_ms']:>10.2f} {change:>+8.0%}{flag}")
+    return regressions
+
+def main() -> int:
+    args = parse_args()
+    configure(os.path.abspath(args.db))
+    from config import settings
+    from library.supabase import supabase
+    from benchmark.seed import seed
+
+    dataset = {row[0]: row[1] for row in supabase.run(
+        """SELECT 'Account', COUNT(*) FROM "Account" UNION ALL SELECT 'House', COUNT(*) FROM "House"
+           UNION ALL SELECT 'Guest', COUNT(*) FROM "Guest" """)}
+    if not dataset["Guest"]:
+        print(f"Seeding {args.db}: {args.accounts} accounts, {args.houses} houses, {args.guests} guests ...")
+        started = time.perf_counter()
+        dataset = seed(supabase, args.accounts, args.houses, args.guests, seed=args.seed)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    accounts = pick_accounts(supabase)
+    sections = args.only or ["services", "dataframes", "pages"]
+    results = {}
+    if "services" in sections:
+        results.update(bench_services(accounts, args.repeat))
+    if "dataframes" in sections:
+        results.update(bench_dataframes(accounts, args.repeat))
+    if "pages" in sections:
+        results.update(bench_pages(accounts, args.page_repeat))
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": dict(dataset, seed=args.seed),
+            "settings": {"GUEST_PAGE_SIZE": settings.GUEST_PAGE_SIZE, "GUEST_COUNT_MODE": settings.GUEST_COUNT_MODE,
+                         "GUEST_SYNC": settings.GUEST_SYNC, "QUERY_WORKERS": settings.QUERY_WORKERS},
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(BENCHMARK_DIR, "results", datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    paths = [output] + ([os.path.join(BENCHMARK_DIR, "baseline.json")] if args.save_baseline else [])
+    for path in paths:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f"Saved {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline["meta"].get("dataset") != report["meta"]["dataset"]:
+            print("Warning: baseline was measured on a different dataset")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        print(f"\n{regressions} regression(s) over {args.tolerance:.0%}")
+        return 1 if regressions else 0
+
+    print(f"\n{'case':<58} {'p50 ms':>10} {'p95 ms':>10} {'rows/s':>12}")
+    for case, result in results.items():
+        rows_per_s = f"{result['rows_per_s']:,}" if result["rows_per_s"] else "-"
+        print(f"{case:<58} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} {rows_per_s:>12}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Deterministic synthetic data for the SQLite backend.
+
+Rows are written straight through the client's connection (executemany inside
+one transaction) rather than the query builder, so seeding a million guests
+takes seconds and does not flood the change feed.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from library.local_backend import LocalClient
+
+FAMILY_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ", "Hồ", "Ngô", "Dương"]
+MIDDLE_NAMES = ["Văn", "Thị", "Minh", "Ngọc", "Thanh", "Hữu", "Đức", "Thu", "Quang", "Hoài", "Gia", "Bảo"]
+GIVEN_NAMES = ["An", "Bình", "Châu", "Dũng", "Giang", "Hà", "Hải", "Hạnh", "Hòa", "Hùng", "Khoa", "Lan",
+               "Linh", "Long", "Mai", "Nam", "Ngân", "Phúc", "Quân", "Sơn", "Tâm", "Thảo", "Trang", "Tú", "Vy", "Yến"]
+STREETS = ["Nguyễn Trãi", "Lê Lợi", "Trần Hưng Đạo", "Hai Bà Trưng", "Lý Thường Kiệt", "Điện Biên Phủ",
+           "Cách Mạng Tháng 8", "Võ Văn Tần", "Pasteur", "Nguyễn Đình Chiểu", "Xô Viết Nghệ Tĩnh", "Phan Xích Long"]
+DISTRICTS = ["Quận 1", "Quận 3", "Quận 5", "Quận 7", "Quận 10", "Bình Thạnh", "Phú Nhuận", "Gò Vấp", "Tân Bình", "Thủ Đức"]
+
+# Share of guests per status, roughly what the sales funnel looks like
+STATUS_WEIGHTS = {
+    "Đang chăm sóc": 0.34,
+    "Gần xem": 0.18,
+    "Không xem": 0.14,
+    "Không chốt": 0.14,
+    "Chốt": 0.12,
+    "Mới": 0.08,
+}
+# Statuses for which the guest has (or had) a viewing scheduled
+VIEWING_STATUSES = {"Gần xem", "Chốt", "Không chốt"}
+# Status path of a guest by its final status, for GuestStatusEvent
+STATUS_PATHS = {
+    "Mới": ["Mới"],
+    "Đang chăm sóc": ["Mới", "Đang chăm sóc"],
+    "Gần xem": ["Mới", "Đang chăm sóc", "Gần xem"],
+    "Không xem": ["Mới", "Đang chăm sóc", "Không xem"],
+    "Chốt": ["Mới", "Đang chăm sóc", "Gần xem", "Chốt"],
+    "Không chốt": ["Mới", "Đang chăm sóc", "Gần xem", "Không chốt"],
+}
+
+def _timestamp(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "+00:00"
+
+def _full_name(rng: random.Random) -> str:
+    return f"{rng.choice(FAMILY_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(GIVEN_NAMES)}"
+
+def seed(client: LocalClient, accounts: int = 500, houses: int = 5000, guests: int = 1_000_000,
+         seed: int = 42, days: int = 365, batch_size: int = 50_000) -> Dict[str, int]:
+    """
+    Fill an empty database. Accounts are ~2% admins, ~20% managers, the rest
+    marketers; houses belong to managers; guest creation dates lean towards
+    recent weeks and office hours, in Vietnam time (UTC+7). Each guest's status
+    history walks STATUS_PATHS to its final status, the viewing outcome on its
+    view date.
+    Returns the number of rows written per table
+    """
+    rng = random.Random(seed)
+    # Separate stream, so guests are the same as in databases seeded before status history existed
+    history_rng = random.Random(seed + 1)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    connection = client.connection
+
+    admin_count = max(1, accounts // 50)
+    manager_count = max(1, accounts // 5)
+    account_rows = []
+    for index in range(accounts):
+        role = "Quản trị viên" if index < admin_count else "Quản lý" if index < admin_count + manager_count else "Marketing"
+        created_at = now - timedelta(days=days + rng.randint(0, 90))
+        account_rows.append((index + 1, _timestamp(created_at), _full_name(rng), f"09{index:08d}", role))
+    manager_ids = [row[0] for row in account_rows if row[4] == "Quản lý"]
+    marketer_ids = [row[0] for row in account_rows if row[4] == "Marketing"] or manager_ids
+
+    house_rows = []
+    for index in range(houses):
+        address = f"{rng.randint(1, 400)} {rng.choice(STREETS)}, {rng.choice(DISTRICTS)}"
+        house_rows.append((index + 1, _timestamp(now - timedelta(days=days)), rng.choice(manager_ids), address))
+
+    statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+    # A few busy houses and marketers get most of the guests, like in practice
+    house_weights = [rng.paretovariate(1.5) for _ in range(houses)]
+    marketer_weights = [rng.paretovariate(1.5) for _ in marketer_ids]
+
+    with client.lock:
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                'INSERT INTO "Account" (id, created_at, full_name, phone_number, role) VALUES (?, ?, ?, ?, ?)',
+                account_rows)
+            connection.executemany(
+                'INSERT INTO "House" (id, created_at, manager_id, address) VALUES (?, ?, ?, ?)', house_rows)
+            for start in range(0, guests, batch_size):
+                count = min(batch_size, guests - start)
+                house_ids = rng.choices(range(1, houses + 1), weights=house_weights, k=count)
+                guest_marketers = rng.choices(marketer_ids, weights=marketer_weights, k=count)
+                guest_statuses = rng.choices(statuses, weights=weights, k=count)
+                rows, events = [], []
+                for offset in range(count):
+                    # Triangular towards today; 01:00-12:00 UTC is 08:00-19:00 in Vietnam
+                    day = int(rng.triangular(0, days, 0))
+                    created_at = (now - timedelta(days=day)).replace(hour=rng.randint(1, 11), minute=rng.randint(0, 59),
+                                                                     second=rng.randint(0, 59))
+                    status = guest_statuses[offset]
+                    view_date = viewing = None
+                    if status in VIEWING_STATUSES:
+                        viewing = created_at + timedelta(days=rng.randint(0, 14), hours=rng.randint(0, 8))
+                        view_date = _timestamp(viewing)
+                    created = _timestamp(created_at)
+                    rows.append((created, guest_marketers[offset], house_ids[offset], view_date, _full_name(rng),
+                                 f"0{rng.choice('35789')}{rng.randint(0, 99_999_999):08d}", status, None, None, created))
+
+                    # Ids of an empty table start at 1. Each step follows the previous one by 2-72 hours;
+                    # a viewing outcome comes a few hours after the viewing
+                    guest_id, changed_at, previous = start + offset + 1, created_at, None
+                    for step, path_status in enumerate(STATUS_PATHS[status]):
+                        if step:
+                            changed_at += timedelta(hours=history_rng.randint(2, 72))
+                            if path_status in ("Chốt", "Không chốt"):
+                                changed_at = max(changed_at, viewing + timedelta(hours=history_rng.randint(1, 6)))
+                        events.append((guest_id, previous, path_status, _timestamp(min(changed_at, now)), int(not step)))
+                        previous = path_status
+                connection.executemany(
+                    'INSERT INTO "Guest" (created_at, marketer_id, house_id, view_date, guest_name, guest_phone_number, '
+                    'status, admin_note, manager_note, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                # Replace the creation events the insert trigger logged (final status only) with the paths
+                connection.execute('DELETE FROM "GuestStatusEvent" WHERE guest_id > ?', (start,))
+                connection.executemany(
+                    'INSERT INTO "GuestStatusEvent" (guest_id, from_status, to_status, changed_at, is_created) '
+                    'VALUES (?, ?, ?, ?, ?)', events)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("ANALYZE")
+    return {"Account": accounts, "House": houses, "Guest": guests}
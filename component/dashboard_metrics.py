@@ -0,0 +1,31 @@
+import streamlit as st
+from service.analytics_service import get_dashboard_kpis
+
+def dashboard_metrics(account, show_houses=False, show_accounts=False):
+    """
+    KPI row of a role's landing page, scoped to the account (see get_dashboard_kpis).
+    show_houses / show_accounts: include the house / account totals
+    """
+    kpis, error = get_dashboard_kpis(account['id'], account['role'])
+    if kpis is None:
+        st.error("Không thể tải số liệu tổng quan. Vui lòng thử lại sau.")
+        return
+
+    metrics = []
+    if show_houses:
+        metrics.append(dict(label="Tổng số nhà", value=kpis['houses']))
+    if show_accounts:
+        metrics.append(dict(label="Tổng số tài khoản", value=kpis['accounts']))
+    metrics.append(dict(label="Tổng số khách", value=kpis['guests']))
+    metrics.append(dict(
+        label="Khách mới tuần này",
+        value=kpis['new_this_week'],
+        delta=kpis['new_this_week'] - kpis['new_last_week'],
+        help=f"Tuần trước: {kpis['new_last_week']}"
+    ))
+    close_rate = kpis['close_rate']
+    metrics.append(dict(label="Tỷ lệ chốt", value=f"{close_rate:.1%}" if close_rate is not None else "—"))
+
+    for column, metric in zip(st.columns(len(metrics)), metrics):
+        with column:
+            st.metric(**metric)
@@ -0,0 +1,66 @@
+import streamlit as st
+from service.guest_service import created_bound
+
+# Sort options shown to the user -> Guest column used for keyset paging
+SORT_OPTIONS = {
+    "Ngày tạo": "created_at",
+    "Ngày xem": "view_date",
+    "Tên khách": "guest_name",
+    "Trạng thái": "status",
+}
+
+def current_guest_filters(key):
+    """
+    Filters and sort as currently set in the guest_filters widgets of ``key``.
+    Keyed widget values are in session state before the widgets render, so a
+    page can start fetching before it draws the filter controls
+    """
+    state = st.session_state
+    created_from = state.get(f"{key}_filter_from")
+    created_to = state.get(f"{key}_filter_to")
+    filters = {
+        'status': state.get(f"{key}_filter_status", []),
+        'house_id': state.get(f"{key}_filter_house", []),
+        'marketer_id': state.get(f"{key}_filter_marketer", []),
+        'created_from': created_bound(created_from) if created_from else None,
+        'created_to': created_bound(created_to, end=True) if created_to else None,
+    }
+    sort_label = state.get(f"{key}_sort", next(iter(SORT_OPTIONS)))
+    return filters, SORT_OPTIONS[sort_label], state.get(f"{key}_sort_desc", True)
+
+def guest_filters(key, status_options, houses_name_map, marketers_name_map=None):
+    """
+    Filter and sort controls for the paginated guest list.
+    marketers_name_map: omit to hide the marketer filter (e.g. for the marketing role)
+    Returns (filters, sort_by, descending) ready for get_guests_page
+    """
+    with st.expander("🔍 Lọc và sắp xếp"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.multiselect("Trạng thái", status_options, key=f"{key}_filter_status")
+        with col2:
+            st.multiselect(
+                "Nhà",
+                list(houses_name_map.keys()),
+                format_func=lambda house_id: houses_name_map.get(house_id, str(house_id)),
+                key=f"{key}_filter_house"
+            )
+        with col3:
+            if marketers_name_map is not None:
+                st.multiselect(
+                    "Nhân viên marketing",
+                    list(marketers_name_map.keys()),
+                    format_func=lambda marketer_id: marketers_name_map.get(marketer_id, str(marketer_id)),
+                    key=f"{key}_filter_marketer"
+                )
+
+        col4, col5, col6 = st.columns(3)
+        with col4:
+            st.date_input("Tạo từ ngày", value=None, key=f"{key}_filter_from")
+        with col5:
+            st.date_input("Đến ngày", value=None, key=f"{key}_filter_to")
+        with col6:
+            st.selectbox("Sắp xếp theo", list(SORT_OPTIONS.keys()), key=f"{key}_sort")
+            st.toggle("Mới nhất trước", value=True, key=f"{key}_sort_desc")
+
+    return current_guest_filters(key)
@@ -0,0 +1,74 @@
+import streamlit as st
+from service.import_service import IMPORT_FIELDS, read_spreadsheet, guess_column_mapping, validate_guest_import, import_guests
+
+@st.dialog("Nhập khách từ tệp", width="large")
+def guest_import_dialog(key, houses_name_map, guest_status_options, marketers_name_map=None, marketer_id=None):
+    """
+    Bulk guest import: upload CSV/Excel, map columns, validate, then insert in chunks.
+    marketer_id: assign every imported guest to this marketer (marketing role)
+    """
+    uploaded_file = st.file_uploader("Tệp CSV hoặc Excel", type=["csv", "xlsx", "xls"], key=f"{key}_file")
+    if uploaded_file is None:
+        st.caption("Dòng đầu tiên của tệp phải là tên cột.")
+        if st.button("Đóng", key=f"{key}_close_empty", use_container_width=True):
+            st.session_state[f"{key}_show"] = False
+            st.rerun()
+        return
+
+    df, error = read_spreadsheet(uploaded_file)
+    if error:
+        st.error(error)
+        return
+
+    # Column mapping
+    st.write("**Ghép cột**")
+    guessed = guess_column_mapping(list(df.columns))
+    column_options = [None] + list(df.columns)
+    mapping = {}
+    fields = [field for field in IMPORT_FIELDS if not (field == 'marketer_name' and marketer_id is not None)]
+    mapping_cols = st.columns(3)
+    for i, field in enumerate(fields):
+        label, required = IMPORT_FIELDS[field]
+        with mapping_cols[i % 3]:
+            mapping[field] = st.selectbox(
+                label + (" *" if required else ""),
+                column_options,
+                index=column_options.index(guessed[field]) if guessed[field] else 0,
+                format_func=lambda col: "— Không dùng —" if col is None else col,
+                key=f"{key}_map_{field}"
+            )
+
+    missing = [IMPORT_FIELDS[field][0] for field in fields if IMPORT_FIELDS[field][1] and not mapping[field]]
+    if missing:
+        st.warning(f"Chưa ghép cột bắt buộc: {', '.join(missing)}")
+        return
+
+    valid, errors = validate_guest_import(
+        df, mapping, houses_name_map, guest_status_options,
+        marketers_name_map=marketers_name_map, marketer_id=marketer_id
+    )
+
+    col1, col2 = st.columns(2)
+    col1.metric("Dòng hợp lệ", len(valid))
+    col2.metric("Dòng lỗi", errors['Dòng'].nunique())
+    if not errors.empty:
+        st.dataframe(errors, hide_index=True, use_container_width=True, height=200)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button(f"Nhập {len(valid)} khách", disabled=valid.empty, key=f"{key}_confirm", use_container_width=True):
+            with st.spinner("Đang nhập dữ liệu..."):
+                inserted, insert_errors = import_guests(valid)
+            st.session_state[f"{key}_result"] = (inserted, insert_errors)
+    with col2:
+        if st.button("Đóng", key=f"{key}_cancel", use_container_width=True):
+            st.session_state[f"{key}_show"] = False
+            st.session_state.pop(f"{key}_result", None)
+            st.rerun()
+
+    if f"{key}_result" in st.session_state:
+        inserted, insert_errors = st.session_state[f"{key}_result"]
+        st.success(f"Đã nhập {inserted} khách")
+        if not insert_errors.empty:
+            st.error(f"{len(insert_errors)} dòng không thể nhập")
+            st.dataframe(insert_errors, hide_index=True, use_container_width=True, height=200)
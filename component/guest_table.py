@@ -0,0 +1,124 @@
+"""
+Guest list view model shared by the admin, manager and marketing pages.
+
+guest_frame() turns the rows of get_guests_page/get_guests_with_details into the
+flat table the pages display, with column-wise operations only (no per-guest
+Python loop), and guest_table_options() returns the role's column policy as
+keyword arguments for table_with_dialog.
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from library.lookup import LabelIndex
+
+VIETNAM_TZ = "Asia/Ho_Chi_Minh"
+
+GUEST_COLUMN_LABELS = {
+    'id': 'ID',
+    'guest_name': 'Tên khách',
+    'guest_phone_number': 'Số điện thoại',
+    'house_address': 'Địa chỉ nhà',
+    'manager_name': 'Quản lý nhà',
+    'view_date': 'Ngày và giờ xem',
+    'status': 'Trạng thái',
+    'marketer_name': 'Nhân viên marketing',
+    'created_at': 'Ngày tạo',
+    'admin_note': 'Ghi chú admin',
+    'manager_note': 'Ghi chú quản lý'
+}
+# Ids behind the house/marketer names, hidden: dialogs select options and resolve edits by id
+ID_COLUMNS = ['house_id', 'marketer_id']
+GUEST_COLUMNS = list(GUEST_COLUMN_LABELS) + ID_COLUMNS
+
+class GuestTablePolicy(NamedTuple):
+    hidden_columns: Tuple[str, ...]
+    disabled_columns: Tuple[str, ...]
+    dropdown_columns: Tuple[str, ...]  # edited with a select box (status / house / marketer)
+    bulk_columns: Tuple[str, ...]
+
+GUEST_TABLE_POLICIES = {
+    "Quản trị viên": GuestTablePolicy(
+        hidden_columns=('id', *ID_COLUMNS),
+        disabled_columns=('manager_name', 'created_at'),
+        dropdown_columns=('status', 'house_address', 'marketer_name'),
+        bulk_columns=('status', 'house_address', 'marketer_name')),
+    # Same as admin but for their houses only
+    "Quản lý": GuestTablePolicy(
+        hidden_columns=('id', *ID_COLUMNS),
+        disabled_columns=('manager_name', 'admin_note', 'created_at'),
+        dropdown_columns=('status', 'house_address', 'marketer_name'),
+        bulk_columns=('status', 'house_address')),
+    "Marketing": GuestTablePolicy(
+        hidden_columns=('id', 'created_at', *ID_COLUMNS),
+        disabled_columns=('marketer_name', 'manager_name', 'admin_note', 'manager_note'),
+        dropdown_columns=('status', 'house_address'),
+        bulk_columns=('status', 'house_address')),
+}
+
+def format_vietnam_datetimes(values: pd.Series) -> pd.Series:
+    """ISO timestamps → "dd/mm/YYYY HH:MM" in Vietnam time; empty for missing, unparsable values kept as is"""
+    parsed = pd.to_datetime(values, utc=True, format='ISO8601', errors='coerce')
+    formatted = parsed.dt.tz_convert(VIETNAM_TZ).dt.strftime('%d/%m/%Y %H:%M').astype(object)
+    return formatted.where(parsed.notna(), values.fillna(''))
+
+def _embedded(rows: pd.DataFrame, key: str, embed: str, *path: str) -> pd.Series:
+    # The same house/marketer is embedded in many guests: read each distinct one once, then map
+    # by id. Embeds (house, house.manager, marketer) are None when the reference is missing
+    distinct = rows.drop_duplicates(key)
+    values = distinct[embed]
+    for name in path:
+        values = values.str.get(name)
+    return rows[key].map(dict(zip(distinct[key], values)))
+
+def guest_frame(guests: List[Dict]) -> pd.DataFrame:
+    """Flat guest table (GUEST_COLUMNS) with embedded names and Vietnam-time dates"""
+    if not guests:
+        return pd.DataFrame(columns=GUEST_COLUMNS)
+    rows = pd.DataFrame.from_records(guests)
+    for name in ('house', 'marketer', 'view_date', 'admin_note', 'manager_note'):
+        if name not in rows:
+            rows[name] = None
+    return pd.DataFrame({
+        'id': rows['id'],
+        'guest_name': rows['guest_name'],
+        'guest_phone_number': rows['guest_phone_number'],
+        'house_address': _embedded(rows, 'house_id', 'house', 'address'),
+        'manager_name': _embedded(rows, 'house_id', 'house', 'manager', 'full_name'),
+        'view_date': format_vietnam_datetimes(rows['view_date']),
+        'status': rows['status'],
+        'marketer_name': _embedded(rows, 'marketer_id', 'marketer', 'full_name'),
+        'created_at': format_vietnam_datetimes(rows['created_at']),
+        'admin_note': rows['admin_note'].fillna(''),
+        'manager_note': rows['manager_note'].fillna(''),
+        'house_id': rows['house_id'],
+        'marketer_id': rows['marketer_id'],
+    })
+
+def guest_table_options(role: str, status_options: List[str], houses_name_map: Dict,
+                        marketers_name_map: Optional[Dict] = None) -> Dict:
+    """
+    Column labels, hidden/disabled columns and dropdown options of ``role`` for table_with_dialog.
+    The name maps are LabelIndex objects (see library/lookup.py), passed as is so the
+    dialogs can select and resolve houses/marketers by id
+    """
+    policy = GUEST_TABLE_POLICIES[role]
+    options = {
+        'status': status_options,
+        'house_address': houses_name_map,
+        'marketer_name': marketers_name_map if marketers_name_map is not None else LabelIndex({}, key='marketer_id'),
+    }
+    return {
+        'column_labels': GUEST_COLUMN_LABELS,
+        'hidden_columns': list(policy.hidden_columns),
+        'disabled_columns': list(policy.disabled_columns),
+        'dropdown_columns': {column: options[column] for column in policy.dropdown_columns},
+        'bulk_columns': list(policy.bulk_columns),
+    }
+
+def guest_page_view(fetch_page: Callable[[], Tuple[Optional[Dict], Optional[str]]]) -> Tuple[Optional[Dict], Optional[str]]:
+    """Run a get_guests_page call and add its guest_frame() as 'frame', for caching both together"""
+    page, message = fetch_page()
+    if page is None:
+        return page, message
+    return {**page, 'frame': guest_frame(page['rows'])}, message
@@ -0,0 +1,17 @@
+import streamlit as st
+from config import settings
+from library.change_feed import last_change
+
+def live_refresh(topics, since):
+    """
+    Rerun the page when the change feed reports a change to any of topics after
+    sequence number since (change_feed.current_sequence() taken before loading data).
+    Only reads in-memory counters, so polling costs no queries
+    """
+    if settings.CHANGE_FEED:
+        _watch_changes(tuple(topics), since)
+
+@st.fragment(run_every=settings.CHANGE_FEED_POLL_SECONDS)
+def _watch_changes(topics, since):
+    if last_change(topics) > since:
+        st.rerun()
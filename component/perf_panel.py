@@ -0,0 +1,34 @@
+import streamlit as st
+import pandas as pd
+from library.metrics import export_json, reset, summary
+
+def perf_panel():
+    """Admin-only sidebar panel: p50/p95 of every service call, exportable as JSON"""
+    with st.sidebar.expander("⏱️ Hiệu năng truy vấn"):
+        calls = summary()
+        if not calls:
+            st.caption("Chưa có số liệu")
+            return
+        st.dataframe(
+            pd.DataFrame(calls)[['call', 'page', 'calls', 'errors', 'p50_ms', 'p95_ms', 'avg_rows', 'avg_bytes']],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'call': 'Hàm',
+                'page': 'Trang',
+                'calls': 'Số lần gọi',
+                'errors': 'Lỗi',
+                'p50_ms': 'p50 (ms)',
+                'p95_ms': 'p95 (ms)',
+                'avg_rows': 'Số dòng TB',
+                'avg_bytes': 'Dữ liệu nhận TB (byte)',
+            }
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Tải JSON", export_json(), file_name="bekind-metrics.json",
+                               mime="application/json", use_container_width=True)
+        with col2:
+            if st.button("Xóa số liệu", use_container_width=True, key="perf_panel_reset"):
+                reset()
+                st.rerun()
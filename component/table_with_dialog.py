@@ -1,15 +1,50 @@
+import math
 import streamlit as st
 import pandas as pd
 from datetime import datetime, time
 from streamlit.column_config import SelectboxColumn
+from library.lookup import LabelIndex
+
+def page_cursor(key, signature=None):
+    """
+    Cursor of the page currently shown by a paginated table_with_dialog.
+    signature: anything describing the query (filters, sort); when it changes
+    the table goes back to the first page
+    """
+    signature_key = f"{key}_page_signature"
+    if signature is not None and st.session_state.get(signature_key) != signature:
+        st.session_state[signature_key] = signature
+        st.session_state[f"{key}_cursors"] = [None]
+        st.session_state.pop(f"{key}_total", None)
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    return cursors[-1]
 
 def table_with_dialog(df, key, on_edit=None, on_delete=None, 
                      dropdown_columns=None, hidden_columns=None, column_labels=None,
-                     disabled_columns=None, allow_edit=True, allow_delete=False):
+                     disabled_columns=None, allow_edit=True, allow_delete=False,
+                     pagination=None, on_bulk_update=None, on_bulk_delete=None, bulk_columns=None,
+                     houses_with_managers_map=None, version=None):
     """
     Read-only table with dialog-based CRUD operations using st.dialog
     disabled_columns: list of column names that should be disabled in edit dialog
+    dropdown_columns: column -> list of options, or a LabelIndex whose ``key`` column holds the row's id
+    pagination: page info returned by a keyset-paginated service
+                ({'next_cursor', 'total'} plus 'page_size'); df holds only the current page
+    on_bulk_update: callback(row_ids, new_values) applying one change to all selected rows
+    on_bulk_delete: callback(row_ids, old_rows) deleting all selected rows
+    bulk_columns: columns offered in the bulk edit dialog (options from dropdown_columns)
+    Providing a bulk callback switches the table to multi-row selection
+    houses_with_managers_map: the page's loaded house id -> {'address', 'manager_name'}; the edit
+                              dialog shows the manager of the selected house from it (no fetch)
+    version: data version df was loaded at; the selection is cleared when it or the shown rows change
     """
+    # Selections are positions in df: once other rows are shown (another page, a reload
+    # after a live refresh) they would point at different records
+    selection_signature = (version, tuple(df['id'].tolist() if 'id' in df.columns else df.index))
+    if st.session_state.get(f"{key}_selection_signature", selection_signature) != selection_signature:
+        clear_selection(key)
+    st.session_state[f"{key}_selection_signature"] = selection_signature
+
     # Filter out hidden columns
     display_df = df.copy()
     if hidden_columns:
@@ -30,47 +65,104 @@ def table_with_dialog(df, key, on_edit=None, on_delete=None,
         display_df,
         key=f"{key}_display",
         on_select="rerun",
-        selection_mode="single-row",
+        selection_mode="multi-row" if on_bulk_update or on_bulk_delete else "single-row",
         use_container_width=True
     )
 
     # Action buttons
-    col1, col2, col3 = st.columns([1, 1, 8])
+    col1, col2, col3, col4 = st.columns([1, 1, 2, 6])
     
     selected_rows = event.selection.rows if hasattr(event, 'selection') and event.selection else []
+    can_delete = allow_delete and (len(selected_rows) == 1 or (len(selected_rows) > 1 and on_bulk_delete))
     
     with col1:
-        if st.button("✏️ Sửa", disabled=not selected_rows or not allow_edit, key=f"{key}_edit_btn"):
+        if st.button("✏️ Sửa", disabled=len(selected_rows) != 1 or not allow_edit, key=f"{key}_edit_btn"):
             st.session_state[f"{key}_selected_row"] = selected_rows[0]
             st.session_state[f"{key}_show_edit"] = True
             st.rerun()
     
     with col2:
-        if st.button("🗑️ Xóa", disabled=not selected_rows or not allow_delete, key=f"{key}_delete_btn"):
-            st.session_state[f"{key}_selected_row"] = selected_rows[0]
-            st.session_state[f"{key}_show_delete"] = True
+        if st.button("🗑️ Xóa", disabled=not can_delete, key=f"{key}_delete_btn") and can_delete:
+            if len(selected_rows) == 1:
+                st.session_state[f"{key}_selected_row"] = selected_rows[0]
+                st.session_state[f"{key}_show_delete"] = True
+            else:
+                st.session_state[f"{key}_selected_rows"] = selected_ids(df, selected_rows)
+                st.session_state[f"{key}_show_bulk_delete"] = True
+            st.rerun()
+
+    with col3:
+        if on_bulk_update and st.button(f"🧩 Sửa hàng loạt ({len(selected_rows)})", disabled=not selected_rows or not allow_edit,
+                                        key=f"{key}_bulk_edit_btn"):
+            st.session_state[f"{key}_selected_rows"] = selected_ids(df, selected_rows)
+            st.session_state[f"{key}_show_bulk_edit"] = True
             st.rerun()
 
+    if pagination is not None:
+        pager(key, pagination)
+
     # Edit dialog
     if st.session_state.get(f"{key}_show_edit", False):
-        edit_dialog(df, key, on_edit, dropdown_columns, hidden_columns, disabled_columns, original_to_display)
+        edit_dialog(df, key, on_edit, dropdown_columns, hidden_columns, disabled_columns, original_to_display,
+                    houses_with_managers_map)
 
     # Delete confirmation dialog
     if st.session_state.get(f"{key}_show_delete", False):
         delete_dialog(df, key, on_delete)
 
+    # Bulk dialogs
+    if st.session_state.get(f"{key}_show_bulk_edit", False):
+        bulk_edit_dialog(df, key, on_bulk_update, bulk_columns or [], dropdown_columns or {}, original_to_display)
+    if st.session_state.get(f"{key}_show_bulk_delete", False):
+        bulk_delete_dialog(df, key, on_bulk_delete)
+
     return display_df
 
+def selected_ids(df, rows):
+    """ids of the selected row positions, kept for bulk actions instead of the positions"""
+    return df.iloc[[i for i in rows if i < len(df)]]['id'].tolist()
+
+def clear_selection(key):
+    """Drop the table's row selection and close the dialogs acting on it"""
+    for suffix in ("display", "selected_row", "selected_rows"):
+        st.session_state.pop(f"{key}_{suffix}", None)
+    for dialog in ("edit", "delete", "bulk_edit", "bulk_delete"):
+        st.session_state[f"{key}_show_{dialog}"] = False
+
+def pager(key, pagination):
+    """Previous/next controls over the cursor stack kept in session state"""
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    if pagination.get('total') is not None:
+        st.session_state[f"{key}_total"] = pagination['total']
+    total = st.session_state.get(f"{key}_total")
+    page_number = len(cursors)
+
+    col_prev, col_info, col_next = st.columns([1, 4, 1])
+    with col_prev:
+        if st.button("◀ Trang trước", disabled=page_number == 1, key=f"{key}_prev_page", use_container_width=True) and page_number > 1:
+            cursors.pop()
+            # Row indices of the old page no longer apply
+            st.session_state.pop(f"{key}_display", None)
+            st.rerun()
+    with col_info:
+        if total is not None:
+            page_count = max(1, math.ceil(total / pagination['page_size']))
+            st.caption(f"Trang {page_number}/{page_count} · {total} bản ghi")
+        else:
+            st.caption(f"Trang {page_number}")
+    with col_next:
+        if st.button("Trang sau ▶", disabled=not pagination.get('next_cursor'), key=f"{key}_next_page", use_container_width=True) and pagination.get('next_cursor'):
+            cursors.append(pagination['next_cursor'])
+            st.session_state.pop(f"{key}_display", None)
+            st.rerun()
+
 @st.dialog("Chỉnh sửa thông tin")
-def edit_dialog(df, key, on_edit, dropdown_columns, hidden_columns, disabled_columns, original_to_display):
-    from service.guest_service import get_houses_with_managers_map
-    
+def edit_dialog(df, key, on_edit, dropdown_columns, hidden_columns, disabled_columns, original_to_display,
+                houses_with_managers_map=None):
+    # Widgets inside a dialog rerun only the dialog: everything it shows comes from the arguments
     row_idx = st.session_state.get(f"{key}_selected_row", 0)
     current_row = df.iloc[row_idx].to_dict()
     
-    # Get houses with managers for dynamic updates
-    houses_with_managers_map, _ = get_houses_with_managers_map()
-    
     new_values = {}
     
     # Create form fields for each editable column
@@ -127,10 +219,14 @@ def edit_dialog(df, key, on_edit, dropdown_columns, hidden_columns, disabled_col
         # Check if this column has dropdown options
         elif dropdown_columns and orig_col in dropdown_columns:
             options = dropdown_columns[orig_col]
-            try:
+            if isinstance(options, LabelIndex):
+                # Select the row's option by id: labels of duplicate names are disambiguated
+                if options.key in current_row:
+                    current_row[orig_col] = options.get(current_row[options.key], current_value)
+                default_index = options.position(current_row[orig_col])
+                options = options.options
+            else:
                 default_index = options.index(current_value) if current_value in options else 0
-            except:
-                default_index = 0
             new_values[orig_col] = st.selectbox(
                 display_col, 
                 options, 
@@ -141,13 +237,8 @@ def edit_dialog(df, key, on_edit, dropdown_columns, hidden_columns, disabled_col
             
             # If this is house_address selection, show corresponding manager
             if orig_col == 'house_address' and houses_with_managers_map:
-                selected_address = new_values[orig_col]
-                # Find house_id for the selected address
-                house_id = None
-                for hid, house_info in houses_with_managers_map.items():
-                    if house_info['address'] == selected_address:
-                        house_id = hid
-                        break
+                house_id = dropdown_columns[orig_col].id_of(new_values[orig_col]) \
+                    if isinstance(dropdown_columns[orig_col], LabelIndex) else None
                 
                 if house_id and house_id in houses_with_managers_map:
                     manager_name = houses_with_managers_map[house_id]['manager_name']
@@ -219,3 +310,55 @@ def delete_dialog(df, key, on_delete):
         if st.button("Hủy", key=f"{key}_cancel_delete", use_container_width=True):
             st.session_state[f"{key}_show_delete"] = False
             st.rerun()
+
+@st.dialog("Sửa hàng loạt")
+def bulk_edit_dialog(df, key, on_bulk_update, bulk_columns, dropdown_columns, original_to_display):
+    row_ids = st.session_state.get(f"{key}_selected_rows", [])
+    st.write(f"Áp dụng cho **{len(row_ids)}** bản ghi đã chọn")
+
+    columns = [col for col in bulk_columns if col in dropdown_columns]
+    column = st.selectbox(
+        "Trường cần sửa",
+        columns,
+        format_func=lambda col: original_to_display.get(col, col),
+        key=f"{key}_bulk_column"
+    )
+    options = dropdown_columns.get(column, [])
+    if isinstance(options, LabelIndex):
+        options = options.options
+    value = st.selectbox("Giá trị mới", options, key=f"{key}_bulk_value") if column else None
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Lưu", key=f"{key}_bulk_save", disabled=not row_ids or value is None, use_container_width=True):
+            st.session_state[f"{key}_show_bulk_edit"] = False
+            if on_bulk_update:
+                on_bulk_update(row_ids=row_ids, new_values={column: value})
+            st.rerun()
+
+    with col2:
+        if st.button("Hủy", key=f"{key}_bulk_cancel", use_container_width=True):
+            st.session_state[f"{key}_show_bulk_edit"] = False
+            st.rerun()
+
+@st.dialog("Xác nhận xóa hàng loạt")
+def bulk_delete_dialog(df, key, on_bulk_delete):
+    row_ids = st.session_state.get(f"{key}_selected_rows", [])
+    old_rows = df[df['id'].isin(row_ids)]
+
+    st.write(f"Bạn có chắc chắn muốn xóa **{len(row_ids)}** bản ghi này?")
+    if 'guest_name' in old_rows.columns:
+        st.write(", ".join(old_rows['guest_name'].astype(str).head(10)) + (" ..." if len(old_rows) > 10 else ""))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Xóa", key=f"{key}_confirm_bulk_delete", type="primary", use_container_width=True):
+            st.session_state[f"{key}_show_bulk_delete"] = False
+            if on_bulk_delete:
+                on_bulk_delete(row_ids=row_ids, old_rows=old_rows.to_dict('records'))
+            st.rerun()
+
+    with col2:
+        if st.button("Hủy", key=f"{key}_cancel_bulk_delete", use_container_width=True):
+            st.session_state[f"{key}_show_bulk_delete"] = False
+            st.rerun()
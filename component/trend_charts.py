@@ -0,0 +1,49 @@
+"""
+Trend charts of the analytics tab (see get_guest_trends).
+
+A long daily range would send one point per day and status to the browser;
+above ``max_points`` periods every trace is decimated to the same positions:
+the first and last period plus the lowest and highest total of each chunk,
+so peaks and dips stay visible.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+def decimated_positions(values: pd.Series, max_points: int) -> np.ndarray:
+    """Positions of ``values`` to plot: all of them, or min/max per chunk when there are more than max_points"""
+    count = len(values)
+    if count <= max_points:
+        return np.arange(count)
+    chunk = np.arange(count) * (max_points // 2) // count
+    series = pd.Series(values.to_numpy(), index=np.arange(count))
+    grouped = series.groupby(chunk)
+    return np.unique(np.concatenate([[0, count - 1], grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy()]))
+
+def trend_figures(trends: Dict, max_points: int) -> Dict[str, Optional[go.Figure]]:
+    """New guests line and status mix (stacked share) charts; None when there is nothing to plot"""
+    new_guests = trends['new_guests']
+    if not new_guests.sum():
+        return {'new_guests': None, 'status_mix': None}
+    positions = decimated_positions(new_guests, max_points)
+    new_guests = new_guests.iloc[positions]
+    status_share = trends['status_share'].iloc[positions]
+    status_share = status_share.loc[:, trends['status_counts'].sum() > 0]
+
+    new_guests_figure = px.line(
+        x=new_guests.index, y=new_guests.to_numpy(), markers=len(new_guests) <= 60,
+        labels={'x': 'Thời gian', 'y': 'Khách mới'},
+        title="Khách mới theo thời gian",
+        height=350
+    )
+    status_mix_figure = px.area(
+        status_share,
+        labels={'period': 'Thời gian', 'value': 'Tỷ lệ', 'variable': 'Trạng thái'},
+        title="Tỷ lệ trạng thái của khách mới",
+        height=350
+    )
+    status_mix_figure.update_yaxes(tickformat='.0%', range=[0, 1])
+    return {'new_guests': new_guests_figure, 'status_mix': status_mix_figure}
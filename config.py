@@ -7,5 +7,58 @@ load_dotenv(".env", override=True)
 class Settings:
     SUPABASE_URL: str = os.getenv("SUPABASE_URL")
     SUPABASE_ANON_KEY: str = os.getenv("SUPABASE_ANON_KEY")
+    # "supabase" (default) or "sqlite" for the offline stand-in backend
+    DATA_BACKEND: str = os.getenv("DATA_BACKEND", "supabase").lower()
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "bekind.db")
+    # Shared reference-data cache (houses, managers, marketers)
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+    # Guest list paging: rows per page and PostgREST count mode (exact | planned | estimated)
+    GUEST_PAGE_SIZE: int = int(os.getenv("GUEST_PAGE_SIZE", "50"))
+    GUEST_COUNT_MODE: str = os.getenv("GUEST_COUNT_MODE", "exact")
+    # Thread pool used to run a page's independent queries concurrently
+    QUERY_WORKERS: int = int(os.getenv("QUERY_WORKERS", "8"))
+    # PostgREST HTTP transport: keep-alive pool (size it above QUERY_WORKERS), timeouts in seconds
+    HTTP2: bool = os.getenv("HTTP2", "true").lower() == "true"
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT: float = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+    HTTP_WRITE_TIMEOUT: float = float(os.getenv("HTTP_WRITE_TIMEOUT", "20"))
+    HTTP_POOL_TIMEOUT: float = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+    HTTP_ACCEPT_ENCODING: str = os.getenv("HTTP_ACCEPT_ENCODING", "gzip")
+    # Retries for idempotent reads (GET/HEAD) only, with jittered exponential backoff
+    HTTP_RETRIES: int = int(os.getenv("HTTP_RETRIES", "2"))
+    HTTP_RETRY_BACKOFF: float = float(os.getenv("HTTP_RETRY_BACKOFF", "0.2"))
+    HTTP_RETRY_MAX_BACKOFF: float = float(os.getenv("HTTP_RETRY_MAX_BACKOFF", "2"))
+    # Circuit breaker on reads: open after N consecutive failed (or slower than SLOW_CALL) reads,
+    # probe again after RESET seconds; meanwhile serve the last good result kept for STALE_TTL
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_SECONDS: float = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+    BREAKER_SLOW_CALL_SECONDS: float = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "10"))
+    STALE_TTL_SECONDS: float = float(os.getenv("STALE_TTL_SECONDS", "86400"))
+    STALE_MAX_ENTRIES: int = int(os.getenv("STALE_MAX_ENTRIES", "512"))
+    # Incremental guest sync (needs sql/guest_sync.sql): keep each role's guest set in memory and
+    # fetch only rows changed since the last sync. OVERLAP re-reads recent changes in case commits
+    # land out of timestamp order; TTL forces a full reload and bounds how long tombstones are needed
+    GUEST_SYNC: bool = os.getenv("GUEST_SYNC", "false").lower() == "true"
+    GUEST_SYNC_OVERLAP_SECONDS: float = float(os.getenv("GUEST_SYNC_OVERLAP_SECONDS", "5"))
+    GUEST_SYNC_TTL_SECONDS: float = float(os.getenv("GUEST_SYNC_TTL_SECONDS", "3600"))
+    # Push Guest/House/Account changes to open pages (Supabase Realtime, see sql/realtime.sql);
+    # pages check the in-memory feed every POLL seconds and rerun only if their data changed
+    CHANGE_FEED: bool = os.getenv("CHANGE_FEED", "true").lower() == "true"
+    CHANGE_FEED_POLL_SECONDS: float = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "3"))
+    # Service-call timing for the admin performance panel: samples kept per (call, role, page)
+    METRICS: bool = os.getenv("METRICS", "true").lower() == "true"
+    METRICS_SAMPLES: int = int(os.getenv("METRICS_SAMPLES", "500"))
+    # Page view models (guest tables, dropdown options, charts) reused across reruns until the change
+    # feed reports a change to their data; TTL bounds staleness if realtime events are missed
+    VIEW_CACHE_TTL_SECONDS: float = float(os.getenv("VIEW_CACHE_TTL_SECONDS", "300"))
+    VIEW_CACHE_MAX_ENTRIES: int = int(os.getenv("VIEW_CACHE_MAX_ENTRIES", "256"))
+    # Dashboard KPIs (sql/guest_analytics.sql dashboard_kpis) cached per role scope
+    KPI_CACHE_TTL_SECONDS: float = float(os.getenv("KPI_CACHE_TTL_SECONDS", "60"))
+    # Most periods drawn per trend chart trace; longer ranges are decimated (component/trend_charts.py)
+    TREND_MAX_POINTS: int = int(os.getenv("TREND_MAX_POINTS", "400"))
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -0,0 +1,134 @@
+"""
+Process-wide TTL + LRU caches shared by every Streamlit session.
+
+Streamlit runs all sessions inside one server process, so module-level caches
+here are shared across users. Each cache is a named namespace that can be
+invalidated explicitly after a mutation.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from config import settings
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+_caches: Dict[str, TTLCache] = {}
+_registry_lock = threading.Lock()
+
+def get_cache(namespace: str, ttl: Optional[float] = None, max_entries: Optional[int] = None) -> TTLCache:
+    """Return the shared cache for ``namespace``, creating it on first use"""
+    with _registry_lock:
+        if namespace not in _caches:
+            _caches[namespace] = TTLCache(
+                ttl if ttl is not None else settings.CACHE_TTL_SECONDS,
+                max_entries if max_entries is not None else settings.CACHE_MAX_ENTRIES,
+            )
+        return _caches[namespace]
+
+def invalidate(namespace: str) -> None:
+    """Drop every entry of ``namespace`` (no-op if it was never used)"""
+    cache = _caches.get(namespace)
+    if cache is not None:
+        cache.clear()
+
+def _freeze(value: Any) -> Hashable:
+    # Filters and other dict/list arguments become nested tuples
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def cache_key(func: Callable, args: tuple, kwargs: dict) -> Hashable:
+    """Key identifying one call of ``func`` across modules"""
+    return (func.__module__, func.__qualname__, _freeze(args), _freeze(kwargs))
+
+def succeeded(result: Any) -> bool:
+    # Services return (data, message); data is None when the call failed
+    return not isinstance(result, tuple) or result[0] is not None
+
+def cached(namespace: str, ttl: Optional[float] = None, max_entries: Optional[int] = None,
+           should_cache: Callable[[Any], bool] = succeeded):
+    """Memoize a service function in a shared namespace keyed by its arguments"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_cache(namespace, ttl, max_entries)
+            key = cache_key(func, args, kwargs)
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = func(*args, **kwargs)
+                if should_cache(result):
+                    cache.set(key, result)
+            return result
+        return wrapper
+    return decorator
+
+# Houses and accounts change rarely but are read on every guest page render
+REFERENCE_NAMESPACE = "reference"
+# Synced guest sets (settings.GUEST_SYNC); rows embed house addresses and account names
+GUEST_SYNC_NAMESPACE = "guest_sync"
+
+def invalidate_reference_data() -> None:
+    invalidate(REFERENCE_NAMESPACE)
+    # House/account edits do not touch Guest.updated_at, so synced rows would keep the old names
+    invalidate(GUEST_SYNC_NAMESPACE)
+
+# Page view models built from service results, keyed by the data version they show
+VIEW_NAMESPACE = "view"
+
+def view_model(key: Hashable, version: Optional[Hashable], build: Callable[[], Any],
+               should_cache: Callable[[Any], bool] = succeeded) -> Any:
+    """
+    Return build() memoized under ``key`` for one data ``version`` (see
+    change_feed.data_version). A new version rebuilds; ``version`` None always builds.
+    Keys must include whatever scopes the data (account, filters, page)
+    """
+    if version is None:
+        return build()
+    cache = get_cache(VIEW_NAMESPACE, settings.VIEW_CACHE_TTL_SECONDS, settings.VIEW_CACHE_MAX_ENTRIES)
+    full_key = (_freeze(key), version)
+    result = cache.get(full_key, _MISSING)
+    if result is _MISSING:
+        result = build()
+        if should_cache(result):
+            cache.set(full_key, result)
+    return result
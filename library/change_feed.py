@@ -0,0 +1,165 @@
+"""
+In-process change feed for Guest, House and Account rows.
+
+Writes are published here by Supabase Realtime (a listener thread subscribed
+to postgres_changes, see sql/realtime.sql), by the services for this process's
+own writes, or directly by the SQLite backend. Each event updates the shared caches and bumps a sequence number per
+topic; open pages poll those numbers in memory (component/live_refresh.py) and
+rerun only when something they display has changed.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+from config import settings
+from library.cache import invalidate_reference_data
+
+logger = logging.getLogger(__name__)
+
+WATCHED_TABLES = ("Guest", "House", "Account")
+# Columns deciding who can see a row: a change bumps (table, column, value) for the old and new value
+SCOPE_COLUMNS = {"Guest": ("house_id", "marketer_id")}
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    table: str
+    type: str  # INSERT | UPDATE | DELETE
+    record: Dict = field(default_factory=dict)
+    old_record: Dict = field(default_factory=dict)
+
+_subscribers: List[Callable[[ChangeEvent], None]] = []
+_sequence = 0
+_topic_sequences: Dict[Hashable, int] = defaultdict(int)
+_lock = threading.Lock()
+# Set once the realtime channel is subscribed (the SQLite backend publishes every write itself)
+_listening = threading.Event()
+
+def subscribe(callback: Callable[[ChangeEvent], None]) -> Callable[[], None]:
+    """Call ``callback`` for every published event; returns an unsubscribe function"""
+    with _lock:
+        _subscribers.append(callback)
+    def unsubscribe():
+        with _lock:
+            if callback in _subscribers:
+                _subscribers.remove(callback)
+    return unsubscribe
+
+def event_topics(event: ChangeEvent) -> List[Hashable]:
+    """(table,) plus one topic per scope value the row had before or has after the change"""
+    topics = [(event.table,)]
+    for column in SCOPE_COLUMNS.get(event.table, ()):
+        for record in (event.record, event.old_record):
+            if record.get(column) is not None:
+                topics.append((event.table, column, record[column]))
+        # Without REPLICA IDENTITY FULL, old_record only has the primary key: the row's
+        # previous audience is unknown, so every scoped view has to refresh
+        if event.type != "INSERT" and column not in event.old_record:
+            topics.append((event.table, "unscoped"))
+    return topics
+
+def publish(event: ChangeEvent) -> None:
+    global _sequence
+    with _lock:
+        _sequence += 1
+        for topic in event_topics(event):
+            _topic_sequences[topic] = _sequence
+        subscribers = list(_subscribers)
+    for callback in subscribers:
+        try:
+            callback(event)
+        except Exception:
+            logger.exception("Change feed subscriber failed for %s %s", event.type, event.table)
+
+def publish_writes(table: str, type: str, records: Iterable[Dict]) -> None:
+    """
+    Publish rows this process has just written, so its own pages see the change on
+    the next rerun instead of after the Realtime echo (which bumps the same topics
+    again). The SQLite backend already publishes every write it executes.
+    """
+    if settings.DATA_BACKEND == "sqlite":
+        return
+    for record in records:
+        if type == "DELETE":
+            publish(ChangeEvent(table, type, {}, record))
+        else:
+            # The previous scope values are unknown: event_topics marks updates unscoped
+            publish(ChangeEvent(table, type, record))
+
+def publish_inserted(table: str, records: Iterable[Dict]) -> None:
+    """
+    Bump the topics of rows inserted without returning them (returning=minimal), so
+    pages showing them refresh. Subscribers are not called: the rows have no id yet.
+    The SQLite backend already publishes every write it executes.
+    """
+    global _sequence
+    if settings.DATA_BACKEND == "sqlite":
+        return
+    topics = {topic for record in records for topic in event_topics(ChangeEvent(table, "INSERT", record))}
+    with _lock:
+        _sequence += 1
+        for topic in topics:
+            _topic_sequences[topic] = _sequence
+
+def current_sequence() -> int:
+    """Sequence number of the latest event; take it before loading data for a page"""
+    return _sequence
+
+def last_change(topics: Iterable[Hashable]) -> int:
+    """Sequence number of the latest event touching any of ``topics`` (0 if none)"""
+    with _lock:
+        return max((_topic_sequences.get(topic, 0) for topic in topics), default=0)
+
+def data_version(topics: Iterable[Hashable]) -> Optional[int]:
+    """
+    Version of the data behind ``topics`` for cache keys (library.cache.view_model):
+    last_change(topics) while the feed sees every write, None when it cannot
+    """
+    if settings.DATA_BACKEND != "sqlite" and not (settings.CHANGE_FEED and _listening.is_set()):
+        return None
+    return last_change(topics)
+
+def _update_caches(event: ChangeEvent) -> None:
+    # Guest rows are picked up by the next read (delta sync when GUEST_SYNC is on): realtime
+    # payloads lack the embedded house/account fields the cached rows carry
+    if event.table in ("House", "Account"):
+        invalidate_reference_data()
+
+subscribe(_update_caches)
+
+def _on_realtime_change(payload: Dict) -> None:
+    data = payload.get("data", payload)
+    publish(ChangeEvent(data["table"], data["type"], data.get("record") or {}, data.get("old_record") or {}))
+
+async def _listen_realtime() -> None:
+    from library.supabase import create_async_supabase
+    client = await create_async_supabase()
+    channel = client.channel("bekind-changes")
+    for table in WATCHED_TABLES:
+        channel.on_postgres_changes("*", _on_realtime_change, table=table)
+    await channel.subscribe()
+    _listening.set()
+    # The realtime client reconnects and rejoins on its own; keep the loop alive
+    await asyncio.Event().wait()
+
+def _run_listener() -> None:
+    try:
+        asyncio.run(_listen_realtime())
+    except Exception:
+        logger.exception("Change feed listener stopped")
+    finally:
+        _listening.clear()
+
+_listener: threading.Thread = None
+_listener_lock = threading.Lock()
+
+def start_change_feed() -> None:
+    """Start the Supabase Realtime listener once per process (the SQLite backend publishes directly)"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None or not settings.CHANGE_FEED or settings.DATA_BACKEND == "sqlite":
+            return
+        _listener = threading.Thread(target=_run_listener, name="bekind-change-feed", daemon=True)
+        _listener.start()
@@ -0,0 +1,24 @@
+"""
+Run independent service calls concurrently.
+
+Service functions are synchronous and block on network I/O, so a shared
+thread pool lets a page fire all of its queries at once and wait roughly as
+long as the slowest one instead of the sum of all of them.
+"""
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from config import settings
+
+_executor = ThreadPoolExecutor(max_workers=settings.QUERY_WORKERS, thread_name_prefix="bekind-query")
+
+def submit(fn: Callable, *args, **kwargs) -> Future:
+    """Start ``fn(*args, **kwargs)`` in the pool, carrying over the caller's context variables"""
+    context = contextvars.copy_context()
+    return _executor.submit(context.run, fn, *args, **kwargs)
+
+def gather(**calls: Callable[[], Any]) -> Dict[str, Any]:
+    """Run zero-argument callables concurrently and return their results by name"""
+    futures = {name: submit(call) for name, call in calls.items()}
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,887 @@
+"""
+Offline stand-in for the Supabase client backed by SQLite.
+
+Implements the subset of the supabase-py / PostgREST query builder used by the
+service layer (``table().select().eq()...execute()``), including embedded
+many-to-one joins such as ``marketer:Account!Guest_marketer_id_fkey(id, full_name)``,
+so services can run against a local database without a live Supabase project.
+"""
+import json
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from postgrest.exceptions import APIError
+
+from library.change_feed import ChangeEvent, SCOPE_COLUMNS, publish
+from library.resilience import report_backend_error
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS "Account" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now') || '+00:00'),
+    full_name TEXT,
+    phone_number TEXT NOT NULL UNIQUE,
+    role TEXT
+);
+
+CREATE TABLE IF NOT EXISTS "House" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now') || '+00:00'),
+    manager_id INTEGER REFERENCES "Account"(id),
+    address TEXT
+);
+
+CREATE TABLE IF NOT EXISTS "Guest" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now') || '+00:00'),
+    marketer_id INTEGER REFERENCES "Account"(id),
+    house_id INTEGER REFERENCES "House"(id),
+    view_date TEXT,
+    guest_name TEXT,
+    guest_phone_number TEXT,
+    status TEXT,
+    admin_note TEXT,
+    manager_note TEXT,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now') || '+00:00')
+);
+
+CREATE INDEX IF NOT EXISTS "House_manager_id_idx" ON "House"(manager_id);
+CREATE INDEX IF NOT EXISTS "Guest_marketer_id_idx" ON "Guest"(marketer_id);
+CREATE INDEX IF NOT EXISTS "Guest_house_id_idx" ON "Guest"(house_id);
+CREATE INDEX IF NOT EXISTS "Guest_created_at_idx" ON "Guest"(created_at);
+"""
+
+# Change tracking for incremental guest sync (mirrors sql/guest_sync.sql)
+SYNC_SCHEMA = """
+CREATE INDEX IF NOT EXISTS "Guest_updated_at_idx" ON "Guest"(updated_at);
+
+CREATE TABLE IF NOT EXISTS "GuestTombstone" (
+    guest_id INTEGER PRIMARY KEY,
+    deleted_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now') || '+00:00')
+);
+CREATE INDEX IF NOT EXISTS "GuestTombstone_deleted_at_idx" ON "GuestTombstone"(deleted_at);
+
+-- Only rows of databases migrated from before updated_at existed arrive without it
+CREATE TRIGGER IF NOT EXISTS "Guest_insert_updated_at" AFTER INSERT ON "Guest"
+WHEN NEW.updated_at IS NULL
+BEGIN
+    UPDATE "Guest" SET updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now') || '+00:00' WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS "Guest_touch_updated_at"
+AFTER UPDATE OF created_at, marketer_id, house_id, view_date, guest_name, guest_phone_number,
+                status, admin_note, manager_note ON "Guest"
+BEGIN
+    UPDATE "Guest" SET updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now') || '+00:00' WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS "Guest_tombstone" AFTER DELETE ON "Guest"
+BEGIN
+    INSERT OR REPLACE INTO "GuestTombstone"(guest_id, deleted_at)
+    VALUES (OLD.id, strftime('%Y-%m-%dT%H:%M:%f', 'now') || '+00:00');
+END;
+"""
+
+# Daily guest counts per manager/marketer maintained by triggers (mirrors sql/guest_rollup.sql).
+# SQLite has no NULLS NOT DISTINCT, so the key maps missing ids and statuses to sentinels
+_ROLLUP_KEY = "day, dimension, IFNULL(group_id, 0), IFNULL(status, X'00')"
+_ROLLUP_ADD = """
+    INSERT INTO "GuestDailyRollup"(day, dimension, group_id, status, guest_count)
+    VALUES (date({row}.created_at, '+7 hours'), 'manager',
+            (SELECT manager_id FROM "House" WHERE id = {row}.house_id), {row}.status, {delta}),
+           (date({row}.created_at, '+7 hours'), 'marketer', {row}.marketer_id, {row}.status, {delta})
+    ON CONFLICT({key}) DO UPDATE SET guest_count = guest_count + excluded.guest_count;"""
+
+ROLLUP_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS "GuestDailyRollup" (
+    day TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    group_id INTEGER,
+    status TEXT,
+    guest_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS "GuestDailyRollup_key" ON "GuestDailyRollup"({_ROLLUP_KEY});
+-- Carries status and guest_count so sums over a dimension never visit the table
+DROP INDEX IF EXISTS "GuestDailyRollup_group_idx";
+CREATE INDEX IF NOT EXISTS "GuestDailyRollup_group_sum_idx"
+    ON "GuestDailyRollup"(dimension, group_id, day, status, guest_count);
+
+CREATE TRIGGER IF NOT EXISTS "Guest_rollup_insert" AFTER INSERT ON "Guest"
+BEGIN{_ROLLUP_ADD.format(row="NEW", delta=1, key=_ROLLUP_KEY)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS "Guest_rollup_update"
+AFTER UPDATE OF created_at, marketer_id, house_id, status ON "Guest"
+BEGIN{_ROLLUP_ADD.format(row="OLD", delta=-1, key=_ROLLUP_KEY)}{_ROLLUP_ADD.format(row="NEW", delta=1, key=_ROLLUP_KEY)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS "Guest_rollup_delete" AFTER DELETE ON "Guest"
+BEGIN{_ROLLUP_ADD.format(row="OLD", delta=-1, key=_ROLLUP_KEY)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS "House_rollup_manager" AFTER UPDATE OF manager_id ON "House"
+WHEN OLD.manager_id IS NOT NEW.manager_id
+BEGIN
+    INSERT INTO "GuestDailyRollup"(day, dimension, group_id, status, guest_count)
+    SELECT date(g.created_at, '+7 hours'), 'manager', m.manager_id, g.status, m.sign * COUNT(*)
+    FROM "Guest" g
+    CROSS JOIN (SELECT OLD.manager_id AS manager_id, -1 AS sign UNION ALL SELECT NEW.manager_id, 1) m
+    WHERE g.house_id = NEW.id
+    GROUP BY 1, 3, 4, m.sign
+    ON CONFLICT({_ROLLUP_KEY}) DO UPDATE SET guest_count = guest_count + excluded.guest_count;
+END;
+"""
+
+# Append-only guest status log written by triggers (mirrors sql/guest_status_history.sql)
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS "GuestStatusEvent" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guest_id INTEGER NOT NULL,
+    from_status TEXT,
+    to_status TEXT,
+    changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now') || '+00:00'),
+    is_created INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS "GuestStatusEvent_guest_idx" ON "GuestStatusEvent"(guest_id, changed_at);
+CREATE INDEX IF NOT EXISTS "GuestStatusEvent_changed_at_idx" ON "GuestStatusEvent"(changed_at);
+CREATE INDEX IF NOT EXISTS "GuestStatusEvent_to_status_idx" ON "GuestStatusEvent"(to_status, changed_at);
+CREATE INDEX IF NOT EXISTS "GuestStatusEvent_created_idx" ON "GuestStatusEvent"(changed_at) WHERE is_created;
+
+CREATE TRIGGER IF NOT EXISTS "Guest_status_created" AFTER INSERT ON "Guest"
+BEGIN
+    INSERT INTO "GuestStatusEvent"(guest_id, from_status, to_status, changed_at, is_created)
+    VALUES (NEW.id, NULL, NEW.status, NEW.created_at, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS "Guest_status_changed" AFTER UPDATE OF status ON "Guest"
+WHEN OLD.status IS NOT NEW.status
+BEGIN
+    INSERT INTO "GuestStatusEvent"(guest_id, from_status, to_status) VALUES (NEW.id, OLD.status, NEW.status);
+END;
+"""
+
+# Foreign key name -> (source table, source column, referenced table)
+FOREIGN_KEYS = {
+    "Guest_marketer_id_fkey": ("Guest", "marketer_id", "Account"),
+    "Guest_house_id_fkey": ("Guest", "house_id", "House"),
+    "House_manager_id_fkey": ("House", "manager_id", "Account"),
+}
+
+# SQLite constraint messages -> Postgres SQLSTATE codes returned by PostgREST
+_INTEGRITY_CODES = {
+    "UNIQUE": "23505",
+    "FOREIGN KEY": "23503",
+    "NOT NULL": "23502",
+    "CHECK": "23514",
+}
+
+# PostgREST filter operators accepted inside or_()/and() logic trees
+_TREE_OPERATORS = {
+    "eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=",
+    "like": "LIKE", "ilike": "ILIKE", "is": "IS", "in": "IN",
+}
+
+_EMBED_RE = re.compile(r"^(?:(\w+):)?(\w+)((?:!\w+)*)\((.*)\)$", re.S)
+_COLUMN_RE = re.compile(r"^(?:(\w+):)?(\w+|\*)$")
+
+@dataclass
+class LocalResponse:
+    data: Any
+    count: Optional[int] = None
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _split_top_level(text: str, sep: str = ",") -> List[str]:
+    """Split on separators that are not nested inside parentheses or quotes"""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == sep and depth == 0 and not quoted:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+def parse_select(columns: str) -> List[Dict]:
+    """Parse a PostgREST select string into a tree of columns and embeds"""
+    items = []
+    for part in _split_top_level(re.sub(r"\s+", "", columns or "*")):
+        embed = _EMBED_RE.match(part)
+        if embed:
+            alias, name, modifiers, inner = embed.groups()
+            hints = [m for m in modifiers.split("!") if m]
+            items.append({
+                "type": "embed",
+                "alias": alias or name,
+                "table": name,
+                "fkey": next((h for h in hints if h != "inner"), None),
+                "inner": "inner" in hints,
+                "children": parse_select(inner),
+            })
+            continue
+        column = _COLUMN_RE.match(part)
+        if not column:
+            raise APIError({"message": f"Cú pháp select không hợp lệ: {part}", "code": "PGRST100"})
+        alias, name = column.groups()
+        items.append({"type": "column", "alias": alias or name, "name": name})
+    return items
+
+def _parse_tree_value(operator: str, raw: str):
+    if operator == "in":
+        return [_parse_tree_value("eq", v) for v in _split_top_level(raw.strip("()"))]
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+        return raw[1:-1].replace('\\"', '"')
+    if operator == "is":
+        return {"null": None, "true": True, "false": False}.get(raw.lower(), raw)
+    return raw
+
+def parse_logic_tree(text: str, conjunction: str = "or") -> tuple:
+    """Parse PostgREST ``or=(a.eq.1,and(b.gt.2,c.is.null))`` syntax into a tree"""
+    nodes = []
+    for part in _split_top_level(text.strip()):
+        negate = part.startswith("not.")
+        if negate:
+            part = part[4:]
+        for keyword in ("and", "or"):
+            if part.startswith(keyword + "(") and part.endswith(")"):
+                nodes.append((negate, parse_logic_tree(part[len(keyword) + 1:-1], keyword)))
+                break
+        else:
+            column, operator, raw = part.split(".", 2)
+            if operator not in _TREE_OPERATORS:
+                raise APIError({"message": f"Toán tử không hỗ trợ: {operator}", "code": "PGRST100"})
+            value = _parse_tree_value(operator, raw)
+            if operator in ("like", "ilike"):
+                value = value.replace("*", "%")
+            nodes.append((negate, (column, _TREE_OPERATORS[operator], value)))
+    return conjunction, nodes
+
+class LocalClient:
+    """Drop-in replacement for ``supabase.Client`` backed by a SQLite database"""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+        self.connection.executescript(SYNC_SCHEMA)
+        has_rollup, has_history = (self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+            for name in ("GuestDailyRollup", "GuestStatusEvent"))
+        self.connection.executescript(ROLLUP_SCHEMA)
+        self.connection.executescript(HISTORY_SCHEMA)
+        self._columns_cache: Dict[str, List[str]] = {}
+        if not has_rollup:
+            _rebuild_guest_rollup(self)
+        if not has_history:
+            # Earlier changes were never recorded: existing guests start from their current status
+            self.connection.execute("""
+                INSERT INTO "GuestStatusEvent"(guest_id, from_status, to_status, changed_at, is_created)
+                SELECT id, NULL, status, created_at, 1 FROM "Guest"
+            """)
+
+    def _migrate(self) -> None:
+        """Add columns introduced after a database file was created"""
+        guest_columns = {row[1] for row in self.connection.execute('PRAGMA table_info("Guest")')}
+        if "updated_at" not in guest_columns:
+            # ALTER TABLE cannot add a non-constant default; backfill from created_at instead
+            self.connection.execute('ALTER TABLE "Guest" ADD COLUMN updated_at TEXT')
+            self.connection.execute('UPDATE "Guest" SET updated_at = created_at')
+
+    def table(self, name: str) -> "LocalQueryBuilder":
+        return LocalQueryBuilder(self, name)
+
+    def from_(self, name: str) -> "LocalQueryBuilder":
+        return self.table(name)
+
+    def rpc(self, fn: str, params: Optional[Dict] = None) -> "LocalRpcBuilder":
+        return LocalRpcBuilder(self, fn, params or {})
+
+    def columns(self, table: str) -> List[str]:
+        if table not in self._columns_cache:
+            rows = self.run(f"PRAGMA table_info({_quote(table)})")
+            if not rows:
+                raise APIError({"message": f'relation "{table}" does not exist', "code": "42P01"})
+            self._columns_cache[table] = [row["name"] for row in rows]
+        return self._columns_cache[table]
+
+    def run(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self.lock:
+            try:
+                return self.connection.execute(sql, params).fetchall()
+            except sqlite3.IntegrityError as e:
+                code = next((c for key, c in _INTEGRITY_CODES.items() if key in str(e)), "23000")
+                raise APIError({"message": str(e), "code": code, "hint": None, "details": None})
+            except sqlite3.Error as e:
+                report_backend_error()
+                raise APIError({"message": str(e), "code": "PGRST000", "hint": None, "details": None})
+
+class LocalQueryBuilder:
+    """Chainable query builder mirroring ``postgrest.SyncRequestBuilder``"""
+
+    def __init__(self, client: LocalClient, table: str):
+        self.client = client
+        self.table = table
+        self.method = "select"
+        self.columns = "*"
+        self.payload = None
+        self.count_mode = None
+        self.head = False
+        self.on_conflict = None
+        self.ignore_duplicates = False
+        self.returning = "representation"
+        self.filters: List[tuple] = []
+        self.orders: List[tuple] = []
+        self.limit_count: Optional[int] = None
+        self.offset_count: Optional[int] = None
+
+    # Verbs
+    def select(self, *columns: str, count: Optional[str] = None, head: Optional[bool] = None):
+        self.method = "select"
+        self.columns = ",".join(columns) if columns else "*"
+        self.count_mode = count
+        self.head = bool(head)
+        return self
+
+    def insert(self, json, *, count: Optional[str] = None, returning: str = "representation",
+               upsert: bool = False, default_to_null: bool = True):
+        self.method = "upsert" if upsert else "insert"
+        self.payload = json
+        self.returning = str(returning)
+        return self
+
+    def upsert(self, json, *, count: Optional[str] = None, returning: str = "representation",
+               ignore_duplicates: bool = False, on_conflict: str = "", default_to_null: bool = True):
+        self.method = "upsert"
+        self.payload = json
+        self.returning = str(returning)
+        self.ignore_duplicates = ignore_duplicates
+        self.on_conflict = on_conflict or None
+        return self
+
+    def update(self, json, *, count: Optional[str] = None, returning: str = "representation"):
+        self.method = "update"
+        self.payload = json
+        return self
+
+    def delete(self, *, count: Optional[str] = None, returning: str = "representation"):
+        self.method = "delete"
+        return self
+
+    # Filters
+    def _filter(self, column: str, operator: str, value):
+        self.filters.append((column, operator, value))
+        return self
+
+    def eq(self, column: str, value):
+        return self._filter(column, "=", value)
+
+    def neq(self, column: str, value):
+        return self._filter(column, "<>", value)
+
+    def gt(self, column: str, value):
+        return self._filter(column, ">", value)
+
+    def gte(self, column: str, value):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column: str, value):
+        return self._filter(column, "<", value)
+
+    def lte(self, column: str, value):
+        return self._filter(column, "<=", value)
+
+    def like(self, column: str, pattern: str):
+        return self._filter(column, "LIKE", pattern.replace("*", "%"))
+
+    def ilike(self, column: str, pattern: str):
+        return self._filter(column, "ILIKE", pattern.replace("*", "%"))
+
+    def is_(self, column: str, value):
+        return self._filter(column, "IS", None if value in (None, "null") else value)
+
+    def in_(self, column: str, values):
+        return self._filter(column, "IN", list(values))
+
+    def or_(self, filters: str, reference_table: Optional[str] = None):
+        return self._filter(reference_table or "", "TREE", parse_logic_tree(filters))
+
+    # Modifiers
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None,
+              foreign_table: Optional[str] = None):
+        self.orders.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, *, foreign_table: Optional[str] = None):
+        self.limit_count = size
+        return self
+
+    def range(self, start: int, end: int, foreign_table: Optional[str] = None):
+        self.offset_count = start
+        self.limit_count = end - start + 1
+        return self
+
+    # Execution
+    def execute(self) -> LocalResponse:
+        handler = getattr(self, f"_execute_{self.method}")
+        response = handler()
+        if self.returning == "minimal":
+            response.data = []
+        return response
+
+    def _column_ref(self, column: str, aliases: Dict[tuple, str]) -> tuple:
+        """Resolve ``col`` or ``embed.col`` to (join path, qualified SQL column)"""
+        *path, name = column.split(".")
+        path = tuple(path)
+        if path not in aliases:
+            raise APIError({"message": f"Không tìm thấy bảng nhúng cho cột {column}", "code": "PGRST108"})
+        return path, f"{aliases[path]}.{_quote(name)}"
+
+    def _condition(self, sql_column: str, operator: str, value, params: list) -> str:
+        if operator == "IN":
+            if not value:
+                return "0"
+            params.extend(value)
+            return f"{sql_column} IN ({', '.join('?' * len(value))})"
+        if operator == "IS":
+            if value is None:
+                return f"{sql_column} IS NULL"
+            params.append(int(value) if isinstance(value, bool) else value)
+            return f"{sql_column} IS ?"
+        if operator == "ILIKE":
+            params.append(value)
+            return f"{sql_column} LIKE ?"
+        if operator == "LIKE":
+            # SQLite LIKE ignores case, GLOB is the case-sensitive equivalent
+            params.append(value.replace("%", "*").replace("_", "?"))
+            return f"{sql_column} GLOB ?"
+        params.append(int(value) if isinstance(value, bool) else value)
+        return f"{sql_column} {operator} ?"
+
+    def _tree_sql(self, tree: tuple, prefix: str, aliases: Dict[tuple, str], params: list) -> str:
+        conjunction, nodes = tree
+        parts = []
+        for negate, node in nodes:
+            if isinstance(node[1], list):
+                sql = self._tree_sql(node, prefix, aliases, params)
+            else:
+                column, operator, value = node
+                _, sql_column = self._column_ref(f"{prefix}.{column}" if prefix else column, aliases)
+                sql = self._condition(sql_column, operator, value, params)
+            parts.append(f"NOT ({sql})" if negate else f"({sql})")
+        return "(" + f" {conjunction.upper()} ".join(parts or ["1"]) + ")"
+
+    def _object_sql(self, table: str, alias: str, items: List[Dict], path: tuple,
+                    joins: List[tuple], aliases: Dict[tuple, str]) -> str:
+        """Build a json_object() expression for one table, registering joins for embeds"""
+        aliases[path] = alias
+        pairs = []
+        for item in items:
+            if item["type"] == "column":
+                names = self.client.columns(table) if item["name"] == "*" else [item["name"]]
+                for name in names:
+                    key = name if item["name"] == "*" else item["alias"]
+                    pairs.append(f"'{key}', {alias}.{_quote(name)}")
+                continue
+
+            source_column = self._resolve_fkey(table, item)
+            child_alias = f"t{len(aliases)}"
+            child_path = path + (item["alias"],)
+            joins.append((child_path, item["table"], child_alias, f"{child_alias}.id = {alias}.{_quote(source_column)}",
+                          item["inner"]))
+            child_sql = self._object_sql(item["table"], child_alias, item["children"], child_path, joins, aliases)
+            pairs.append(f"'{item['alias']}', json(CASE WHEN {child_alias}.id IS NULL THEN NULL ELSE {child_sql} END)")
+        return f"json_object({', '.join(pairs)})"
+
+    def _resolve_fkey(self, table: str, item: Dict) -> str:
+        if item["fkey"]:
+            source, column, target = FOREIGN_KEYS.get(item["fkey"], (None, None, None))
+            if source == table and target == item["table"]:
+                return column
+        else:
+            matches = [column for source, column, target in FOREIGN_KEYS.values()
+                       if source == table and target == item["table"]]
+            if len(matches) == 1:
+                return matches[0]
+        raise APIError({
+            "message": f"Could not find a relationship between '{table}' and '{item['table']}'",
+            "code": "PGRST200",
+        })
+
+    def _from_where(self) -> tuple:
+        """Compile joins and filters shared by the data and count queries"""
+        joins, aliases = [], {}
+        object_sql = self._object_sql(self.table, "t0", parse_select(self.columns), (), joins, aliases)
+
+        # Filters on embedded columns restrict the join (PostgREST semantics), others the rows
+        conditions = {(): []}
+        conditions.update({path: [] for path, *_ in joins})
+        for column, operator, value in self.filters:
+            params = []
+            if operator == "TREE":
+                path = tuple(column.split(".")) if column else ()
+                sql = self._tree_sql(value, column, aliases, params)
+            else:
+                path, sql_column = self._column_ref(column, aliases)
+                sql = self._condition(sql_column, operator, value, params)
+            conditions[path].append((sql, params))
+
+        params, join_sql = [], []
+        for path, table, alias, on, inner in joins:
+            join_sql.append(f"{'INNER' if inner else 'LEFT'} JOIN {_quote(table)} {alias} ON "
+                            + " AND ".join([on] + [sql for sql, _ in conditions[path]]))
+            params.extend(p for _, condition_params in conditions[path] for p in condition_params)
+
+        sql = f" FROM {_quote(self.table)} t0 {' '.join(join_sql)}"
+        if conditions[()]:
+            sql += " WHERE " + " AND ".join(sql for sql, _ in conditions[()])
+            params.extend(p for _, condition_params in conditions[()] for p in condition_params)
+        return object_sql, sql, params, aliases
+
+    def _execute_select(self) -> LocalResponse:
+        object_sql, from_where, params, aliases = self._from_where()
+
+        count = None
+        if self.count_mode:
+            count = self.client.run(f"SELECT COUNT(*){from_where}", params)[0][0]
+        if self.head:
+            return LocalResponse(data=[], count=count)
+
+        sql = f"SELECT {object_sql}{from_where}"
+        if self.orders:
+            terms = []
+            for column, desc, nullsfirst in self.orders:
+                _, sql_column = self._column_ref(column, aliases)
+                term = f"{sql_column} {'DESC' if desc else 'ASC'}"
+                if nullsfirst is not None:
+                    term += " NULLS FIRST" if nullsfirst else " NULLS LAST"
+                terms.append(term)
+            sql += " ORDER BY " + ", ".join(terms)
+        if self.limit_count is not None or self.offset_count is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [self.limit_count if self.limit_count is not None else -1, self.offset_count or 0]
+
+        rows = [json.loads(row[0]) for row in self.client.run(sql, params)]
+        return LocalResponse(data=rows, count=count)
+
+    def _rows_payload(self) -> List[Dict]:
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        return [{k: (int(v) if isinstance(v, bool) else v) for k, v in row.items()} for row in rows]
+
+    def _publish(self, type: str, records: List[Dict], old_records: List[Dict] = None) -> None:
+        """Stand in for Supabase Realtime: report written rows to the change feed"""
+        old_by_id = {row["id"]: row for row in old_records or []}
+        for record in records:
+            if type == "DELETE":
+                publish(ChangeEvent(self.table, type, {}, record))
+            else:
+                publish(ChangeEvent(self.table, type, record, old_by_id.get(record.get("id"), {})))
+
+    def _execute_insert(self) -> LocalResponse:
+        rows = self._insert_rows(conflict_sql="")
+        self._publish("INSERT", rows)
+        return LocalResponse(data=rows)
+
+    def _execute_upsert(self) -> LocalResponse:
+        target = ", ".join(_quote(c.strip()) for c in (self.on_conflict or "id").split(","))
+        rows = self._rows_payload()
+        conflict_columns = {c.strip() for c in (self.on_conflict or "id").split(",")}
+        if self.ignore_duplicates:
+            conflict_sql = f" ON CONFLICT ({target}) DO NOTHING"
+        else:
+            columns = [c for c in rows[0] if c not in conflict_columns] if rows else []
+            updates = ", ".join(f"{_quote(c)} = excluded.{_quote(c)}" for c in columns)
+            conflict_sql = f" ON CONFLICT ({target}) DO UPDATE SET {updates}" if updates else \
+                f" ON CONFLICT ({target}) DO NOTHING"
+        rows = self._insert_rows(conflict_sql)
+        # Inserted and updated rows are not told apart; no old values either
+        self._publish("UPDATE", rows)
+        return LocalResponse(data=rows)
+
+    def _insert_rows(self, conflict_sql: str) -> List[Dict]:
+        rows = self._rows_payload()
+        if not rows:
+            return []
+        # Group rows by their key set so missing keys fall back to column defaults
+        groups: Dict[tuple, List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(row.keys()), []).append(row)
+
+        inserted = []
+        with self.client.lock:
+            self.client.run("BEGIN")
+            try:
+                for columns, group in groups.items():
+                    # Stay well under SQLite's bound-parameter limit
+                    chunk_size = max(1, 30000 // max(1, len(columns)))
+                    for start in range(0, len(group), chunk_size):
+                        chunk = group[start:start + chunk_size]
+                        placeholders = ", ".join(f"({', '.join('?' * len(columns))})" for _ in chunk)
+                        params = [row[c] for row in chunk for c in columns]
+                        sql = (f"INSERT INTO {_quote(self.table)} ({', '.join(map(_quote, columns))}) "
+                               f"VALUES {placeholders}{conflict_sql} RETURNING *")
+                        inserted.extend(dict(r) for r in self.client.run(sql, params))
+                self.client.run("COMMIT")
+            except Exception:
+                self.client.run("ROLLBACK")
+                raise
+        return inserted
+
+    def _where_own_columns(self) -> tuple:
+        params, where = [], []
+        for column, operator, value in self.filters:
+            if "." in column or (operator == "TREE" and column):
+                raise APIError({"message": f"Không hỗ trợ lọc bảng nhúng khi ghi: {column}", "code": "PGRST100"})
+            if operator == "TREE":
+                where.append(self._tree_sql(value, "", {(): _quote(self.table)}, params))
+            else:
+                where.append(self._condition(_quote(column), operator, value, params))
+        return (" WHERE " + " AND ".join(where)) if where else "", params
+
+    def _execute_update(self) -> LocalResponse:
+        data = self._rows_payload()[0]
+        if not data:
+            return LocalResponse(data=[])
+        where, params = self._where_own_columns()
+        assignments = ", ".join(f"{_quote(c)} = ?" for c in data)
+        sql = f"UPDATE {_quote(self.table)} SET {assignments}{where} RETURNING *"
+        with self.client.lock:
+            # Old values tell the change feed who could see the row before (REPLICA IDENTITY FULL)
+            old_rows = self.client.run(f"SELECT * FROM {_quote(self.table)}{where}", params) \
+                if self.table in SCOPE_COLUMNS else []
+            rows = [dict(r) for r in self.client.run(sql, list(data.values()) + params)]
+        self._publish("UPDATE", rows, [dict(r) for r in old_rows])
+        return LocalResponse(data=rows)
+
+    def _execute_delete(self) -> LocalResponse:
+        where, params = self._where_own_columns()
+        rows = [dict(r) for r in self.client.run(f"DELETE FROM {_quote(self.table)}{where} RETURNING *", params)]
+        self._publish("DELETE", rows)
+        return LocalResponse(data=rows)
+
+class LocalRpcBuilder:
+    """Calls a Python equivalent of a Postgres function from ``sql/``"""
+
+    def __init__(self, client: LocalClient, fn: str, params: Dict):
+        self.client = client
+        self.fn = fn
+        self.params = params
+
+    def execute(self) -> LocalResponse:
+        if self.fn not in RPC_FUNCTIONS:
+            raise APIError({"message": f"Could not find the function public.{self.fn}", "code": "PGRST202"})
+        return LocalResponse(data=RPC_FUNCTIONS[self.fn](self.client, **self.params))
+
+def _rebuild_guest_rollup(client: LocalClient) -> int:
+    """SQLite port of rebuild_guest_rollup() in sql/guest_rollup.sql"""
+    with client.lock:
+        client.run("BEGIN IMMEDIATE")
+        try:
+            client.run('DELETE FROM "GuestDailyRollup"')
+            client.run("""
+                INSERT INTO "GuestDailyRollup"(day, dimension, group_id, status, guest_count)
+                SELECT date(g.created_at, '+7 hours'), 'manager', h.manager_id, g.status, COUNT(*)
+                FROM "Guest" g
+                LEFT JOIN "House" h ON h.id = g.house_id
+                GROUP BY 1, 3, 4
+                UNION ALL
+                SELECT date(g.created_at, '+7 hours'), 'marketer', g.marketer_id, g.status, COUNT(*)
+                FROM "Guest" g
+                GROUP BY 1, 3, 4
+            """)
+            rebuilt = client.run('SELECT COUNT(*) FROM "GuestDailyRollup"')[0][0]
+            client.run("COMMIT")
+        except Exception:
+            client.run("ROLLBACK")
+            raise
+    return rebuilt
+
+def _guest_rollup_counts(client: LocalClient, start_day: str = None, end_day: str = None,
+                         group_by: str = None) -> List[Dict]:
+    """SQLite port of guest_rollup_counts() in sql/guest_rollup.sql"""
+    rows = client.run("""
+        SELECT r.dimension, r.group_id, a.full_name AS group_name, r.status, r.guest_count
+        FROM (
+            SELECT dimension, group_id, status, SUM(guest_count) AS guest_count
+            FROM "GuestDailyRollup"
+            WHERE (:start_day IS NULL OR day >= :start_day)
+              AND (:end_day IS NULL OR day <= :end_day)
+              AND (:group_by IS NULL OR dimension = :group_by)
+            GROUP BY dimension, group_id, status
+            HAVING SUM(guest_count) > 0
+        ) r
+        LEFT JOIN "Account" a ON a.id = r.group_id
+        ORDER BY r.dimension, r.group_id
+    """, {"start_day": start_day, "end_day": end_day, "group_by": group_by})
+    return [dict(row) for row in rows]
+
+def _guest_rollup_daily(client: LocalClient, start_day: str = None, end_day: str = None,
+                        group_by: str = None, group_id: int = None) -> List[Dict]:
+    """SQLite port of guest_rollup_daily() in sql/guest_rollup.sql"""
+    rows = client.run("""
+        SELECT day, status, SUM(guest_count) AS guest_count
+        FROM "GuestDailyRollup"
+        WHERE dimension = IFNULL(:group_by, 'manager')
+          AND (:group_by IS NULL OR group_id = :group_id)
+          AND (:start_day IS NULL OR day >= :start_day)
+          AND (:end_day IS NULL OR day <= :end_day)
+        GROUP BY day, status
+        HAVING SUM(guest_count) > 0
+        ORDER BY day
+    """, {"start_day": start_day, "end_day": end_day, "group_by": group_by, "group_id": group_id})
+    return [dict(row) for row in rows]
+
+def _vietnam_day_bounds(start_day: Optional[str], end_day: Optional[str]) -> tuple:
+    """UTC text bounds [start, end) of Vietnam calendar days, comparable with stored timestamps"""
+    bound = lambda day: (datetime.fromisoformat(day) - timedelta(hours=7)).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+    return (bound(start_day) if start_day else None,
+            bound((date.fromisoformat(end_day) + timedelta(days=1)).isoformat()) if end_day else None)
+
+def _guest_status_funnel(client: LocalClient, stages: List[str], start_day: str = None,
+                         end_day: str = None) -> List[Dict]:
+    """SQLite port of guest_status_funnel() in sql/guest_status_history.sql"""
+    start, end = _vietnam_day_bounds(start_day, end_day)
+    position = "CASE e.to_status " + " ".join(f"WHEN :stage{i} THEN {i + 1}" for i in range(len(stages))) + " END"
+    # Guests created in the range come from the partial index on creation events and only
+    # their events are grouped, so a narrow range does not read the whole log
+    rows = client.run(f"""
+        SELECT position, COUNT(*) AS guest_count FROM (
+            SELECT MAX({position}) AS position
+            FROM "GuestStatusEvent" e
+            WHERE e.guest_id IN (
+                SELECT guest_id FROM "GuestStatusEvent"
+                WHERE is_created AND changed_at >= COALESCE(:start, '') AND changed_at < COALESCE(:end, '~')
+            )
+            GROUP BY e.guest_id
+        )
+        GROUP BY position
+    """, {"start": start, "end": end, **{f"stage{i}": stage for i, stage in enumerate(stages)}})
+    guests = {row["position"]: row["guest_count"] for row in rows}
+    return [{"stage": None, "guest_count": sum(guests.values())}] + [
+        {"stage": stage, "guest_count": sum(count for reached, count in guests.items() if reached and reached > index)}
+        for index, stage in enumerate(stages)
+    ]
+
+def _guest_time_to_close(client: LocalClient, closed_status: str = "Chốt", start_day: str = None,
+                         end_day: str = None) -> List[Dict]:
+    """SQLite port of guest_time_to_close() in sql/guest_status_history.sql (percentiles in pandas)"""
+    start, end = _vietnam_day_bounds(start_day, end_day)
+    rows = client.run("""
+        WITH closes AS (
+            -- First close per guest, then the range: one pass over the closes
+            SELECT e.guest_id, MIN(e.changed_at) AS closed_at
+            FROM "GuestStatusEvent" e
+            WHERE e.to_status = :closed_status
+            GROUP BY e.guest_id
+            HAVING MIN(e.changed_at) >= COALESCE(:start, '') AND MIN(e.changed_at) < COALESCE(:end, '~')
+        )
+        SELECT e.guest_id, e.to_status AS status,
+               (julianday(COALESCE(LEAD(e.changed_at) OVER (PARTITION BY e.guest_id ORDER BY e.changed_at, e.id),
+                                   c.closed_at)) - julianday(e.changed_at)) * 24 AS hours
+        FROM closes c
+        JOIN "GuestStatusEvent" e ON e.guest_id = c.guest_id AND e.changed_at < c.closed_at
+    """, {"closed_status": closed_status, "start": start, "end": end})
+    spans = pd.DataFrame([tuple(row) for row in rows], columns=["guest_id", "status", "hours"])
+    per_guest = spans.groupby("guest_id")["hours"].sum()
+    per_status = spans.dropna(subset=["status"]).groupby(["status", "guest_id"])["hours"].sum()
+
+    def summary(status: Optional[str], hours: pd.Series) -> Dict:
+        if hours.empty:
+            return {"status": status, "guest_count": 0, "avg_hours": None, "median_hours": None, "p90_hours": None}
+        return {"status": status, "guest_count": len(hours), "avg_hours": float(hours.mean()),
+                "median_hours": float(hours.quantile(0.5)), "p90_hours": float(hours.quantile(0.9))}
+    return [summary(None, per_guest)] + [summary(status, hours) for status, hours in per_status.groupby(level="status")]
+
+def _dashboard_kpis(client: LocalClient, week_start: str, scope_manager_id: int = None,
+                    scope_marketer_id: int = None, closed_status: str = "Chốt") -> List[Dict]:
+    """SQLite port of dashboard_kpis() in sql/guest_rollup.sql"""
+    # Rollup days are Vietnam calendar days, and week_start is a Vietnam midnight
+    first_day = datetime.fromisoformat(week_start).astimezone(timezone(timedelta(hours=7))).date()
+    rows = client.run("""
+        SELECT
+            (SELECT COUNT(*) FROM "House" h
+             WHERE :manager_id IS NULL OR h.manager_id = :manager_id) AS house_count,
+            (SELECT COUNT(*) FROM "Account") AS account_count,
+            IFNULL(SUM(guest_count), 0) AS guest_count,
+            IFNULL(SUM(guest_count) FILTER (WHERE day >= :this_week), 0) AS new_this_week,
+            IFNULL(SUM(guest_count) FILTER (WHERE day >= :last_week AND day < :this_week), 0) AS new_last_week,
+            IFNULL(SUM(guest_count) FILTER (WHERE status = :closed_status), 0) AS closed_count
+        FROM "GuestDailyRollup"
+        WHERE dimension = :dimension
+          AND (:manager_id IS NULL OR group_id = :manager_id)
+          AND (:marketer_id IS NULL OR group_id = :marketer_id)
+    """, {
+        "this_week": first_day.isoformat(),
+        "last_week": (first_day - timedelta(days=7)).isoformat(),
+        # Every guest is counted once under 'manager', including those without one (admin)
+        "dimension": "manager" if scope_marketer_id is None else "marketer",
+        "manager_id": scope_manager_id,
+        "marketer_id": scope_marketer_id,
+        "closed_status": closed_status,
+    })
+    return [dict(row) for row in rows]
+
+# Columns manager_update_guests() lets a manager change
+_MANAGER_EDITABLE = ("house_id", "view_date", "guest_name", "guest_phone_number", "status", "admin_note", "manager_note")
+
+def _manager_guest_ids(client: LocalClient, manager_id: int, guest_ids: List[int]) -> List[int]:
+    """The ids among guest_ids whose house belongs to manager_id"""
+    if not guest_ids:
+        return []
+    rows = client.run(f"""
+        SELECT g.id FROM "Guest" g JOIN "House" h ON h.id = g.house_id
+        WHERE h.manager_id = ? AND g.id IN ({', '.join('?' * len(guest_ids))})
+    """, [manager_id, *guest_ids])
+    return [row["id"] for row in rows]
+
+def _manager_update_guests(client: LocalClient, manager_id: int, guest_ids: List[int], updates: Dict) -> List[Dict]:
+    """SQLite port of manager_update_guests() in sql/guest_scoped_writes.sql"""
+    if "house_id" in updates and not client.run('SELECT 1 FROM "House" WHERE id = ? AND manager_id = ?',
+                                                 (updates["house_id"], manager_id)):
+        raise APIError({"message": "Chỉ có thể chuyển khách sang nhà bạn quản lý", "code": "42501",
+                        "hint": None, "details": None})
+    updates = {column: value for column, value in updates.items() if column in _MANAGER_EDITABLE}
+    if not updates:
+        return []
+    with client.lock:
+        return client.table("Guest").update(updates).in_("id", _manager_guest_ids(client, manager_id, guest_ids)) \
+            .execute().data
+
+def _manager_delete_guests(client: LocalClient, manager_id: int, guest_ids: List[int]) -> List[Dict]:
+    """SQLite port of manager_delete_guests() in sql/guest_scoped_writes.sql"""
+    with client.lock:
+        return client.table("Guest").delete().in_("id", _manager_guest_ids(client, manager_id, guest_ids)).execute().data
+
+# Postgres function name -> local implementation taking (client, **params)
+RPC_FUNCTIONS = {
+    "dashboard_kpis": _dashboard_kpis,
+    "rebuild_guest_rollup": _rebuild_guest_rollup,
+    "guest_rollup_counts": _guest_rollup_counts,
+    "guest_rollup_daily": _guest_rollup_daily,
+    "guest_status_funnel": _guest_status_funnel,
+    "guest_time_to_close": _guest_time_to_close,
+    "manager_update_guests": _manager_update_guests,
+    "manager_delete_guests": _manager_delete_guests,
+}
+
+def create_local_client(path: str = ":memory:") -> LocalClient:
+    return LocalClient(path)
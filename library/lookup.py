@@ -0,0 +1,55 @@
+"""
+Id ↔ label lookup for dropdowns (houses, managers, marketers).
+
+A LabelIndex is the id → label dict the name-map services always returned,
+with unique labels and a reverse index, so pages resolve a selected label back
+to its id in O(1) instead of ``keys[values.index(label)]``. It is built by
+those cached services, i.e. once per version of the reference cache.
+"""
+from collections import Counter
+from typing import Dict, Hashable, List, Mapping, Optional
+
+def _unique_labels(labels: Mapping[Hashable, str]) -> Dict[Hashable, str]:
+    """
+    Append " (#id)" to every label shared by several ids. An appended label can
+    equal another id's own label (a house really named "12 Lê Lợi (#7)"), so
+    repeat until no plain label clashes; appended labels never clash with each
+    other since their ids differ, and each id is suffixed at most once.
+    """
+    unique = dict(labels)
+    plain = set(unique)
+    while True:
+        counts = Counter(unique.values())
+        clashing = [item_id for item_id in plain if counts[unique[item_id]] > 1]
+        if not clashing:
+            return unique
+        for item_id in clashing:
+            unique[item_id] = f"{unique[item_id]} (#{item_id})"
+            plain.discard(item_id)
+
+class LabelIndex(dict):
+    """
+    id → label with unique labels, in id order. Duplicate labels (two houses at one
+    address, two managers with the same name) get their id appended: "12 Lê Lợi (#7)".
+    key: name of the column referencing these ids in other rows (e.g. "house_id"),
+         used by table_with_dialog to preselect a row's current option by id
+    """
+
+    def __init__(self, labels: Mapping[Hashable, str], key: Optional[str] = None):
+        super().__init__(sorted(_unique_labels(labels).items()))
+        self.key = key
+        self._ids = {label: item_id for item_id, label in self.items()}
+        self._options = list(self.values())
+        self._positions = {label: position for position, label in enumerate(self._options)}
+
+    @property
+    def options(self) -> List[str]:
+        """Labels in id order, for select boxes"""
+        return self._options
+
+    def id_of(self, label: Optional[str]) -> Optional[Hashable]:
+        return self._ids.get(label)
+
+    def position(self, label: Optional[str], default: int = 0) -> int:
+        """Index of ``label`` in ``options`` (for a select box's ``index=``)"""
+        return self._positions.get(label, default)
@@ -0,0 +1,113 @@
+"""
+Timing of service-layer calls, aggregated per (call, role, page).
+
+Services are wrapped with @instrumented; main.py tags each script run with the
+user's role and page. The tags live in a context variable, so calls made
+through library.concurrency.submit() are attributed to the page that started
+them. Payload size is what the HTTP transport received for the call (cache
+hits and the SQLite backend read nothing over the wire). Samples stay in memory (last ``METRICS_SAMPLES`` per key) and are
+summarised for the admin performance panel.
+"""
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+
+_tags: ContextVar[Tuple[Optional[str], Optional[str]]] = ContextVar("metrics_tags", default=(None, None))
+_samples: Dict[Tuple[str, Optional[str], Optional[str]], deque] = defaultdict(lambda: deque(maxlen=settings.METRICS_SAMPLES))
+_lock = threading.Lock()
+# Response bytes received by the current call stack, counted by library.transport
+_response_bytes: ContextVar[int] = ContextVar("response_bytes", default=0)
+
+def tag_requests(role: str = None, page: str = None) -> None:
+    """Attribute the service calls of the current script run to ``role`` and ``page``"""
+    _tags.set((role, page))
+
+def _payload(result: Any) -> Tuple[Any, bool]:
+    # Services return (data, message); data is None/False when the call failed
+    if isinstance(result, tuple) and len(result) == 2:
+        return result[0], result[0] is not None and result[0] is not False
+    return result, True
+
+def _row_count(data: Any) -> Optional[int]:
+    if isinstance(data, int) and not isinstance(data, bool):
+        return data  # bulk writes report how many rows they wrote
+    if isinstance(data, dict) and isinstance(data.get('rows'), list):
+        return len(data['rows'])
+    if hasattr(data, '__len__') and not isinstance(data, (str, bytes)):
+        return len(data)
+    return None
+
+def count_response_bytes(size: int) -> None:
+    """Add ``size`` bytes read off the wire to the calls in progress"""
+    _response_bytes.set(_response_bytes.get() + size)
+
+def record(name: str, duration_ms: float, rows: Optional[int], size: int, ok: bool) -> None:
+    role, page = _tags.get()
+    with _lock:
+        _samples[(name, role, page)].append((duration_ms, rows, size, ok))
+
+def instrumented(func):
+    """Record duration, row count and response bytes of every call to a service function"""
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not settings.METRICS:
+            return func(*args, **kwargs)
+        bytes_before = _response_bytes.get()
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            record(name, (time.perf_counter() - started) * 1000, None, _response_bytes.get() - bytes_before, False)
+            raise
+        duration_ms = (time.perf_counter() - started) * 1000
+        data, ok = _payload(result)
+        record(name, duration_ms, _row_count(data), _response_bytes.get() - bytes_before, ok)
+        return result
+    return wrapper
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summary() -> List[Dict]:
+    """One row per (call, role, page), slowest p95 first"""
+    with _lock:
+        snapshot = {key: list(samples) for key, samples in _samples.items()}
+    rows = []
+    for (name, role, page), samples in snapshot.items():
+        durations = [sample[0] for sample in samples]
+        row_counts = [sample[1] for sample in samples if sample[1] is not None]
+        rows.append({
+            'call': name,
+            'role': role,
+            'page': page,
+            'calls': len(samples),
+            'errors': sum(1 for sample in samples if not sample[3]),
+            'p50_ms': round(_percentile(durations, 50), 2),
+            'p95_ms': round(_percentile(durations, 95), 2),
+            'max_ms': round(max(durations), 2),
+            'avg_rows': round(sum(row_counts) / len(row_counts), 1) if row_counts else None,
+            'avg_bytes': round(sum(sample[2] for sample in samples) / len(samples)),
+        })
+    return sorted(rows, key=lambda row: row['p95_ms'], reverse=True)
+
+def export_json() -> str:
+    return json.dumps({
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'samples_per_key': settings.METRICS_SAMPLES,
+        'calls': summary(),
+    }, ensure_ascii=False, indent=2)
+
+def reset() -> None:
+    with _lock:
+        _samples.clear()
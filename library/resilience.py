@@ -0,0 +1,143 @@
+"""
+Circuit breaker and stale fallback for read paths.
+
+Every read shares one breaker for the backend. After repeated failures (or
+calls slower than ``BREAKER_SLOW_CALL_SECONDS``) it opens and reads stop
+waiting on the backend: they return the last good result for the same call,
+which the page reports as stale. Once ``BREAKER_RESET_SECONDS`` have passed a
+single read is let through as a probe, and it closes the breaker when it
+succeeds. Only backend errors count as failures (exceptions, and errors the
+transport reports through ``report_backend_error``): a service rejecting its
+arguments returns an error without telling anything about the backend.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from typing import Any, List, Optional
+
+from config import settings
+from library.cache import cache_key, get_cache, succeeded
+
+STALE_NAMESPACE = "stale"
+UNAVAILABLE_MESSAGE = "Máy chủ dữ liệu đang gián đoạn, vui lòng thử lại sau"
+
+_MISSING = object()
+
+class CircuitBreaker:
+    """Closed → open after ``failure_threshold`` consecutive failures → half-open after ``reset_timeout``"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """Whether a call may reach the backend; only one probe at a time once open"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """The probe never reached the backend: let the next call probe instead"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+breaker = CircuitBreaker(settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_SECONDS)
+
+# Times at which the stale results served during the current script run were fetched.
+# submit() copies the context, so reads on worker threads append to the same list
+_stale_reads: ContextVar[Optional[List[datetime]]] = ContextVar("stale_reads", default=None)
+# Set right before a resilient read returns, so an outer @cached can skip stale results
+_served_stale: ContextVar[bool] = ContextVar("served_stale", default=False)
+# Backend errors seen by the current call stack (transport failures, server errors)
+_backend_errors: ContextVar[int] = ContextVar("backend_errors", default=0)
+
+def report_backend_error() -> None:
+    """Called by the transport when a request fails at the backend, for the read in progress"""
+    _backend_errors.set(_backend_errors.get() + 1)
+
+def track_stale_reads() -> List[datetime]:
+    """Start collecting stale reads for this script run; the returned list fills in as pages load"""
+    stale_reads: List[datetime] = []
+    _stale_reads.set(stale_reads)
+    return stale_reads
+
+def fresh_result(result: Any) -> bool:
+    """``should_cache`` for @cached stacked on a @resilient_read: keep successful, non-stale results only"""
+    return succeeded(result) and not _served_stale.get()
+
+def _stale_store():
+    return get_cache(STALE_NAMESPACE, settings.STALE_TTL_SECONDS, settings.STALE_MAX_ENTRIES)
+
+def _serve_stale(key, fallback: Any) -> Any:
+    entry = _stale_store().get(key)
+    if entry is None:
+        return fallback
+    fetched_at, result = entry
+    stale_reads = _stale_reads.get()
+    if stale_reads is not None:
+        stale_reads.append(fetched_at)
+    _served_stale.set(True)
+    return result
+
+def resilient_read(func):
+    """Guard a read service with the backend breaker, falling back to its last good result"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        _served_stale.set(False)
+        key = cache_key(func, args, kwargs)
+        if not breaker.allow():
+            return _serve_stale(key, (None, UNAVAILABLE_MESSAGE))
+
+        errors_before = _backend_errors.get()
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            breaker.record_failure()
+            result = _serve_stale(key, _MISSING)
+            if result is _MISSING:
+                raise
+            return result
+
+        if not succeeded(result):
+            if _backend_errors.get() == errors_before:
+                # Rejected without a backend error (bad arguments, nothing wrong upstream)
+                breaker.release_probe()
+                return result
+            breaker.record_failure()
+            return _serve_stale(key, result)
+
+        if time.monotonic() - started > settings.BREAKER_SLOW_CALL_SECONDS:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        _stale_store().set(key, (datetime.now(), result))
+        return result
+    return wrapper
@@ -1,9 +1,32 @@
-from supabase import acreate_client, AsyncClient, create_client, Client
+from supabase import acreate_client, AsyncClient, create_client, Client, ClientOptions
+from gotrue import SyncMemoryStorage
 from config import settings
+from library.transport import TunedPostgrestClient, http_timeout
 
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+class TunedClient(Client):
+  """Supabase client whose PostgREST session uses the pooled, retrying transport"""
+
+  @staticmethod
+  def _init_postgrest_client(rest_url, headers, schema, timeout=None, verify=True, proxy=None):
+    return TunedPostgrestClient(
+      rest_url,
+      headers=headers,
+      schema=schema,
+      timeout=timeout or http_timeout(),
+      verify=verify,
+      proxy=proxy,
+    )
+
+def create_supabase() -> Client:
+  """Create the data-access client selected by ``settings.DATA_BACKEND``"""
+  if settings.DATA_BACKEND == "sqlite":
+    from library.local_backend import create_local_client
+    return create_local_client(settings.SQLITE_PATH)
+  options = ClientOptions(storage=SyncMemoryStorage(), postgrest_client_timeout=http_timeout())
+  return TunedClient.create(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY, options)
+
+supabase: Client = create_supabase()
 
 async def create_async_supabase():
   supabase: AsyncClient = await acreate_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
   return supabase
-
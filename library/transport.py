@@ -0,0 +1,121 @@
+"""
+HTTP transport used by the PostgREST client.
+
+One pooled httpx client is shared by every Streamlit session, so its pool,
+timeouts and retry policy are sized from ``config.Settings`` rather than left
+at the library defaults.
+"""
+import random
+import time
+from typing import Dict, Union
+
+import httpx
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
+
+from config import settings
+from library.metrics import count_response_bytes
+from library.resilience import report_backend_error
+
+class CountingStream(httpx.SyncByteStream):
+    """Response body that reports its size as read (still compressed, i.e. what crossed the wire)"""
+
+    def __init__(self, stream: httpx.SyncByteStream):
+        self._stream = stream
+
+    def __iter__(self):
+        for chunk in self._stream:
+            count_response_bytes(len(chunk))
+            yield chunk
+
+    def close(self) -> None:
+        self._stream.close()
+
+class RetryTransport(httpx.BaseTransport):
+    """Retry idempotent requests on transient failures with full-jitter exponential backoff"""
+
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+    RETRY_STATUSES = frozenset({502, 503, 504})
+    RETRY_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+    def __init__(self, transport: httpx.BaseTransport, retries: int, backoff: float, max_backoff: float):
+        self._transport = transport
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        # Writes are never replayed: a timed out insert may still have committed
+        if request.method not in self.IDEMPOTENT_METHODS:
+            return self._send(request)
+
+        attempt = 0
+        while True:
+            try:
+                response = self._send(request)
+            except self.RETRY_ERRORS:
+                if attempt >= self.retries:
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                response.close()
+            time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+            attempt += 1
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        """One attempt; failures and server errors count against the read breaker (4xx are rejected requests)"""
+        try:
+            response = self._transport.handle_request(request)
+        except Exception:
+            report_backend_error()
+            raise
+        if response.status_code >= 500:
+            report_backend_error()
+        response.stream = CountingStream(response.stream)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+def http_timeout() -> httpx.Timeout:
+    """Per-phase timeouts applied to every PostgREST call"""
+    return httpx.Timeout(
+        connect=settings.HTTP_CONNECT_TIMEOUT,
+        read=settings.HTTP_READ_TIMEOUT,
+        write=settings.HTTP_WRITE_TIMEOUT,
+        pool=settings.HTTP_POOL_TIMEOUT,
+    )
+
+def create_transport(verify: bool = True, proxy: str = None) -> httpx.BaseTransport:
+    """Keep-alive pool (HTTP/2 when enabled) wrapped in the retry policy"""
+    pool = httpx.HTTPTransport(
+        verify=verify,
+        proxy=proxy,
+        http2=settings.HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return RetryTransport(pool, settings.HTTP_RETRIES, settings.HTTP_RETRY_BACKOFF, settings.HTTP_RETRY_MAX_BACKOFF)
+
+class TunedPostgrestClient(SyncPostgrestClient):
+    """PostgREST client whose session uses the configured transport"""
+
+    def create_session(
+        self,
+        base_url: str,
+        headers: Dict[str, str],
+        timeout: Union[int, float, httpx.Timeout],
+        verify: bool = True,
+        proxy: str = None,
+    ) -> SyncClient:
+        return SyncClient(
+            base_url=base_url,
+            headers={**headers, "Accept-Encoding": settings.HTTP_ACCEPT_ENCODING},
+            timeout=timeout,
+            transport=create_transport(verify, proxy),
+            follow_redirects=True,
+        )
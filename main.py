@@ -5,9 +5,14 @@ from page.auth import login_page
 from page.admin_page import admin_dashboard
 from page.manager_page import manager_dashboard
 from page.marketing_page import marketing_dashboard
+from library.resilience import track_stale_reads
+from library.change_feed import start_change_feed
+from library.metrics import tag_requests
+from component.perf_panel import perf_panel
 
 def main():
     st.set_page_config(page_title="BeKind Internal", layout="wide")
+    start_change_feed()
     
     # Set up session states for navigation
     if "current_page" not in st.session_state:
@@ -87,6 +92,11 @@ def main():
                 st.session_state.logout_clicked = True
                 st.rerun()
         
+        # Filled after the page renders, if any read fell back to stale data
+        stale_notice = st.empty()
+        stale_reads = track_stale_reads()
+        tag_requests(account.get('role'), st.session_state.current_page)
+
         if role == "quản trị viên":
             admin_dashboard(account, st.session_state.current_page)
         elif role == "quản lý":
@@ -95,6 +105,15 @@ def main():
             marketing_dashboard(account, st.session_state.current_page)
         else:
             st.error("Vai trò không xác định. Vui lòng liên hệ quản trị viên.")
+
+        if role == "quản trị viên":
+            perf_panel()
+
+        if stale_reads:
+            stale_notice.warning(
+                f"Không kết nối được máy chủ dữ liệu. Đang hiển thị dữ liệu cập nhật lúc "
+                f"{min(stale_reads).strftime('%H:%M %d/%m/%Y')}, có thể chưa phải mới nhất."
+            )
     
 if __name__ == "__main__":
     main()
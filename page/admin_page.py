@@ -1,43 +1,37 @@
 from email.mime import message
 import streamlit as st
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timedelta
 from component.editable_table import editable_table
-from component.table_with_dialog import table_with_dialog
-from service.account_service import get_all_accounts, update_account, create_account, delete_account, get_account_name_map, get_managers_name_map
+from component.table_with_dialog import table_with_dialog, page_cursor
+from component.guest_table import guest_page_view, guest_table_options
+from component.guest_filters import guest_filters, current_guest_filters
+from component.guest_import import guest_import_dialog
+from config import settings
+from library.concurrency import gather, submit
+from library.change_feed import current_sequence, data_version
+from library.cache import view_model
+from library.resilience import fresh_result
+from component.live_refresh import live_refresh
+from component.dashboard_metrics import dashboard_metrics
+from functools import partial
+from service.account_service import get_all_accounts, update_account, create_account, delete_account, get_account_name_map, get_managers_name_map, upsert_accounts, get_account_role_options
+from service.import_service import read_spreadsheet, validate_account_import
 from service.house_service import get_all_houses, create_house, update_house, delete_house
-from service.guest_service import get_guests_with_details, get_guest_status_options, get_houses_name_map, get_houses_with_managers_map, get_marketers_name_map, create_guest, update_guest, delete_guest, get_guest_analytics_by_manager, get_guest_analytics_by_marketer
+from service.projections import ACCOUNT_TABLE, HOUSE_TABLE
+from service.guest_service import get_guests_page, guest_change_topics, get_guest_status_options, get_houses_name_map, get_houses_with_managers_map, get_marketers_name_map, create_guest, update_guest, delete_guest, update_guests, delete_guests
+from service.analytics_service import get_guest_analytics_snapshot, get_guest_trends, get_guest_funnel, get_time_to_close
+from component.trend_charts import trend_figures
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
-def format_vietnam_datetime(date_str):
-    """Format datetime to Vietnam timezone (GMT+7)"""
-    if not date_str:
-        return ""
-    try:
-        # Parse the datetime string
-        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        # Convert to Vietnam timezone (GMT+7)
-        vietnam_tz = timezone(timedelta(hours=7))
-        vietnam_dt = dt.astimezone(vietnam_tz)
-        return vietnam_dt.strftime("%d/%m/%Y %H:%M")
-    except:
-        return date_str
-
 def admin_dashboard(account, current_page="dashboard"):
     if current_page == "dashboard":
         st.title("Trang Tổng Quan Quản Trị")
         
         # Dashboard metrics
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric(label="Tổng số nhà", value="15", delta="2")
-            st.write(st.session_state.get("account"))
-        with col2:
-            st.metric(label="Tổng số tài khoản", value="8", delta="1")
-        with col3:
-            st.metric(label="Tổng số khách", value="45", delta="5")
+        dashboard_metrics(account, show_houses=True, show_accounts=True)
             
         # Some charts or recent activity
         st.subheader("Hoạt động gần đây")
@@ -49,8 +43,9 @@ def admin_dashboard(account, current_page="dashboard"):
         st.write("Chức năng quản lý nhà dành cho quản trị viên")
         
         # Get houses and managers (only accounts with "Quản lý" role)
-        houses, error = get_all_houses()
-        manager_map, _ = get_managers_name_map()  # Assuming this function also filters by role
+        results = gather(houses=partial(get_all_houses, projection=HOUSE_TABLE), managers=get_managers_name_map)
+        houses, error = results['houses']
+        manager_map, _ = results['managers']  # Only accounts with the "Quản lý" role
         if houses and manager_map:
             # Create a copy of houses data and map manager_id to manager names
             houses_display = []
@@ -62,17 +57,13 @@ def admin_dashboard(account, current_page="dashboard"):
             
             df = pd.DataFrame(houses_display)
             
-            # Reverse mapping: manager names to IDs
-            name_to_id_map = {name: id for id, name in manager_map.items()}
-            manager_names = list(manager_map.values())
-            
             def handle_edit(row_idx, new_values):
                 house_id = df.iloc[row_idx]['id']
                 
                 # Convert manager name back to ID if changed
                 if 'manager_name' in new_values:
                     manager_name = new_values['manager_name']
-                    manager_id = name_to_id_map.get(manager_name)
+                    manager_id = manager_map.id_of(manager_name)
                     if manager_id:
                         new_values['manager_id'] = manager_id
                     del new_values['manager_name']  # Remove display field
@@ -87,7 +78,7 @@ def admin_dashboard(account, current_page="dashboard"):
             def handle_add(new_row):
                 # Convert manager name to ID
                 manager_name = new_row.get('manager_name', '')
-                manager_id = name_to_id_map.get(manager_name)
+                manager_id = manager_map.id_of(manager_name)
                 
                 if not manager_id:
                     st.error("Vui lòng chọn quản lý hợp lệ")
@@ -118,7 +109,7 @@ def admin_dashboard(account, current_page="dashboard"):
                 on_edit=handle_edit,
                 on_add=handle_add,
                 on_delete=handle_delete,
-                dropdown_columns={"manager_name": manager_names},
+                dropdown_columns={"manager_name": manager_map.options},
                 hidden_columns=["id", "created_at", "manager_id"],
                 column_labels={
                     "address": "Địa chỉ",
@@ -134,7 +125,26 @@ def admin_dashboard(account, current_page="dashboard"):
         st.title("Quản lý tài khoản") 
         st.write("Chức năng quản lý tài khoản người dùng")
         
-        accounts, error = get_all_accounts()
+        # Onboard a whole team at once: one upsert keyed on phone_number
+        with st.expander("📥 Nhập tài khoản hàng loạt"):
+            st.caption("Tệp CSV/Excel với các cột: Họ và tên, Số điện thoại, Vai trò. Số điện thoại đã tồn tại sẽ được cập nhật.")
+            uploaded_file = st.file_uploader("Tệp tài khoản", type=["csv", "xlsx", "xls"], key="accounts_import_file")
+            if uploaded_file is not None:
+                accounts_df, read_error = read_spreadsheet(uploaded_file)
+                if read_error:
+                    st.error(read_error)
+                else:
+                    valid_accounts, import_errors = validate_account_import(accounts_df)
+                    if not import_errors.empty:
+                        st.dataframe(import_errors, hide_index=True, use_container_width=True)
+                    if st.button(f"Lưu {len(valid_accounts)} tài khoản", disabled=not valid_accounts, key="accounts_import_confirm"):
+                        saved, message = upsert_accounts(valid_accounts)
+                        if saved:
+                            st.success(message)
+                        else:
+                            st.error(message)
+        
+        accounts, error = get_all_accounts(projection=ACCOUNT_TABLE)
         if accounts:
             df = pd.DataFrame(accounts)
             
@@ -182,7 +192,7 @@ def admin_dashboard(account, current_page="dashboard"):
                 on_edit=handle_edit,
                 on_add=handle_add,
                 on_delete=handle_delete,
-                dropdown_columns={"role": ["Quản trị viên", "Marketing", "Quản lý"]},
+                dropdown_columns={"role": get_account_role_options()},
                 hidden_columns=["id", "created_at"],
                 column_labels={
                     "full_name": "Họ và tên",
@@ -196,74 +206,101 @@ def admin_dashboard(account, current_page="dashboard"):
         st.title("Quản lý khách")
         st.write("Chức năng quản lý khách hàng dành cho quản trị viên")
         
+        # Start every query of both tabs at once; keyed widget values (filters,
+        # paging, analytics dates) are already in session state before they render
+        topics = guest_change_topics(account['id'], account['role'])
+        since = current_sequence()
+        version = data_version(topics)
+        today = datetime.now().date()
+        start_of_week = today - timedelta(days=today.weekday())
+        end_of_week = start_of_week + timedelta(days=6)
+        analytics_start = st.session_state.get("analytics_start_date", start_of_week)
+        analytics_end = st.session_state.get("analytics_end_date", end_of_week)
+        if analytics_start and analytics_end:
+            analytics_range = (analytics_start.isoformat() + "T00:00:00", analytics_end.isoformat() + "T23:59:59")
+            analytics_future = submit(
+                view_model, ("admin_analytics", analytics_range), version,
+                partial(analytics_view, *analytics_range), should_cache=fresh_result
+            )
+            trend_args = (*analytics_range, st.session_state.get("analytics_trend_frequency", "week"),
+                          *st.session_state.get("analytics_trend_scope", (None, None)))
+            trends_future = submit(
+                view_model, ("admin_trends", trend_args), version,
+                partial(trends_view, *trend_args), should_cache=fresh_result
+            )
+            # One read per view model: fresh_result only sees the read that ran last
+            funnel_future = submit(
+                view_model, ("admin_funnel", analytics_range), version,
+                partial(funnel_view, *analytics_range), should_cache=fresh_result
+            )
+            time_to_close_future = submit(
+                view_model, ("admin_time_to_close", analytics_range), version,
+                partial(get_time_to_close, *analytics_range), should_cache=fresh_result
+            )
+        
+        filters, sort_by, descending = current_guest_filters("admin_guests_table")
+        cursor = page_cursor("admin_guests_table", signature=repr((filters, sort_by, descending)))
+        # Selecting a row reruns the script: unchanged data (same change-feed version) reuses the table
+        results = gather(
+            guest_page=partial(
+                view_model, ("admin_guests_table", filters, sort_by, descending, cursor), version,
+                partial(guest_page_view, partial(  # Admin sees all guests
+                    get_guests_page, filters=filters, sort_by=sort_by, descending=descending, cursor=cursor,
+                    page_size=settings.GUEST_PAGE_SIZE, count=settings.GUEST_COUNT_MODE
+                )),
+                should_cache=fresh_result
+            ),
+            houses_name_map=get_houses_name_map,
+            houses_with_managers_map=get_houses_with_managers_map,
+            marketers_name_map=get_marketers_name_map,
+            managers_name_map=get_managers_name_map
+        )
+        
         # Create tabs for guest management
         tab1, tab2 = st.tabs(["📋 Danh sách khách", "📊 Thống kê"])
         
         with tab1:
             # Get data
-            guests, guest_error = get_guests_with_details()  # Admin sees all guests
             guest_status_options = get_guest_status_options()
-            houses_name_map, house_error = get_houses_name_map()
-            houses_with_managers_map, house_manager_error = get_houses_with_managers_map()
-            marketers_name_map, marketer_error = get_marketers_name_map()
+            houses_name_map, house_error = results['houses_name_map']
+            houses_with_managers_map, house_manager_error = results['houses_with_managers_map']
+            marketers_name_map, marketer_error = results['marketers_name_map']
+            live_refresh(topics, since)
             
-            if guest_error or house_error or house_manager_error or marketer_error:
+            if house_error or house_manager_error or marketer_error:
                 st.error("Không thể lấy dữ liệu. Vui lòng thử lại sau.")
                 return
                 
-            # Add new guest dialog
-            if st.button("➕ Thêm khách mới"):
-                st.session_state.show_admin_add_dialog = True
-                st.rerun()
+            # Add new guest / bulk import dialogs
+            col_add, col_import, _ = st.columns([1, 1, 4])
+            with col_add:
+                if st.button("➕ Thêm khách mới", use_container_width=True):
+                    st.session_state.show_admin_add_dialog = True
+                    st.rerun()
+            with col_import:
+                if st.button("📥 Nhập từ tệp", use_container_width=True):
+                    st.session_state.admin_guest_import_show = True
+                    st.rerun()
                 
             if st.session_state.get('show_admin_add_dialog', False):
-                admin_add_guest_dialog(houses_name_map, guest_status_options, marketers_name_map)
+                admin_add_guest_dialog(houses_name_map, houses_with_managers_map, guest_status_options, marketers_name_map)
+            elif st.session_state.get('admin_guest_import_show', False):
+                guest_import_dialog("admin_guest_import", houses_name_map, guest_status_options, marketers_name_map=marketers_name_map)
+            
+            # Only the current page is fetched; filters and sort run server-side
+            guest_filters("admin_guests_table", guest_status_options, houses_name_map, marketers_name_map)
+            guest_page, guest_error = results['guest_page']
+            if guest_error:
+                st.error("Không thể lấy danh sách khách hàng. Vui lòng thử lại sau.")
+                return
+            guests = guest_page['rows']
             
             if guests:
-                # Prepare DataFrame
-                df_data = []
-                for guest in guests:
-                    df_data.append({
-                        'id': guest['id'],
-                        'guest_name': guest['guest_name'],
-                        'guest_phone_number': guest['guest_phone_number'],
-                        'house_address': guest['house']['address'],
-                        'manager_name': guest['house']['manager']['full_name'],
-                        'view_date': format_vietnam_datetime(guest['view_date']),
-                        'status': guest['status'],
-                        'marketer_name': guest['marketer']['full_name'],
-                        'created_at': format_vietnam_datetime(guest['created_at']),
-                        'admin_note': guest['admin_note'] or '',
-                        'manager_note': guest['manager_note'] or ''
-                    })
-                
-                df = pd.DataFrame(df_data)
-                
-                # Column configuration for admin role
-                column_labels = {
-                    'id': 'ID',
-                    'guest_name': 'Tên khách',
-                    'guest_phone_number': 'Số điện thoại',
-                    'house_address': 'Địa chỉ nhà',
-                    'manager_name': 'Quản lý nhà',
-                    'view_date': 'Ngày và giờ xem',
-                    'status': 'Trạng thái',
-                    'marketer_name': 'Nhân viên marketing',
-                    'created_at': 'Ngày tạo',
-                    'admin_note': 'Ghi chú admin',
-                    'manager_note': 'Ghi chú quản lý'
-                }
-                
-                # Dropdown options for edit dialog
-                dropdown_columns = {
-                    'status': guest_status_options,
-                    'house_address': list(houses_name_map.values()),
-                    'marketer_name': list(marketers_name_map.values())
-                }
-                
-                # Admin role restrictions - disable manager and marketer assignment
-                hidden_columns = ['id']
-                disabled_columns = ['manager_name', 'created_at']
+                df = guest_page['frame']
+                table_options = view_model(
+                    ("guest_table_options", "Quản trị viên"), version,
+                    partial(guest_table_options, "Quản trị viên", guest_status_options, houses_name_map, marketers_name_map)
+                )
                 
                 def handle_edit(row_idx, new_values):
                     guest_id = df.iloc[row_idx]['id']
@@ -272,18 +309,14 @@ def admin_dashboard(account, current_page="dashboard"):
                     updates = {k: v for k, v in new_values.items() if k in allowed_fields}
                     
                     # Handle house address change
-                    if 'house_address' in new_values and new_values['house_address'] in houses_name_map.values():
-                        house_ids = list(houses_name_map.keys())
-                        house_options = list(houses_name_map.values())
-                        house_id = house_ids[house_options.index(new_values['house_address'])]
+                    house_id = houses_name_map.id_of(new_values.get('house_address'))
+                    if house_id is not None:
                         updates['house_id'] = house_id
                         updates.pop('house_address', None)
                     
                     # Handle marketer change
-                    if 'marketer_name' in new_values and new_values['marketer_name'] in marketers_name_map.values():
-                        marketer_ids = list(marketers_name_map.keys())
-                        marketer_options = list(marketers_name_map.values())
-                        marketer_id = marketer_ids[marketer_options.index(new_values['marketer_name'])]
+                    marketer_id = marketers_name_map.id_of(new_values.get('marketer_name'))
+                    if marketer_id is not None:
                         updates['marketer_id'] = marketer_id
                         updates.pop('marketer_name', None)
                     
@@ -303,6 +336,30 @@ def admin_dashboard(account, current_page="dashboard"):
                         st.rerun()
                     else:
                         st.error(message)
+
+                def handle_bulk_update(row_ids, new_values):
+                    updates = {k: v for k, v in new_values.items() if k == 'status'}
+                    house_id = houses_name_map.id_of(new_values.get('house_address'))
+                    if house_id is not None:
+                        updates['house_id'] = house_id
+                    marketer_id = marketers_name_map.id_of(new_values.get('marketer_name'))
+                    if marketer_id is not None:
+                        updates['marketer_id'] = marketer_id
+                    
+                    result, message = update_guests(row_ids, updates, role="Admin")
+                    if result:
+                        st.success(message)
+                        st.rerun()
+                    else:
+                        st.error(message)
+                
+                def handle_bulk_delete(row_ids, old_rows):
+                    success, message = delete_guests(row_ids)
+                    if success:
+                        st.success(message)
+                        st.rerun()
+                    else:
+                        st.error(message)
                 
                 # Display table with dialog actions
                 st.subheader("Danh sách khách hàng")
@@ -311,16 +368,22 @@ def admin_dashboard(account, current_page="dashboard"):
                     key="admin_guests_table",
                     on_edit=handle_edit,
                     on_delete=handle_delete,
-                    dropdown_columns=dropdown_columns,
-                    hidden_columns=hidden_columns,
-                    disabled_columns=disabled_columns,
-                    column_labels=column_labels,
                     allow_edit=True,
-                    allow_delete=True  # Admin can delete
+                    allow_delete=True,  # Admin can delete
+                    on_bulk_update=handle_bulk_update,
+                    on_bulk_delete=handle_bulk_delete,
+                    **table_options,
+                    houses_with_managers_map=houses_with_managers_map,
+                    version=version,
+                    pagination={
+                        'next_cursor': guest_page['next_cursor'],
+                        'total': guest_page['total'],
+                        'page_size': settings.GUEST_PAGE_SIZE
+                    }
                 )
                 
             else:
-                st.error("Không thể lấy danh sách khách hàng. Vui lòng thử lại sau.")
+                st.info("Không có khách hàng nào phù hợp.")
         
         with tab2:
             st.subheader("Thống kê và phân tích")
@@ -330,31 +393,28 @@ def admin_dashboard(account, current_page="dashboard"):
             col1, col2 = st.columns(2)
             with col1:
                 # Default to start of current week (Monday)
-                today = datetime.now().date()
-                start_of_week = today - timedelta(days=today.weekday())
                 start_date = st.date_input("Từ ngày", value=start_of_week, key="analytics_start_date")
             
             with col2:
                 # Default to end of current week (Sunday)
-                end_of_week = start_of_week + timedelta(days=6)
                 end_date = st.date_input("Đến ngày", value=end_of_week, key="analytics_end_date")
             
             if start_date and end_date:
-                start_date_str = start_date.isoformat() + "T00:00:00"
-                end_date_str = end_date.isoformat() + "T23:59:59"
+                # Get analytics data (one aggregate query for all views, started above)
+                snapshot, analytics_error = analytics_future.result()
                 
-                # Get analytics data
-                manager_stats, manager_error = get_guest_analytics_by_manager(start_date_str, end_date_str)
-                marketer_stats, marketer_error = get_guest_analytics_by_marketer(start_date_str, end_date_str)
-                
-                if manager_error or marketer_error:
+                if analytics_error:
                     st.error("Không thể lấy dữ liệu thống kê. Vui lòng thử lại sau.")
                     return
+                manager_df = snapshot['manager_stats']
+                marketer_df = snapshot['marketer_stats']
+                figures = snapshot['figures']
+                manager_stats = not manager_df.empty
+                marketer_stats = not marketer_df.empty
                 
                 # Manager statistics section
                 st.subheader("📊 Thống kê theo Quản lý nhà")
                 if manager_stats:
-                    manager_df = pd.DataFrame(manager_stats)
                     st.dataframe(
                         manager_df,
                         column_config={
@@ -375,7 +435,6 @@ def admin_dashboard(account, current_page="dashboard"):
                 # Marketer statistics section
                 st.subheader("📈 Thống kê theo Marketing")
                 if marketer_stats:
-                    marketer_df = pd.DataFrame(marketer_stats)
                     st.dataframe(
                         marketer_df,
                         column_config={
@@ -404,73 +463,164 @@ def admin_dashboard(account, current_page="dashboard"):
                     with chart_col1:
                         if manager_stats:
                             st.write("**Thống kê theo Quản lý**")
-                            manager_chart_df = manager_df.set_index('manager_name')[["Chốt", "Gần xem", "Không xem", "Đang chăm sóc", "Không chốt"]]
-                            fig_manager = px.bar(
-                                manager_chart_df.T,
-                                title="Số lượng khách theo trạng thái - Quản lý",
-                                labels={'index': 'Trạng thái', 'value': 'Số lượng'},
-                                height=400
-                            )
-                            st.plotly_chart(fig_manager, use_container_width=True)
+                            st.plotly_chart(figures['manager'], use_container_width=True)
                     
                     # Marketer chart
                     with chart_col2:
                         if marketer_stats:
                             st.write("**Thống kê theo Marketing**")
-                            marketer_chart_df = marketer_df.set_index('marketer_name')[["Chốt", "Gần xem", "Không xem", "Đang chăm sóc", "Không chốt"]]
-                            fig_marketer = px.bar(
-                                marketer_chart_df.T,
-                                title="Số lượng khách theo trạng thái - Marketing",
-                                labels={'index': 'Trạng thái', 'value': 'Số lượng'},
-                                height=400
-                            )
-                            st.plotly_chart(fig_marketer, use_container_width=True)
+                            st.plotly_chart(figures['marketer'], use_container_width=True)
                     
                     # Overall status distribution pie chart
                     if manager_stats and marketer_stats:
                         st.write("**Phân bố tổng thể theo trạng thái**")
                         
-                        # Calculate total by status across all managers and marketers
-                        total_by_status = {}
-                        status_columns = ["Chốt", "Gần xem", "Không xem", "Đang chăm sóc", "Không chốt"]
-                        
-                        for status in status_columns:
-                            total_by_status[status] = sum(row.get(status, 0) for row in manager_stats)
-                        
-                        if sum(total_by_status.values()) > 0:
-                            fig_pie = px.pie(
-                                values=list(total_by_status.values()),
-                                names=list(total_by_status.keys()),
-                                title="Phân bố khách hàng theo trạng thái"
-                            )
-                            st.plotly_chart(fig_pie, use_container_width=True)
+                        if figures['status'] is not None:
+                            st.plotly_chart(figures['status'], use_container_width=True)
                 else:
                     st.info("Không có dữ liệu để hiển thị biểu đồ")
+                
+                # Trends section
+                st.subheader("📉 Xu hướng khách mới")
+                trend_managers, _ = results['managers_name_map']
+                trend_marketers, _ = results['marketers_name_map']
+                scopes = [(None, None)]
+                scopes += [("manager", manager_id) for manager_id in trend_managers or {}]
+                scopes += [("marketer", marketer_id) for marketer_id in trend_marketers or {}]
+                scope_labels = {"manager": ("Quản lý", trend_managers), "marketer": ("Marketing", trend_marketers)}
+
+                def scope_label(scope):
+                    if scope[0] is None:
+                        return "Tất cả khách"
+                    role_label, name_map = scope_labels[scope[0]]
+                    return f"{role_label}: {name_map.get(scope[1], scope[1])}"
+
+                trend_col1, trend_col2 = st.columns([1, 2])
+                with trend_col1:
+                    st.radio(
+                        "Chu kỳ", list(TREND_FREQUENCY_LABELS), format_func=TREND_FREQUENCY_LABELS.get,
+                        horizontal=True, key="analytics_trend_frequency"
+                    )
+                with trend_col2:
+                    st.selectbox("Phạm vi", scopes, format_func=scope_label, key="analytics_trend_scope")
+                trends, trends_error = trends_future.result()
+                if trends_error:
+                    st.error("Không thể lấy dữ liệu xu hướng. Vui lòng thử lại sau.")
+                elif trends['figures']['new_guests'] is None:
+                    st.info("Không có khách mới trong khoảng thời gian này")
+                else:
+                    st.plotly_chart(trends['figures']['new_guests'], use_container_width=True)
+                    st.plotly_chart(trends['figures']['status_mix'], use_container_width=True)
+                
+                # Funnel section (from the status history)
+                st.subheader("🔻 Phễu chuyển đổi")
+                flow, flow_error = funnel_future.result()
+                if flow_error:
+                    st.error("Không thể lấy dữ liệu phễu chuyển đổi. Vui lòng thử lại sau.")
+                elif not flow['funnel']['guest_count'].iloc[0]:
+                    st.info("Không có khách mới trong khoảng thời gian này")
+                else:
+                    st.caption("Khách tạo trong khoảng thời gian đã chọn và giai đoạn xa nhất họ từng đạt tới")
+                    st.plotly_chart(flow['figure'], use_container_width=True)
+                
+                st.write("**Thời gian đến khi chốt**")
+                time_to_close, time_to_close_error = time_to_close_future.result()
+                if time_to_close_error:
+                    st.error("Không thể lấy dữ liệu thời gian chốt. Vui lòng thử lại sau.")
+                else:
+                    st.caption("Khách chốt lần đầu trong khoảng thời gian đã chọn: số ngày từ khi tạo và số ngày ở mỗi trạng thái trước đó")
+                    if time_to_close.empty:
+                        st.info("Không có khách chốt trong khoảng thời gian này")
+                    else:
+                        st.dataframe(
+                            time_to_close,
+                            column_config={
+                                "status": "Trạng thái",
+                                "guest_count": st.column_config.NumberColumn("Số khách", format="%d"),
+                                "avg_days": st.column_config.NumberColumn("Trung bình (ngày)", format="%.1f"),
+                                "median_days": st.column_config.NumberColumn("Trung vị (ngày)", format="%.1f"),
+                                "p90_days": st.column_config.NumberColumn("P90 (ngày)", format="%.1f")
+                            },
+                            hide_index=True,
+                            use_container_width=True
+                        )
+
+def analytics_figures(snapshot):
+    """Charts of the analytics tab; None for a chart without data"""
+    statuses = ["Chốt", "Gần xem", "Không xem", "Đang chăm sóc", "Không chốt"]
+    manager_df = snapshot['manager_stats']
+    marketer_df = snapshot['marketer_stats']
+    figures = {'manager': None, 'marketer': None, 'status': None}
+    if not manager_df.empty:
+        figures['manager'] = px.bar(
+            manager_df.set_index('manager_name')[statuses].T,
+            title="Số lượng khách theo trạng thái - Quản lý",
+            labels={'index': 'Trạng thái', 'value': 'Số lượng'},
+            height=400
+        )
+    if not marketer_df.empty:
+        figures['marketer'] = px.bar(
+            marketer_df.set_index('marketer_name')[statuses].T,
+            title="Số lượng khách theo trạng thái - Marketing",
+            labels={'index': 'Trạng thái', 'value': 'Số lượng'},
+            height=400
+        )
+    # Totals by status come precomputed with the snapshot
+    total_by_status = snapshot['status_totals']
+    if total_by_status.sum() > 0:
+        figures['status'] = px.pie(
+            values=total_by_status.values,
+            names=total_by_status.index,
+            title="Phân bố khách hàng theo trạng thái"
+        )
+    return figures
+
+def analytics_view(start_date, end_date):
+    """Analytics snapshot with its charts, so both are cached together per data version"""
+    snapshot, message = get_guest_analytics_snapshot(start_date, end_date)
+    if snapshot is None:
+        return snapshot, message
+    return {**snapshot, 'figures': analytics_figures(snapshot)}, message
+
+TREND_FREQUENCY_LABELS = {"week": "Tuần", "month": "Tháng", "day": "Ngày"}
+
+def trends_view(start_date, end_date, frequency, group_by, group_id):
+    """Trend series with their (decimated) charts, cached together per data version"""
+    trends, message = get_guest_trends(start_date, end_date, frequency, group_by, group_id)
+    if trends is None:
+        return trends, message
+    return {**trends, 'figures': trend_figures(trends, settings.TREND_MAX_POINTS)}, message
+
+def funnel_view(start_date, end_date):
+    """Funnel from the status history with its chart, cached together per data version"""
+    funnel, message = get_guest_funnel(start_date, end_date)
+    if funnel is None:
+        return funnel, message
+    figure = px.funnel(
+        funnel, x='guest_count', y='stage',
+        labels={'guest_count': 'Số khách', 'stage': 'Giai đoạn'},
+        height=350
+    )
+    figure.update_traces(textinfo="value+percent initial")
+    return {'funnel': funnel, 'figure': figure}, message
 
 @st.dialog("Thêm khách mới")
-def admin_add_guest_dialog(houses_name_map, guest_status_options, marketers_name_map):
-    # Get houses with managers for dynamic manager display
-    houses_with_managers_map, _ = get_houses_with_managers_map()
-    
+def admin_add_guest_dialog(houses_name_map, houses_with_managers_map, guest_status_options, marketers_name_map):
     guest_name = st.text_input("Tên khách hàng", key="admin_new_guest_name")
     guest_phone = st.text_input("Số điện thoại", key="admin_new_guest_phone")
     
     # House selection
-    house_options = list(houses_name_map.values())
-    house_ids = list(houses_name_map.keys())
-    selected_house_address = st.selectbox("Nhà", house_options, key="admin_new_house")
+    selected_house_address = st.selectbox("Nhà", houses_name_map.options, key="admin_new_house")
     
     # Display manager for selected house
     if selected_house_address and houses_with_managers_map:
-        house_id = house_ids[house_options.index(selected_house_address)]
+        house_id = houses_name_map.id_of(selected_house_address)
         if house_id in houses_with_managers_map:
             manager_name = houses_with_managers_map[house_id]['manager_name']
             st.text_input("Quản lý nhà", value=manager_name, disabled=True, key="admin_new_manager_display")
     
     # Marketer selection
-    marketer_options = list(marketers_name_map.values())
-    marketer_ids = list(marketers_name_map.keys())
-    selected_marketer_name = st.selectbox("Nhân viên marketing", marketer_options, key="admin_new_marketer")
+    selected_marketer_name = st.selectbox("Nhân viên marketing", marketers_name_map.options, key="admin_new_marketer")
 
     # Date and time selection
     st.write("**Ngày và giờ xem nhà**")
@@ -486,8 +636,8 @@ def admin_add_guest_dialog(houses_name_map, guest_status_options, marketers_name
     with col1:
         if st.button("Thêm", key="admin_add_guest_confirm", use_container_width=True):
             if guest_name and guest_phone and selected_house_address and selected_marketer_name:
-                house_id = house_ids[house_options.index(selected_house_address)]
-                marketer_id = marketer_ids[marketer_options.index(selected_marketer_name)]
+                house_id = houses_name_map.id_of(selected_house_address)
+                marketer_id = marketers_name_map.id_of(selected_marketer_name)
                 
                 # Combine date and time
                 view_datetime = None
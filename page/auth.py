@@ -1,5 +1,6 @@
 import streamlit as st
 from service.account_service import get_account_by_phone, create_account
+from service.projections import ACCOUNT_SESSION
 from streamlit_local_storage import LocalStorage
 import time
 
@@ -55,7 +56,7 @@ def login_page():
                 st.error("Vui lòng nhập số điện thoại")
                 return 
             else:
-                account = get_account_by_phone(phone_number=phone_number)
+                account = get_account_by_phone(phone_number=phone_number, projection=ACCOUNT_SESSION)
                 if account:
                     # Set item in localStorage
                     locals.setItem("account", account, key="account_info")
@@ -82,18 +83,15 @@ def login_page():
                 if not full_name or not phone:
                     st.error("Vui lòng điền đầy đủ thông tin")
                 else:
-                    existing_account = get_account_by_phone(phone_number=phone)
-                    if existing_account:
-                        st.error("Số điện thoại đã được sử dụng")
+                    # Single insert; duplicate phone numbers are rejected by the database
+                    new_account, message = create_account(full_name=full_name, phone_number=phone, role=role)
+                    if new_account:
+                        # Change to login tab
+                        st.session_state.active_tab = 0
+                        st.session_state.show_login_prompt = True
+                        st.session_state.register_success = True
+                        time.sleep(0.5)
+                        st.rerun()
                     else:
-                        new_account = create_account(full_name=full_name, phone_number=phone, role=role)
-                        if new_account:
-                            # Change to login tab
-                            st.session_state.active_tab = 0
-                            st.session_state.show_login_prompt = True
-                            st.session_state.register_success = True
-                            time.sleep(0.5)
-                            st.rerun()
-                        else:
-                            st.error("Có lỗi xảy ra, vui lòng thử lại sau")
+                        st.error(message or "Có lỗi xảy ra, vui lòng thử lại sau")
 
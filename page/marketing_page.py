@@ -1,29 +1,26 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timezone, timedelta
-from service.guest_service import get_guests_with_details, get_guest_status_options, get_houses_name_map, get_houses_with_managers_map, get_marketers_name_map, create_guest, update_guest
-from component.table_with_dialog import table_with_dialog
-
-def format_vietnam_datetime(date_str):
-    """Format datetime to Vietnam timezone (GMT+7)"""
-    if not date_str:
-        return ""
-    try:
-        # Parse the datetime string
-        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        # Convert to Vietnam timezone (GMT+7)
-        vietnam_tz = timezone(timedelta(hours=7))
-        vietnam_dt = dt.astimezone(vietnam_tz)
-        return vietnam_dt.strftime("%d/%m/%Y %H:%M")
-    except:
-        return date_str
+from datetime import datetime, timedelta
+from service.guest_service import get_guests_page, guest_change_topics, get_guest_status_options, get_houses_name_map, get_houses_with_managers_map, get_marketers_name_map, create_guest, update_guest, update_guests
+from component.table_with_dialog import table_with_dialog, page_cursor
+from component.guest_table import guest_page_view, guest_table_options
+from component.guest_filters import guest_filters, current_guest_filters
+from component.guest_import import guest_import_dialog
+from config import settings
+from library.concurrency import gather
+from library.change_feed import current_sequence, data_version
+from library.cache import view_model
+from library.resilience import fresh_result
+from component.live_refresh import live_refresh
+from component.dashboard_metrics import dashboard_metrics
+from functools import partial
 
 def marketing_dashboard(account, current_page="dashboard"):
     if current_page == "dashboard":
         st.title("Trang Tổng Quan Marketing")
         
-        # Dashboard metrics
-        st.metric(label="Tổng số khách", value="25", delta="2")
+        # Dashboard metrics (their guests only)
+        dashboard_metrics(account)
             
         # Some charts or recent activity
         st.subheader("Hoạt động gần đây")
@@ -33,68 +30,63 @@ def marketing_dashboard(account, current_page="dashboard"):
         st.title("Quản lý khách")
         st.write("Chức năng quản lý khách hàng dành cho nhân viên marketing")
         
-        # Get data
-        guests, guest_error = get_guests_with_details(account_id=account['id'], role=account['role'])
+        # Get data concurrently
+        topics = guest_change_topics(account['id'], account['role'])
+        since = current_sequence()
+        version = data_version(topics)
+        filters, sort_by, descending = current_guest_filters("guests_table")
+        cursor = page_cursor("guests_table", signature=repr((filters, sort_by, descending)))
+        results = gather(
+            guest_page=partial(
+                view_model, ("guests_table", account['id'], filters, sort_by, descending, cursor), version,
+                partial(guest_page_view, partial(
+                    get_guests_page, account_id=account['id'], role=account['role'],
+                    filters=filters, sort_by=sort_by, descending=descending, cursor=cursor,
+                    page_size=settings.GUEST_PAGE_SIZE, count=settings.GUEST_COUNT_MODE
+                )),
+                should_cache=fresh_result
+            ),
+            houses_name_map=get_houses_name_map,
+            houses_with_managers_map=get_houses_with_managers_map
+        )
         guest_status_options = get_guest_status_options()
-        houses_name_map, house_error = get_houses_name_map()
-        houses_with_managers_map, house_manager_error = get_houses_with_managers_map()
+        houses_name_map, house_error = results['houses_name_map']
+        houses_with_managers_map, house_manager_error = results['houses_with_managers_map']
         
-        if guest_error or house_error or house_manager_error:
+        if house_error or house_manager_error:
             st.error("Không thể lấy dữ liệu. Vui lòng thử lại sau.")
             return
+        live_refresh(topics, since)
             
-        # Add new guest dialog
-        if st.button("➕ Thêm khách mới"):
-            st.session_state.show_add_dialog = True
-            st.rerun()
+        # Add new guest / bulk import dialogs
+        col_add, col_import, _ = st.columns([1, 1, 4])
+        with col_add:
+            if st.button("➕ Thêm khách mới", use_container_width=True):
+                st.session_state.show_add_dialog = True
+                st.rerun()
+        with col_import:
+            if st.button("📥 Nhập từ tệp", use_container_width=True):
+                st.session_state.guest_import_show = True
+                st.rerun()
             
         if st.session_state.get('show_add_dialog', False):
-            add_guest_dialog(account, houses_name_map, guest_status_options)
+            add_guest_dialog(account, houses_name_map, houses_with_managers_map, guest_status_options)
+        elif st.session_state.get('guest_import_show', False):
+            guest_import_dialog("guest_import", houses_name_map, guest_status_options, marketer_id=account['id'])
+        
+        guest_filters("guests_table", guest_status_options, houses_name_map)
+        guest_page, guest_error = results['guest_page']
+        if guest_error:
+            st.error("Không thể lấy danh sách khách hàng. Vui lòng thử lại sau.")
+            return
+        guests = guest_page['rows']
         
         if guests:
-            # Prepare DataFrame
-            df_data = []
-            for guest in guests:
-                df_data.append({
-                    'id': guest['id'],
-                    'guest_name': guest['guest_name'],
-                    'guest_phone_number': guest['guest_phone_number'],
-                    'house_address': guest['house']['address'],
-                    'manager_name': guest['house']['manager']['full_name'],
-                    'view_date': format_vietnam_datetime(guest['view_date']),
-                    'status': guest['status'],
-                    'marketer_name': guest['marketer']['full_name'],
-                    'created_at': format_vietnam_datetime(guest['created_at']),
-                    'admin_note': guest['admin_note'] or '',
-                    'manager_note': guest['manager_note'] or ''
-                })
-            
-            df = pd.DataFrame(df_data)
-            
-            # Column configuration for marketing role
-            column_labels = {
-                'id': 'ID',
-                'guest_name': 'Tên khách',
-                'guest_phone_number': 'Số điện thoại',
-                'house_address': 'Địa chỉ nhà',
-                'manager_name': 'Quản lý nhà',
-                'view_date': 'Ngày và giờ xem',
-                'status': 'Trạng thái',
-                'marketer_name': 'Nhân viên marketing',
-                'created_at': 'Ngày tạo',
-                'admin_note': 'Ghi chú admin',
-                'manager_note': 'Ghi chú quản lý'
-            }
-            
-            # Dropdown options for edit dialog
-            dropdown_columns = {
-                'status': guest_status_options,
-                'house_address': list(houses_name_map.values())
-            }
-            
-            # Marketing role restrictions
-            hidden_columns = ['id', 'created_at']
-            disabled_columns = ['marketer_name', 'manager_name', 'admin_note', 'manager_note']
+            df = guest_page['frame']
+            table_options = view_model(
+                ("guest_table_options", "Marketing", account['id']), version,
+                partial(guest_table_options, "Marketing", guest_status_options, houses_name_map)
+            )
             
             def handle_edit(row_idx, new_values):
                 guest_id = df.iloc[row_idx]['id']
@@ -103,16 +95,9 @@ def marketing_dashboard(account, current_page="dashboard"):
                 updates = {k: v for k, v in new_values.items() if k in allowed_fields}
                 
                 # Handle house address change
-                if 'house_address' in new_values and new_values['house_address'] in houses_name_map.values():
-                    house_ids = list(houses_name_map.keys())
-                    house_options = list(houses_name_map.values())
-                    house_id = house_ids[house_options.index(new_values['house_address'])]
+                house_id = houses_name_map.id_of(new_values.get('house_address'))
+                if house_id is not None:
                     updates['house_id'] = house_id
-                    
-                    # Update the manager name in the DataFrame for immediate UI update
-                    if house_id in houses_with_managers_map:
-                        df.at[row_idx, 'manager_name'] = houses_with_managers_map[house_id]['manager_name']
-                    
                     updates.pop('house_address', None)  # Remove display field
                 
                 if updates:
@@ -123,37 +108,50 @@ def marketing_dashboard(account, current_page="dashboard"):
                     else:
                         st.error(message)
             
+            def handle_bulk_update(row_ids, new_values):
+                updates = {k: v for k, v in new_values.items() if k == 'status'}
+                house_id = houses_name_map.id_of(new_values.get('house_address'))
+                if house_id is not None:
+                    updates['house_id'] = house_id
+                
+                result, message = update_guests(row_ids, updates, role=account['role'], account_id=account['id'])
+                if result:
+                    st.success(message)
+                    st.rerun()
+                else:
+                    st.error(message)
+            
             # Display table with dialog actions
             st.subheader("Danh sách khách hàng")
             table_with_dialog(
                 df=df,
                 key="guests_table",
                 on_edit=handle_edit,
-                dropdown_columns=dropdown_columns,
-                hidden_columns=hidden_columns,
-                disabled_columns=disabled_columns,
-                column_labels=column_labels,
                 allow_edit=True,
-                allow_delete=False  # Marketing role cannot delete
+                allow_delete=False,  # Marketing role cannot delete
+                on_bulk_update=handle_bulk_update,
+                **table_options,
+                houses_with_managers_map=houses_with_managers_map,
+                version=version,
+                pagination={
+                    'next_cursor': guest_page['next_cursor'],
+                    'total': guest_page['total'],
+                    'page_size': settings.GUEST_PAGE_SIZE
+                }
             )
             
         else:
-            st.error("Không thể lấy danh sách khách hàng. Vui lòng thử lại sau.")
+            st.info("Không có khách hàng nào phù hợp.")
 
 @st.dialog("Thêm khách mới")
-def add_guest_dialog(account, houses_name_map, guest_status_options):
-    # Get houses with managers for dynamic manager display
-    houses_with_managers_map, _ = get_houses_with_managers_map()
-    
+def add_guest_dialog(account, houses_name_map, houses_with_managers_map, guest_status_options):
     guest_name = st.text_input("Tên khách hàng", key="new_guest_name")
     guest_phone = st.text_input("Số điện thoại", key="new_guest_phone")
-    house_options = list(houses_name_map.values())
-    house_ids = list(houses_name_map.keys())
-    selected_house_address = st.selectbox("Nhà", house_options, key="new_house")
+    selected_house_address = st.selectbox("Nhà", houses_name_map.options, key="new_house")
     
     # Display manager for selected house
     if selected_house_address and houses_with_managers_map:
-        house_id = house_ids[house_options.index(selected_house_address)]
+        house_id = houses_name_map.id_of(selected_house_address)
         if house_id in houses_with_managers_map:
             manager_name = houses_with_managers_map[house_id]['manager_name']
             st.text_input("Quản lý nhà", value=manager_name, disabled=True, key="new_manager_display")
@@ -172,7 +170,7 @@ def add_guest_dialog(account, houses_name_map, guest_status_options):
     with col1:
         if st.button("Thêm", key="add_guest_confirm", use_container_width=True):
             if guest_name and guest_phone and selected_house_address:
-                house_id = house_ids[house_options.index(selected_house_address)]
+                house_id = houses_name_map.id_of(selected_house_address)
                 
                 # Combine date and time
                 view_datetime = None
@@ -1,61 +1,109 @@
 from library.supabase import supabase
+from library.metrics import instrumented
+from library.cache import cached, invalidate_reference_data, REFERENCE_NAMESPACE
+from library.resilience import fresh_result, resilient_read
+from library.lookup import LabelIndex
+from postgrest.exceptions import APIError
+from service.projections import AccountRow, Projection, ACCOUNT_SESSION, ACCOUNT_TABLE
+from typing import List, Optional, Tuple
 
-def get_account_by_phone(phone_number: str) -> dict:
-    response = supabase.table("Account").select("*").eq("phone_number", phone_number).execute()
+# Postgres unique_violation, returned by PostgREST when phone_number already exists
+UNIQUE_VIOLATION = "23505"
+
+def get_account_role_options():
+    """Get available account roles"""
+    return ["Quản trị viên", "Marketing", "Quản lý"]
+
+@instrumented
+def get_account_by_phone(phone_number: str, projection: Projection = ACCOUNT_SESSION) -> Optional[AccountRow]:
+    response = supabase.table(projection.table).select(projection.select).eq("phone_number", phone_number).execute()
     if response.data:
         return response.data[0] 
     return None
 
+@instrumented
 def create_account(full_name: str, phone_number: str, role: str):
-    account = get_account_by_phone(phone_number=phone_number)
-    if account is not None:
-        return None, "Số điện thoại đã được sử dụng"
+    """Create an account in one request; the unique phone_number constraint rejects duplicates"""
     data = {
         "full_name": full_name,
         "phone_number": phone_number,
         "role": role
     }
-    response = supabase.table("Account").insert(data).execute()
+    try:
+        response = supabase.table("Account").insert(data).execute()
+    except APIError as e:
+        if e.code == UNIQUE_VIOLATION:
+            return None, "Số điện thoại đã được sử dụng"
+        return None, f"Lỗi khi tạo tài khoản: {e.message}"
     if response.data:
-        return data, "Tạo tài khoản thành công"
+        invalidate_reference_data()
+        return response.data[0], "Tạo tài khoản thành công"
 
     return None, "Lỗi khi tạo tài khoản"
 
-def get_all_accounts():
-    response = supabase.table("Account").select("*").execute()
+@instrumented
+def upsert_accounts(accounts: list):
+    """
+    Create or update many accounts in one request, matched on phone_number.
+    Existing phone numbers get their full_name and role updated
+    """
+    # A single upsert statement cannot touch the same row twice: keep the last entry per phone
+    by_phone = {account["phone_number"]: account for account in accounts}
+    if not by_phone:
+        return None, "Không có tài khoản nào để nhập"
+    try:
+        response = supabase.table("Account").upsert(list(by_phone.values()), on_conflict="phone_number").execute()
+    except APIError as e:
+        return None, f"Lỗi khi nhập tài khoản: {e.message}"
+    if response.data:
+        invalidate_reference_data()
+        return response.data, f"Đã lưu {len(response.data)} tài khoản"
+    return None, "Lỗi khi nhập tài khoản"
+
+@instrumented
+def get_all_accounts(projection: Projection = ACCOUNT_TABLE) -> Tuple[Optional[List[AccountRow]], str]:
+    response = supabase.table(projection.table).select(projection.select).execute()
     if response.data:
         return response.data, "Danh sách tài khoản đã được lấy thành công"
     return None, "Không có tài khoản nào hoặc lỗi khi lấy dữ liệu"
 
+@instrumented
 def update_account(account_id, data):
     response = supabase.table("Account").update(data).eq("id", account_id).execute()
     if response.data:
+        invalidate_reference_data()
         return response.data[0], "Cập nhật tài khoản thành công"
     return None, "Lỗi khi cập nhật tài khoản"
 
+@instrumented
 def delete_account(account_id):
     response = supabase.table("Account").delete().eq("id", account_id).execute()
     if response.data:
+        invalidate_reference_data()
         return True, "Xóa tài khoản thành công"
     return False, "Lỗi khi xóa tài khoản"
 
+@instrumented
+@cached(REFERENCE_NAMESPACE, should_cache=fresh_result)
+@resilient_read
 def get_account_name_map():
     """Get mapping of account IDs to full names for dropdown selections"""
     response = supabase.table("Account").select("id, full_name").execute()
     if response.data:
-        name_map = {account['id']: account['full_name'] for account in response.data}
+        name_map = LabelIndex({account['id']: account['full_name'] for account in response.data})
         return name_map, "Danh sách tài khoản đã được lấy thành công"
-    return {}, "Không có tài khoản nào hoặc lỗi khi lấy dữ liệu"
+    return LabelIndex({}), "Không có tài khoản nào hoặc lỗi khi lấy dữ liệu"
 
+@instrumented
+@cached(REFERENCE_NAMESPACE, should_cache=fresh_result)
+@resilient_read
 def get_managers_name_map():
     """Get mapping of manager account IDs to full names (only accounts with 'Quản lý' role)"""
     try:
-        response = supabase.table("Account").select("id, full_name, role").execute()
+        response = supabase.table("Account").select("id, full_name").eq("role", "Quản lý").execute()
         if response.data:
-            # Filter accounts with exact role "Quản lý" (case-sensitive)
-            managers = [account for account in response.data if account.get('role') == "Quản lý"]
-            name_map = {account['id']: account['full_name'] for account in managers}
+            name_map = LabelIndex({account['id']: account['full_name'] for account in response.data}, key='manager_id')
             return name_map, "Danh sách quản lý đã được lấy thành công"
-        return {}, "Không có quản lý nào"
+        return LabelIndex({}, key='manager_id'), "Không có quản lý nào"
     except Exception as e:
-        return {}, f"Lỗi khi lấy dữ liệu quản lý: {str(e)}"
\ No newline at end of file
+        return None, f"Lỗi khi lấy dữ liệu quản lý: {str(e)}"
\ No newline at end of file
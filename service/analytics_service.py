@@ -0,0 +1,218 @@
+from library.supabase import supabase
+from library.metrics import instrumented
+from library.cache import cached
+from library.resilience import fresh_result, resilient_read
+from library.lookup import LabelIndex
+from service.guest_service import get_guest_status_options, rollup_day, VIETNAM_TZ
+from config import settings
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+import pandas as pd
+
+# Dashboard counts, shared by every session with the same scope for KPI_CACHE_TTL_SECONDS
+KPI_NAMESPACE = "kpi"
+CLOSED_STATUS = "Chốt"
+
+# Funnel stages after creation, in order; reaching a later stage counts for the earlier ones
+FUNNEL_STAGES = ["Đang chăm sóc", "Gần xem", CLOSED_STATUS]
+NEW_GUESTS_STAGE = "Khách mới"
+TOTAL_TIME_LABEL = "Tổng thời gian"
+
+ROLLUP_COLUMNS = ['dimension', 'group_id', 'group_name', 'status', 'guest_count']
+DAILY_COLUMNS = ['day', 'status', 'guest_count']
+# Trend period -> pandas resample rule; weeks start on Monday (label/closed left)
+TREND_FREQUENCIES = {'day': 'D', 'week': 'W-MON', 'month': 'MS'}
+
+def _statuses(counts: pd.DataFrame) -> list:
+    """Known status options first, then any other status present in the data"""
+    statuses = get_guest_status_options()
+    return statuses + sorted(set(counts['status'].dropna()) - set(statuses))
+
+def _status_table(counts: pd.DataFrame, group: str) -> pd.DataFrame:
+    """Pivot the 'manager' or 'marketer' rollup counts into one row per group with a column per status and a total"""
+    rows = counts[(counts['dimension'] == group) & counts['group_id'].notna()]
+    statuses = _statuses(rows)
+    table = pd.crosstab(
+        index=[rows['group_id'], rows['group_name']],
+        columns=rows['status'],
+        values=rows['guest_count'],
+        aggfunc='sum'
+    ).reindex(columns=statuses).fillna(0).astype(int)
+    table['total'] = table.sum(axis=1)
+    table.columns.name = None
+    table = table.reset_index().rename(columns={'group_name': f'{group}_name'})
+    # Two managers/marketers may share a name; rows (and chart bars) must stay distinct
+    names = LabelIndex(dict(zip(table['group_id'], table[f'{group}_name'])))
+    table[f'{group}_name'] = table['group_id'].map(names)
+    return table.drop(columns='group_id')
+
+@instrumented
+@resilient_read
+def get_guest_analytics_snapshot(start_date: str = None, end_date: str = None) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Get per-manager, per-marketer and overall status statistics within date range
+    (whole days, Vietnam time) from a single query over the daily rollup (guest_rollup_counts).
+    Returns {'manager_stats': DataFrame, 'marketer_stats': DataFrame, 'status_totals': Series}
+    """
+    try:
+        response = supabase.rpc('guest_rollup_counts', {
+            'start_day': rollup_day(start_date),
+            'end_day': rollup_day(end_date)
+        }).execute()
+        counts = pd.DataFrame(response.data or [], columns=ROLLUP_COLUMNS)
+
+        # Every guest is counted once per dimension, with or without a marketer
+        marketers = counts[counts['dimension'] == 'marketer']
+        status_totals = marketers.groupby('status')['guest_count'].sum()
+        status_totals = status_totals.reindex(_statuses(counts), fill_value=0).astype(int)
+        return {
+            'manager_stats': _status_table(counts, 'manager'),
+            'marketer_stats': _status_table(counts, 'marketer'),
+            'status_totals': status_totals
+        }, None
+    except Exception as e:
+        return None, str(e)
+
+@instrumented
+@resilient_read
+def get_guest_trends(start_date: str = None, end_date: str = None, frequency: str = 'week',
+                     group_by: str = None, group_id: int = None) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    New guests per day, week (from Monday) or month within date range, for all guests
+    or one manager's/marketer's (group_by 'manager'/'marketer', group_id), resampled
+    from the daily rollup (guest_rollup_daily).
+    Returns {'new_guests': Series, 'status_counts': DataFrame, 'status_share': DataFrame},
+    indexed by period start; status columns in status option order
+    """
+    try:
+        response = supabase.rpc('guest_rollup_daily', {
+            'start_day': rollup_day(start_date),
+            'end_day': rollup_day(end_date),
+            'group_by': group_by,
+            'group_id': group_id if group_by else None
+        }).execute()
+        daily = pd.DataFrame(response.data or [], columns=DAILY_COLUMNS)
+        daily['day'] = pd.to_datetime(daily['day'])
+
+        counts = daily.pivot_table(index='day', columns='status', values='guest_count', aggfunc='sum', fill_value=0)
+        counts = counts.reindex(columns=_statuses(daily), fill_value=0)
+        counts['total'] = daily.groupby('day')['guest_count'].sum()
+        # Periods without guests are zeros, not gaps, across the whole requested range
+        if start_date and end_date:
+            counts = counts.reindex(pd.date_range(rollup_day(start_date), rollup_day(end_date), freq='D'), fill_value=0)
+        counts = counts.astype(int).rename_axis(index='period', columns=None)
+
+        periods = counts.resample(TREND_FREQUENCIES[frequency], label='left', closed='left').sum()
+        new_guests = periods.pop('total').rename('new_guests')
+        status_share = periods.div(periods.sum(axis=1), axis=0).fillna(0)
+        return {
+            'new_guests': new_guests,
+            'status_counts': periods,
+            'status_share': status_share
+        }, None
+    except Exception as e:
+        return None, str(e)
+
+@instrumented
+@resilient_read
+def get_guest_funnel(start_date: str = None, end_date: str = None) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Conversion funnel of the guests created within date range (whole days, Vietnam time),
+    from the status history (guest_status_funnel): NEW_GUESTS_STAGE, then FUNNEL_STAGES.
+    Returns a DataFrame of stage, guest_count, rate (of new guests) and step_rate (of the previous stage)
+    """
+    try:
+        response = supabase.rpc('guest_status_funnel', {
+            'stages': FUNNEL_STAGES,
+            'start_day': rollup_day(start_date),
+            'end_day': rollup_day(end_date)
+        }).execute()
+        funnel = pd.DataFrame(response.data or [], columns=['stage', 'guest_count'])
+        funnel['stage'] = funnel['stage'].fillna(NEW_GUESTS_STAGE)
+        counts = funnel['guest_count'] = funnel['guest_count'].astype(int)
+        new_guests = counts.iloc[0] if len(counts) else 0
+        funnel['rate'] = counts / new_guests if new_guests else 0.0
+        previous = counts.shift(fill_value=new_guests)
+        funnel['step_rate'] = counts.div(previous.where(previous > 0)).fillna(0.0)
+        return funnel, None
+    except Exception as e:
+        return None, str(e)
+
+@instrumented
+@resilient_read
+def get_time_to_close(start_date: str = None, end_date: str = None) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Days from creation to the first CLOSED_STATUS for guests closed within date range, and
+    days spent in each status on the way, from the status history (guest_time_to_close).
+    Returns a DataFrame of status (TOTAL_TIME_LABEL first), guest_count, avg_days, median_days, p90_days
+    """
+    try:
+        response = supabase.rpc('guest_time_to_close', {
+            'closed_status': CLOSED_STATUS,
+            'start_day': rollup_day(start_date),
+            'end_day': rollup_day(end_date)
+        }).execute()
+        rows = pd.DataFrame(response.data or [], columns=[
+            'status', 'guest_count', 'avg_hours', 'median_hours', 'p90_hours'])
+        order = {status: position for position, status in enumerate(_statuses(rows))}
+        rows = rows.assign(order=rows['status'].map(order).fillna(-1)).sort_values('order', kind='stable')
+        table = pd.DataFrame({
+            'status': rows['status'].fillna(TOTAL_TIME_LABEL),
+            'guest_count': rows['guest_count'].astype(int),
+            **{f'{name}_days': rows[f'{name}_hours'].astype(float) / 24 for name in ('avg', 'median', 'p90')}
+        })
+        return table[table['guest_count'] > 0].reset_index(drop=True), None
+    except Exception as e:
+        return None, str(e)
+
+def rebuild_guest_rollup() -> Tuple[Optional[int], Optional[str]]:
+    """
+    Recount GuestDailyRollup from Guest (after imports that bypassed its triggers).
+    Returns the number of rollup rows
+    """
+    try:
+        response = supabase.rpc('rebuild_guest_rollup', {}).execute()
+        return response.data, None
+    except Exception as e:
+        return None, str(e)
+
+def _week_start() -> datetime:
+    """Monday 00:00 of the current week in Vietnam time"""
+    today = datetime.now(VIETNAM_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=today.weekday())
+
+@instrumented
+@cached(KPI_NAMESPACE, ttl=settings.KPI_CACHE_TTL_SECONDS, should_cache=fresh_result)
+@resilient_read
+def get_dashboard_kpis(account_id: int = None, role: str = None) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Totals for the role's dashboard from one query over the daily rollup (dashboard_kpis):
+    houses, accounts and guests in scope, new guests this week and last week
+    (Vietnam time) and the share of guests closed
+    """
+    try:
+        response = supabase.rpc('dashboard_kpis', {
+            'week_start': _week_start().isoformat(),
+            'scope_manager_id': account_id if role == "Quản lý" else None,
+            'scope_marketer_id': account_id if role == "Marketing" else None,
+            'closed_status': CLOSED_STATUS
+        }).execute()
+        row = response.data[0]
+        guests = row['guest_count']
+        return {
+            'houses': row['house_count'],
+            'accounts': row['account_count'],
+            'guests': guests,
+            'new_this_week': row['new_this_week'],
+            'new_last_week': row['new_last_week'],
+            'close_rate': row['closed_count'] / guests if guests else None
+        }, None
+    except Exception as e:
+        return None, str(e)
+
+if __name__ == "__main__":
+    # python -m service.analytics_service: rebuild the daily rollup of the configured backend
+    rows, error = rebuild_guest_rollup()
+    if error:
+        raise SystemExit(f"Không thể dựng lại bảng tổng hợp: {error}")
+    print(f"Đã dựng lại GuestDailyRollup: {rows} dòng")
@@ -1,45 +1,295 @@
 from library.supabase import supabase
+from library.metrics import instrumented
+from library.cache import cached, get_cache, REFERENCE_NAMESPACE, GUEST_SYNC_NAMESPACE
+from library.resilience import fresh_result, resilient_read
+from library.lookup import LabelIndex
+from library.change_feed import publish_inserted, publish_writes
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime
+from datetime import date, datetime, time, timedelta, timezone
+from config import settings
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from collections import deque
+import base64
+import json
+import threading
 
+GUEST_DETAILS_SELECT = """
+    id,
+    created_at,
+    marketer_id,
+    house_id,
+    view_date,
+    guest_name,
+    guest_phone_number,
+    status,
+    admin_note,
+    manager_note,
+    marketer:Account!Guest_marketer_id_fkey(id, full_name, phone_number),
+    house:House!{house_join}(id, address, manager:Account!House_manager_id_fkey(id, full_name))
+"""
+
+# Columns the guest list may be sorted by (keyset paging always breaks ties on id)
+GUEST_SORT_COLUMNS = ["created_at", "view_date", "guest_name", "status", "id"]
+# Users pick calendar days in Vietnam time; timestamps are stored in UTC
+VIETNAM_TZ = timezone(timedelta(hours=7))
+
+def _scoped_guest_query(select: str, account_id: int = None, role: str = None, count: str = None):
+    """
+    Build a Guest query restricted to what the role may see.
+    select must embed the house as house:House!{house_join}(...); managers are
+    scoped with an inner join on house.manager_id so it stays a single request
+    no matter how many houses they manage
+    """
+    if role == "Quản lý":
+        query = supabase.table('Guest').select(select.format(house_join="Guest_house_id_fkey!inner"), count=count)
+        return query.eq('house.manager_id', account_id)
+
+    query = supabase.table('Guest').select(select.format(house_join="Guest_house_id_fkey"), count=count)
+    if role == "Marketing":
+        query = query.eq('marketer_id', account_id)
+    return query
+
+@instrumented
+@resilient_read
 def get_guests_with_details(account_id: int = None, role: str = None) -> Tuple[Optional[List[Dict]], Optional[str]]:
     """
     Get guests with full details (joined with Account and House tables)
     Filters based on user role and account_id
     """
     try:
-        query = supabase.table('Guest').select("""
-            id,
-            created_at,
-            marketer_id,
-            house_id,
-            view_date,
-            guest_name,
-            guest_phone_number,
-            status,
-            admin_note,
-            manager_note,
-            marketer:Account!Guest_marketer_id_fkey(id, full_name, phone_number),
-            house:House!Guest_house_id_fkey(id, address, manager:Account!House_manager_id_fkey(id, full_name))
-        """)
-        
-        # Apply role-based filtering
-        if role == "Marketing":
-            query = query.eq('marketer_id', account_id)
-        elif role == "Quản lý":
-            # Get houses managed by this manager first
-            houses_response = supabase.table('House').select('id').eq('manager_id', account_id).execute()
-            if houses_response.data:
-                house_ids = [house['id'] for house in houses_response.data]
-                query = query.in_('house_id', house_ids)
-            else:
-                return [], None  # No houses managed, no guests
-        
+        if settings.GUEST_SYNC:
+            return _synced_guests(account_id, role), None
+        query = _scoped_guest_query(GUEST_DETAILS_SELECT, account_id, role)
         response = query.execute()
         return response.data, None
     except Exception as e:
         return None, str(e)
 
+def _encode_cursor(row: Dict, sort_by: str) -> str:
+    payload = json.dumps([row.get(sort_by), row['id']], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[object, int]:
+    value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    return value, last_id
+
+def _filter_value(value) -> str:
+    """Quote a value for a PostgREST logic tree (timestamps contain reserved characters)"""
+    return '"' + str(value).replace('"', '\\"') + '"'
+
+def _keyset_condition(sort_by: str, descending: bool, cursor: str) -> str:
+    """Rows strictly after the cursor for ORDER BY sort_by NULLS LAST, id"""
+    value, last_id = _decode_cursor(cursor)
+    op = 'lt' if descending else 'gt'
+    if value is None:
+        return f"and({sort_by}.is.null,id.{op}.{last_id})"
+    value = _filter_value(value)
+    return f"{sort_by}.{op}.{value},and({sort_by}.eq.{value},id.{op}.{last_id}),{sort_by}.is.null"
+
+def created_bound(day: date, end: bool = False) -> str:
+    """
+    created_from/created_to filter value for a Vietnam calendar day: its first
+    (or last) millisecond as a UTC timestamp, written like the stored values
+    """
+    local = datetime.combine(day, time.max if end else time.min, VIETNAM_TZ)
+    return local.astimezone(timezone.utc).isoformat(timespec='milliseconds')
+
+def _apply_guest_filters(query, filters: Dict):
+    """Apply server-side list filters: status, house_id, marketer_id, created_from, created_to"""
+    if filters.get('status'):
+        query = query.in_('status', filters['status'])
+    if filters.get('house_id'):
+        query = query.in_('house_id', filters['house_id'])
+    if filters.get('marketer_id'):
+        query = query.in_('marketer_id', filters['marketer_id'])
+    if filters.get('created_from'):
+        query = query.gte('created_at', filters['created_from'])
+    if filters.get('created_to'):
+        query = query.lte('created_at', filters['created_to'])
+    return query
+
+# Incremental sync (settings.GUEST_SYNC, needs sql/guest_sync.sql): each role scope keeps its
+# guest set in memory and each read only fetches rows whose updated_at passed the high-water
+# mark, plus GuestTombstone rows for deletes, so refresh cost follows churn, not table size
+GUEST_SYNC_SELECT = "updated_at," + GUEST_DETAILS_SELECT
+# PostgREST's default max-rows; larger loads are fetched in id-ordered batches
+SYNC_BATCH_SIZE = 1000
+
+class _GuestSyncState:
+    """Synced guest rows of one role scope and the high-water marks they are current to"""
+
+    def __init__(self):
+        self.rows: Dict[int, Dict] = {}
+        self.updated_hwm: Optional[str] = None
+        self.deleted_hwm: Optional[str] = None
+        self.lock = threading.Lock()
+
+_sync_states_lock = threading.Lock()
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse an ISO timestamp; naive values are UTC like Postgres' default timezone"""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _since(hwm: str) -> str:
+    """High-water mark minus the overlap window; re-reading a few rows is harmless, missing one is not"""
+    return (_parse_timestamp(hwm) - timedelta(seconds=settings.GUEST_SYNC_OVERLAP_SECONDS)).isoformat()
+
+def _sync_scope(account_id: int = None, role: str = None) -> Tuple[str, Optional[int]]:
+    if role == "Quản lý":
+        return "manager", account_id
+    if role == "Marketing":
+        return "marketer", account_id
+    return "all", None
+
+def guest_change_topics(account_id: int = None, role: str = None, house_ids=()) -> List[tuple]:
+    """Change-feed topics for a role's guest page (see library/change_feed.event_topics)"""
+    topics = [("House",), ("Account",)]
+    if role == "Quản lý":
+        topics += [("Guest", "house_id", house_id) for house_id in house_ids]
+        topics.append(("Guest", "unscoped"))
+    elif role == "Marketing":
+        topics += [("Guest", "marketer_id", account_id), ("Guest", "unscoped")]
+    else:
+        topics.append(("Guest",))
+    return topics
+
+def _fetch_in_batches(build_query) -> List[Dict]:
+    """Run build_query() repeatedly with an id keyset until a short batch comes back"""
+    rows, last_id = [], None
+    while True:
+        query = build_query()
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        batch = query.order('id').limit(SYNC_BATCH_SIZE).execute().data or []
+        rows.extend(batch)
+        if len(batch) < SYNC_BATCH_SIZE:
+            return rows
+        last_id = batch[-1]['id']
+
+def _full_sync(state: _GuestSyncState, account_id: int, role: str) -> None:
+    # Both marks start at the load's start time, so changes and deletes racing the load are
+    # picked up next time, and an empty scope is not loaded in full again on every read
+    started = datetime.now(timezone.utc).isoformat()
+    rows = _fetch_in_batches(lambda: _scoped_guest_query(GUEST_SYNC_SELECT, account_id, role))
+    state.rows = {row['id']: row for row in rows}
+    state.updated_hwm = state.deleted_hwm = started
+
+def _delta_sync(state: _GuestSyncState, account_id: int, role: str) -> None:
+    since = _since(state.updated_hwm)
+    started = datetime.now(timezone.utc).isoformat()
+    changed = _fetch_in_batches(lambda: _scoped_guest_query(GUEST_SYNC_SELECT, account_id, role)
+                                .gte('updated_at', since))
+    state.rows.update((row['id'], row) for row in changed)
+    if _sync_scope(account_id, role)[0] != "all":
+        # A guest moved to another house or marketer is not in the scoped result but must
+        # leave this set: ids (no embeds) of every changed row tell which ones left
+        in_scope = {row['id'] for row in changed}
+        moved = _fetch_in_batches(lambda: supabase.table('Guest').select('id').gte('updated_at', since))
+        for row in moved:
+            if row['id'] not in in_scope:
+                state.rows.pop(row['id'], None)
+    state.updated_hwm = started
+
+    query = supabase.table('GuestTombstone').select('guest_id').gte('deleted_at', _since(state.deleted_hwm))
+    for tombstone in query.execute().data or []:
+        state.rows.pop(tombstone['guest_id'], None)
+    state.deleted_hwm = started
+
+def _synced_guests(account_id: int = None, role: str = None) -> List[Dict]:
+    """Bring the role's synced guest set up to date and return its rows"""
+    scope = _sync_scope(account_id, role)
+    cache = get_cache(GUEST_SYNC_NAMESPACE, settings.GUEST_SYNC_TTL_SECONDS)
+    with _sync_states_lock:
+        state = cache.get(scope)
+        if state is None:
+            state = _GuestSyncState()
+            cache.set(scope, state)
+
+    with state.lock:
+        if state.updated_hwm is None:
+            _full_sync(state, account_id, role)
+        else:
+            _delta_sync(state, account_id, role)
+        return list(state.rows.values())
+
+def _sort_value(sort_by: str, value):
+    return _parse_timestamp(value) if sort_by in ('created_at', 'view_date') else value
+
+def _page_synced(rows: List[Dict], filters: Dict, sort_by: str, descending: bool,
+                 cursor: Optional[str], page_size: int, count: Optional[str]) -> Dict:
+    """get_guests_page over the in-memory synced set, with the same filters, order and cursors"""
+    for column in ('status', 'house_id', 'marketer_id'):
+        if filters.get(column):
+            allowed = set(filters[column])
+            rows = [row for row in rows if row.get(column) in allowed]
+    if filters.get('created_from'):
+        created_from = _parse_timestamp(filters['created_from'])
+        rows = [row for row in rows if _parse_timestamp(row['created_at']) >= created_from]
+    if filters.get('created_to'):
+        created_to = _parse_timestamp(filters['created_to'])
+        rows = [row for row in rows if _parse_timestamp(row['created_at']) <= created_to]
+    total = len(rows) if count and cursor is None else None
+
+    # ORDER BY sort_by NULLS LAST, id
+    present = sorted((row for row in rows if row.get(sort_by) is not None),
+                     key=lambda row: (_sort_value(sort_by, row[sort_by]), row['id']), reverse=descending)
+    missing = sorted((row for row in rows if row.get(sort_by) is None),
+                     key=lambda row: row['id'], reverse=descending)
+    ordered = present + missing
+
+    if cursor:
+        value, last_id = _decode_cursor(cursor)
+        if value is None:
+            after = lambda row: row.get(sort_by) is None and (row['id'] < last_id if descending else row['id'] > last_id)
+        else:
+            position = (_sort_value(sort_by, value), last_id)
+            def after(row):
+                if row.get(sort_by) is None:
+                    return True
+                key = (_sort_value(sort_by, row[sort_by]), row['id'])
+                return key < position if descending else key > position
+        ordered = [row for row in ordered if after(row)]
+
+    next_cursor = _encode_cursor(ordered[page_size - 1], sort_by) if len(ordered) > page_size else None
+    return {'rows': ordered[:page_size], 'next_cursor': next_cursor, 'total': total}
+
+@instrumented
+@resilient_read
+def get_guests_page(account_id: int = None, role: str = None, filters: Dict = None,
+                    sort_by: str = "created_at", descending: bool = True, cursor: str = None,
+                    page_size: int = 50, count: Optional[str] = "exact") -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Get one page of guests with full details using keyset (cursor) pagination.
+    Returns {'rows', 'next_cursor', 'total'}; total is only counted for the first page
+    (cursor=None) since later pages carry the keyset condition. count may be
+    "exact", "planned" or "estimated" (PostgREST semantics) or None to skip counting.
+    """
+    try:
+        if sort_by not in GUEST_SORT_COLUMNS:
+            return None, f"Không thể sắp xếp theo cột {sort_by}"
+        if settings.GUEST_SYNC:
+            rows = _synced_guests(account_id, role)
+            return _page_synced(rows, filters or {}, sort_by, descending, cursor, page_size, count), None
+
+        query = _scoped_guest_query(GUEST_DETAILS_SELECT, account_id, role,
+                                    count=count if cursor is None else None)
+        query = _apply_guest_filters(query, filters or {})
+        if cursor:
+            query = query.or_(_keyset_condition(sort_by, descending, cursor))
+        if sort_by != 'id':
+            query = query.order(sort_by, desc=descending, nullsfirst=False)
+        query = query.order('id', desc=descending).limit(page_size + 1)
+
+        response = query.execute()
+        rows = response.data or []
+        next_cursor = _encode_cursor(rows[page_size - 1], sort_by) if len(rows) > page_size else None
+        return {'rows': rows[:page_size], 'next_cursor': next_cursor, 'total': response.count}, None
+    except Exception as e:
+        return None, str(e)
+
+@instrumented
 def create_guest(marketer_id: int, house_id: int, guest_name: str, guest_phone_number: str, 
                 view_date: str = None, status: str = "Mới") -> Tuple[Optional[Dict], Optional[str]]:
     """Create a new guest"""
@@ -57,11 +307,56 @@ def create_guest(marketer_id: int, house_id: int, guest_name: str, guest_phone_n
             
         response = supabase.table('Guest').insert(guest_data).execute()
         if response.data:
+            publish_writes('Guest', 'INSERT', response.data)
             return response.data[0], "Thêm khách thành công"
         return None, "Không thể thêm khách"
     except Exception as e:
         return None, str(e)
 
+@instrumented
+def create_guests_bulk(guests: List[Dict], chunk_size: int = 1000) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Insert many guests with one multi-row request per chunk.
+    All dicts must have the same keys. A failing chunk is split in half and each
+    half retried, so a few bad rows cost O(log chunk_size) requests each rather
+    than one per row. Returns (inserted count, [(row position, error)])
+    """
+    inserted, errors = 0, []
+    pending = deque((start, guests[start:start + chunk_size]) for start in range(0, len(guests), chunk_size))
+    while pending:
+        start, chunk = pending.popleft()
+        try:
+            supabase.table('Guest').insert(chunk, returning=ReturnMethod.minimal).execute()
+            publish_inserted('Guest', chunk)
+            inserted += len(chunk)
+        except Exception as e:
+            if len(chunk) == 1:
+                errors.append((start, str(e)))
+                continue
+            middle = len(chunk) // 2
+            # Halves go back to the front in order, so errors stay sorted by position
+            pending.extendleft([(start + middle, chunk[middle:]), (start, chunk[:middle])])
+    return inserted, errors
+
+def _update_scoped(guest_ids: List[int], updates: Dict, role: str = None, account_id: int = None) -> List[Dict]:
+    """
+    Update the guests among guest_ids that the account may edit, the same way for single
+    and bulk edits: managers only touch guests of their houses and only move them between
+    those houses (checked in the database by manager_update_guests, see
+    sql/guest_scoped_writes.sql), marketers only their own guests. Returns the updated rows
+    """
+    if role == "Quản lý" and account_id is not None:
+        return supabase.rpc('manager_update_guests', {
+            'manager_id': account_id,
+            'guest_ids': list(guest_ids),
+            'updates': updates
+        }).execute().data or []
+    query = supabase.table('Guest').update(updates).in_('id', list(guest_ids))
+    if role == "Marketing" and account_id is not None:
+        query = query.eq('marketer_id', account_id)
+    return query.execute().data or []
+
+@instrumented
 def update_guest(guest_id: int, updates: Dict, role: str = None, account_id: int = None) -> Tuple[Optional[Dict], Optional[str]]:
     """Update guest with role-based restrictions"""
     try:
@@ -78,31 +373,86 @@ def update_guest(guest_id: int, updates: Dict, role: str = None, account_id: int
                 # This shouldn't happen with our new implementation, but keeping as fallback
                 updates['view_date'] = str(view_date_value)
         
-        response = supabase.table('Guest').update(updates).eq('id', guest_id).execute()
-        if response.data:
-            return response.data[0], "Cập nhật thành công"
+        rows = _update_scoped([guest_id], updates, role, account_id)
+        if rows:
+            publish_writes('Guest', 'UPDATE', rows)
+            return rows[0], "Cập nhật thành công"
+        return None, "Không thể cập nhật"
+    except APIError as e:
+        return None, e.message
+    except Exception as e:
+        return None, str(e)
+
+def _delete_scoped(guest_ids: List[int], role: str = None, account_id: int = None) -> List[Dict]:
+    """Delete the guests among guest_ids that the account may delete (scoped like _update_scoped)"""
+    if role == "Quản lý" and account_id is not None:
+        return supabase.rpc('manager_delete_guests', {
+            'manager_id': account_id,
+            'guest_ids': list(guest_ids)
+        }).execute().data or []
+    query = supabase.table('Guest').delete().in_('id', list(guest_ids))
+    if role == "Marketing" and account_id is not None:
+        query = query.eq('marketer_id', account_id)
+    return query.execute().data or []
+
+@instrumented
+def delete_guest(guest_id: int, role: str = None, account_id: int = None) -> Tuple[bool, str]:
+    """Delete a guest, within the role's scope (managers: guests of their houses)"""
+    try:
+        rows = _delete_scoped([guest_id], role, account_id)
+        if rows:
+            publish_writes('Guest', 'DELETE', rows)
+            return True, "Xóa khách thành công"
+        return False, "Không thể xóa khách"
+    except Exception as e:
+        return False, str(e)
+
+@instrumented
+def update_guests(guest_ids: List[int], updates: Dict, role: str = None,
+                  account_id: int = None) -> Tuple[Optional[List[Dict]], Optional[str]]:
+    """Apply the same update to many guests in one request, with the same role restrictions as update_guest"""
+    try:
+        if role in ["Marketing", "Quản lý"]:
+            updates = {k: v for k, v in updates.items() if k != 'marketer_id'}
+        if not guest_ids or not updates:
+            return None, "Không có thay đổi nào để lưu"
+
+        rows = _update_scoped(guest_ids, updates, role, account_id)
+        if rows:
+            publish_writes('Guest', 'UPDATE', rows)
+            return rows, f"Cập nhật {len(rows)} khách thành công"
         return None, "Không thể cập nhật"
+    except APIError as e:
+        return None, e.message
     except Exception as e:
         return None, str(e)
 
-def delete_guest(guest_id: int) -> Tuple[bool, str]:
-    """Delete a guest (admin only)"""
+@instrumented
+def delete_guests(guest_ids: List[int], role: str = None, account_id: int = None) -> Tuple[bool, str]:
+    """Delete many guests in one request, with the same role scope as delete_guest"""
     try:
-        response = supabase.table('Guest').delete().eq('id', guest_id).execute()
-        return True, "Xóa khách thành công"
+        rows = _delete_scoped(guest_ids, role, account_id)
+        if rows:
+            publish_writes('Guest', 'DELETE', rows)
+            return True, f"Xóa {len(rows)} khách thành công"
+        return False, "Không thể xóa khách"
     except Exception as e:
         return False, str(e)
 
+@instrumented
+@cached(REFERENCE_NAMESPACE, should_cache=fresh_result)
+@resilient_read
 def get_marketers_name_map() -> Tuple[Optional[Dict], Optional[str]]:
     """Get mapping of marketer IDs to names (Marketing role only)"""
     try:
         response = supabase.table('Account').select('id, full_name').eq('role', 'Marketing').execute()
-        if response.data:
-            return {account['id']: account['full_name'] for account in response.data}, None
-        return {}, None
+        return LabelIndex({account['id']: account['full_name'] for account in response.data or []}, key='marketer_id'), None
     except Exception as e:
         return None, str(e)
 
+@instrumented
+@cached(REFERENCE_NAMESPACE, should_cache=fresh_result)
+@resilient_read
 def get_houses_name_map(manager_id: int = None) -> Tuple[Optional[Dict], Optional[str]]:
     """Get mapping of house IDs to addresses, optionally filtered by manager"""
     try:
@@ -111,12 +461,13 @@ def get_houses_name_map(manager_id: int = None) -> Tuple[Optional[Dict], Optiona
             query = query.eq('manager_id', manager_id)
         
         response = query.execute()
-        if response.data:
-            return {house['id']: house['address'] for house in response.data}, None
-        return {}, None
+        return LabelIndex({house['id']: house['address'] for house in response.data or []}, key='house_id'), None
     except Exception as e:
         return None, str(e)
 
+@instrumented
+@cached(REFERENCE_NAMESPACE, should_cache=fresh_result)
+@resilient_read
 def get_houses_with_managers_map(manager_id: int = None) -> Tuple[Optional[Dict], Optional[str]]:
     """Get mapping of house IDs to addresses and manager info, optionally filtered by manager"""
     try:
@@ -141,82 +492,51 @@ def get_guest_status_options() -> List[str]:
     """Get available guest status options"""
     return ["Chốt", "Gần xem", "Không xem", "Đang chăm sóc", "Không chốt"]
 
+def rollup_day(value: Optional[str]) -> Optional[str]:
+    """
+    Day of GuestDailyRollup covering a date-range bound ("2024-05-01" or
+    "2024-05-01T23:59:59"): its date part, read as a Vietnam calendar day
+    """
+    return value[:10] if value else None
+
+def _guest_status_counts(group_by: str, start_date: str = None, end_date: str = None) -> List[Dict]:
+    """Per-(manager|marketer) status counts over whole days, summed from the daily rollup (guest_rollup_counts())"""
+    response = supabase.rpc('guest_rollup_counts', {
+        'start_day': rollup_day(start_date),
+        'end_day': rollup_day(end_date),
+        'group_by': group_by
+    }).execute()
+
+    # Pivot the (group, status, count) rows into one row per group
+    stats = {}
+    for row in response.data or []:
+        if row['group_id'] is None:
+            continue
+        if row['group_id'] not in stats:
+            stats[row['group_id']] = {
+                f'{group_by}_name': row['group_name'],
+                **{status: 0 for status in get_guest_status_options()},
+                'total': 0
+            }
+        group = stats[row['group_id']]
+        group[row['status']] = group.get(row['status'], 0) + row['guest_count']
+        group['total'] += row['guest_count']
+    return list(stats.values())
+
+@instrumented
+@resilient_read
 def get_guest_analytics_by_manager(start_date: str = None, end_date: str = None) -> Tuple[Optional[List[Dict]], Optional[str]]:
     """Get guest statistics grouped by manager and status within date range"""
     try:
-        query = supabase.table('Guest').select("""
-            status,
-            house:House!Guest_house_id_fkey(
-                manager:Account!House_manager_id_fkey(id, full_name)
-            )
-        """)
-        
-        if start_date:
-            query = query.gte('created_at', start_date)
-        if end_date:
-            query = query.lte('created_at', end_date)
-            
-        response = query.execute()
-        
-        if response.data:
-            # Group by manager and status
-            stats = {}
-            for guest in response.data:
-                if guest['house'] and guest['house']['manager']:
-                    manager_id = guest['house']['manager']['id']
-                    manager_name = guest['house']['manager']['full_name']
-                    status = guest['status']
-                    
-                    if manager_id not in stats:
-                        stats[manager_id] = {
-                            'manager_name': manager_name,
-                            'Chốt': 0, 'Gần xem': 0, 'Không xem': 0, 'Đang chăm sóc': 0, 'Không chốt': 0,
-                            'total': 0
-                        }
-                    
-                    stats[manager_id][status] = stats[manager_id].get(status, 0) + 1
-                    stats[manager_id]['total'] += 1
-            
-            return list(stats.values()), None
-        return [], None
+        return _guest_status_counts('manager', start_date, end_date), None
     except Exception as e:
         return None, str(e)
 
+@instrumented
+@resilient_read
 def get_guest_analytics_by_marketer(start_date: str = None, end_date: str = None) -> Tuple[Optional[List[Dict]], Optional[str]]:
     """Get guest statistics grouped by marketer and status within date range"""
     try:
-        query = supabase.table('Guest').select("""
-            status,
-            marketer:Account!Guest_marketer_id_fkey(id, full_name)
-        """)
-        
-        if start_date:
-            query = query.gte('created_at', start_date)
-        if end_date:
-            query = query.lte('created_at', end_date)
-            
-        response = query.execute()
-        
-        if response.data:
-            # Group by marketer and status
-            stats = {}
-            for guest in response.data:
-                if guest['marketer']:
-                    marketer_id = guest['marketer']['id']
-                    marketer_name = guest['marketer']['full_name']
-                    status = guest['status']
-                    
-                    if marketer_id not in stats:
-                        stats[marketer_id] = {
-                            'marketer_name': marketer_name,
-                            'Chốt': 0, 'Gần xem': 0, 'Không xem': 0, 'Đang chăm sóc': 0, 'Không chốt': 0,
-                            'total': 0
-                        }
-                    
-                    stats[marketer_id][status] = stats[marketer_id].get(status, 0) + 1
-                    stats[marketer_id]['total'] += 1
-            
-            return list(stats.values()), None
-        return [], None
+        return _guest_status_counts('marketer', start_date, end_date), None
     except Exception as e:
         return None, str(e)
@@ -1,14 +1,20 @@
 from library.supabase import supabase
+from library.metrics import instrumented
+from library.cache import invalidate_reference_data
+from service.projections import HouseRow, Projection, HOUSE_TABLE
+from typing import List, Optional, Tuple
 
-def get_all_houses():
+@instrumented
+def get_all_houses(projection: Projection = HOUSE_TABLE) -> Tuple[Optional[List[HouseRow]], str]:
     try:
-        response = supabase.table("House").select("*").execute()
+        response = supabase.table(projection.table).select(projection.select).execute()
         if response.data:
             return response.data, "Danh sách nhà đã được lấy thành công"
         return None, "Không có nhà nào"
     except Exception as e:
         return None, f"Lỗi khi lấy dữ liệu: {str(e)}"
 
+@instrumented
 def create_house(manager_id: int, address: str):
     try:
         data = {
@@ -17,31 +23,37 @@ def create_house(manager_id: int, address: str):
         }
         response = supabase.table("House").insert(data).execute()
         if response.data:
+            invalidate_reference_data()
             return response.data[0], "Tạo nhà thành công"
         return None, "Lỗi khi tạo nhà"
     except Exception as e:
         return None, f"Lỗi khi tạo nhà: {str(e)}"
 
+@instrumented
 def update_house(house_id: int, data: dict):
     try:
         response = supabase.table("House").update(data).eq("id", house_id).execute()
         if response.data:
+            invalidate_reference_data()
             return response.data[0], "Cập nhật nhà thành công"
         return None, "Lỗi khi cập nhật nhà"
     except Exception as e:
         return None, f"Lỗi khi cập nhật nhà: {str(e)}"
 
+@instrumented
 def delete_house(house_id: int):
     try:
         response = supabase.table("House").delete().eq("id", house_id).execute()
         if response.data:
+            invalidate_reference_data()
             return True, "Xóa nhà thành công"
         return False, "Lỗi khi xóa nhà"
     except Exception as e:
         return False, f"Lỗi khi xóa nhà: {str(e)}"
 
-def get_house_by_id(house_id: int):
-    response = supabase.table("House").select("*").eq("id", house_id).execute()
+@instrumented
+def get_house_by_id(house_id: int, projection: Projection = HOUSE_TABLE) -> Optional[HouseRow]:
+    response = supabase.table(projection.table).select(projection.select).eq("id", house_id).execute()
     if response.data:
         return response.data[0]
     return None
\ No newline at end of file
@@ -0,0 +1,142 @@
+from library.metrics import instrumented
+from service.guest_service import create_guests_bulk
+from service.account_service import get_account_role_options
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+
+# Importable guest fields: field -> (label shown for column mapping, required)
+IMPORT_FIELDS = {
+    'guest_name': ('Tên khách', True),
+    'guest_phone_number': ('Số điện thoại', True),
+    'house_address': ('Địa chỉ nhà', True),
+    'marketer_name': ('Nhân viên marketing', True),
+    'status': ('Trạng thái', False),
+    'view_date': ('Ngày và giờ xem', False),
+}
+
+DEFAULT_IMPORT_STATUS = "Mới"
+
+@instrumented
+def read_spreadsheet(uploaded_file) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """Read an uploaded CSV or Excel file as text columns (keeps leading zeros of phone numbers)"""
+    try:
+        name = uploaded_file.name.lower()
+        if name.endswith(('.xlsx', '.xls')):
+            df = pd.read_excel(uploaded_file, dtype=str)
+        else:
+            df = pd.read_csv(uploaded_file, dtype=str, sep=None, engine='python', encoding='utf-8-sig')
+        df.columns = [str(col).strip() for col in df.columns]
+        return df.dropna(how='all').reset_index(drop=True), None
+    except ImportError:
+        return None, "Cần cài đặt openpyxl để đọc tệp Excel"
+    except Exception as e:
+        return None, f"Không thể đọc tệp: {str(e)}"
+
+def guess_column_mapping(columns: List[str], fields: Dict = IMPORT_FIELDS) -> Dict[str, Optional[str]]:
+    """Match file columns to import fields by field name or Vietnamese label (case-insensitive)"""
+    normalized = {col.strip().lower(): col for col in columns}
+    return {
+        field: normalized.get(field) or normalized.get(label.lower())
+        for field, (label, _) in fields.items()
+    }
+
+def normalize_phone_numbers(phones: pd.Series) -> pd.Series:
+    """Strip separators, turn +84 into 0 and restore a leading 0 dropped by spreadsheets"""
+    digits = phones.fillna('').str.replace(r'\D', '', regex=True)
+    digits = digits.str.replace(r'^84(?=\d{9,10}$)', '0', regex=True)
+    return digits.mask(digits.str.len().eq(9) & ~digits.str.startswith('0'), '0' + digits)
+
+@instrumented
+def validate_guest_import(df: pd.DataFrame, mapping: Dict[str, Optional[str]], houses_name_map: Dict,
+                          status_options: List[str], marketers_name_map: Dict = None,
+                          marketer_id: int = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Validate and convert an uploaded sheet with vectorized checks.
+    mapping: import field -> file column (None if not mapped)
+    marketer_id: fixed marketer for every row (marketing role); otherwise the
+                 marketer column is resolved through marketers_name_map
+    Returns (rows ready for create_guests_bulk indexed by source row, errors with 'Dòng'/'Lỗi')
+    """
+    def column(field):
+        source = mapping.get(field)
+        if source is None or source not in df.columns:
+            return pd.Series('', index=df.index)
+        return df[source].fillna('').astype(str).str.strip()
+
+    rows = pd.DataFrame(index=df.index)
+    problems = []
+
+    def check(mask, message):
+        problems.append(pd.DataFrame({'row': df.index[mask], 'error': message}))
+
+    rows['guest_name'] = column('guest_name')
+    check(rows['guest_name'].eq(''), "Thiếu tên khách")
+
+    rows['guest_phone_number'] = normalize_phone_numbers(column('guest_phone_number'))
+    check(~rows['guest_phone_number'].str.fullmatch(r'0\d{9,10}'), "Số điện thoại không hợp lệ")
+
+    addresses = column('house_address')
+    house_ids = {address: house_id for house_id, address in houses_name_map.items()}
+    rows['house_id'] = addresses.map(house_ids)
+    check(rows['house_id'].isna(), "Không tìm thấy nhà theo địa chỉ")
+
+    if marketer_id is not None:
+        rows['marketer_id'] = marketer_id
+    else:
+        marketer_ids = {name: account_id for account_id, name in (marketers_name_map or {}).items()}
+        rows['marketer_id'] = column('marketer_name').map(marketer_ids)
+        check(rows['marketer_id'].isna(), "Không tìm thấy nhân viên marketing")
+
+    statuses = column('status')
+    rows['status'] = statuses.mask(statuses.eq(''), DEFAULT_IMPORT_STATUS)
+    check(~rows['status'].isin(status_options + [DEFAULT_IMPORT_STATUS]), "Trạng thái không hợp lệ")
+
+    view_dates = column('view_date')
+    parsed = pd.to_datetime(view_dates.mask(view_dates.eq('')), errors='coerce', dayfirst=True, format='mixed')
+    check(view_dates.ne('') & parsed.isna(), "Ngày xem không hợp lệ")
+    rows['view_date'] = parsed.dt.strftime('%Y-%m-%dT%H:%M:%S').astype(object).where(parsed.notna(), None)
+
+    errors = pd.concat(problems, ignore_index=True) if problems else pd.DataFrame(columns=['row', 'error'])
+    errors = errors.sort_values('row', kind='stable')
+    valid = rows.drop(index=errors['row'].unique())
+    valid = valid.astype({'house_id': int, 'marketer_id': int})
+    # Spreadsheet row numbers: 1-based plus the header row
+    errors = pd.DataFrame({'Dòng': errors['row'] + 2, 'Lỗi': errors['error']}).reset_index(drop=True)
+    return valid, errors
+
+@instrumented
+def import_guests(valid: pd.DataFrame, chunk_size: int = 1000) -> Tuple[int, pd.DataFrame]:
+    """Insert validated rows in chunks; returns (inserted count, per-row insert errors)"""
+    records = valid.astype(object).where(valid.notna(), None).to_dict('records')
+    inserted, failures = create_guests_bulk(records, chunk_size=chunk_size)
+    errors = pd.DataFrame(
+        [{'Dòng': int(valid.index[position]) + 2, 'Lỗi': message} for position, message in failures],
+        columns=['Dòng', 'Lỗi']
+    )
+    return inserted, errors
+
+ACCOUNT_IMPORT_FIELDS = {
+    'full_name': ('Họ và tên', True),
+    'phone_number': ('Số điện thoại', True),
+    'role': ('Vai trò', True),
+}
+
+@instrumented
+def validate_account_import(df: pd.DataFrame) -> Tuple[List[Dict], pd.DataFrame]:
+    """Validate an account sheet (columns guessed from ACCOUNT_IMPORT_FIELDS) for upsert_accounts"""
+    mapping = guess_column_mapping(list(df.columns), ACCOUNT_IMPORT_FIELDS)
+    missing = [label for field, (label, _) in ACCOUNT_IMPORT_FIELDS.items() if mapping[field] is None]
+    if missing:
+        return [], pd.DataFrame({'Dòng': [1], 'Lỗi': [f"Thiếu cột: {', '.join(missing)}"]})
+
+    rows = pd.DataFrame({field: df[source].fillna('').astype(str).str.strip() for field, source in mapping.items()})
+    rows['phone_number'] = normalize_phone_numbers(rows['phone_number'])
+    checks = [
+        (rows['full_name'].eq(''), "Thiếu họ và tên"),
+        (~rows['phone_number'].str.fullmatch(r'0\d{9,10}'), "Số điện thoại không hợp lệ"),
+        (~rows['role'].isin(get_account_role_options()), "Vai trò không hợp lệ"),
+    ]
+    errors = pd.concat([pd.DataFrame({'Dòng': df.index[mask] + 2, 'Lỗi': message}) for mask, message in checks],
+                       ignore_index=True).sort_values('Dòng', kind='stable')
+    valid = rows.drop(index=errors['Dòng'].unique() - 2)
+    return valid.to_dict('records'), errors.reset_index(drop=True)
@@ -0,0 +1,39 @@
+"""
+Column projections for the views that read Account and House rows.
+
+Each view declares the columns it renders or needs for its callbacks, so the
+services never fetch select("*") payloads that the page throws away.
+Timestamps arrive as ISO 8601 strings, as PostgREST sends them.
+"""
+from typing import NamedTuple, Tuple, TypedDict
+
+class AccountRow(TypedDict, total=False):
+    id: int
+    created_at: str
+    full_name: str
+    phone_number: str
+    role: str
+
+class HouseRow(TypedDict, total=False):
+    id: int
+    created_at: str
+    manager_id: int
+    address: str
+
+class Projection(NamedTuple):
+    """Columns of ``table`` fetched for one view"""
+    table: str
+    columns: Tuple[str, ...]
+
+    @property
+    def select(self) -> str:
+        return ", ".join(self.columns)
+
+# Stored in local storage at login and read back on every rerun: who is logged
+# in and what they may see (the phone number was just typed in)
+ACCOUNT_SESSION = Projection("Account", ("id", "full_name", "role"))
+# Admin accounts table: id stays hidden but drives edit/delete
+ACCOUNT_TABLE = Projection("Account", ("id", "full_name", "phone_number", "role"))
+
+# Admin houses table and single-house reads: manager_id is resolved to a name client side
+HOUSE_TABLE = Projection("House", ("id", "address", "manager_id"))
@@ -0,0 +1,10 @@
+-- Guest analytics aggregated in the database so only the small
+-- results cross the wire. Called through supabase.rpc().
+
+CREATE INDEX IF NOT EXISTS "Guest_created_at_idx" ON "Guest" (created_at);
+
+-- Status counts per manager/marketer now come from the daily rollup
+-- (guest_rollup_counts in guest_rollup.sql); drop the old full-scan versions
+DROP FUNCTION IF EXISTS guest_status_counts(text, timestamptz, timestamptz);
+DROP FUNCTION IF EXISTS guest_status_matrix(timestamptz, timestamptz);
+-- dashboard_kpis() moved to guest_rollup.sql, which it now reads
@@ -0,0 +1,7 @@
+-- Indexes backing role-scoped guest queries. Managers are scoped with
+-- House!inner + house.manager_id=eq.<id> in a single request, which joins
+-- Guest.house_id -> House and filters on House.manager_id.
+
+CREATE INDEX IF NOT EXISTS "House_manager_id_idx" ON "House" (manager_id);
+CREATE INDEX IF NOT EXISTS "Guest_house_id_idx" ON "Guest" (house_id);
+CREATE INDEX IF NOT EXISTS "Guest_marketer_id_idx" ON "Guest" (marketer_id);
@@ -0,0 +1,195 @@
+-- Daily guest counts per manager and per marketer and status, kept up to
+-- date by triggers on "Guest" and "House" so date-range analytics sum
+-- O(days x groups) rollup rows instead of scanning "Guest".
+-- Every guest is counted once under dimension 'manager' (its house's
+-- manager) and once under 'marketer'; group_id is NULL when there is none.
+-- day is the guest's created_at date in Vietnam time. Run after
+-- guest_analytics.sql; the last statement backfills existing guests.
+
+CREATE TABLE IF NOT EXISTS "GuestDailyRollup" (
+    day date NOT NULL,
+    dimension text NOT NULL,
+    group_id bigint,
+    status text,
+    guest_count bigint NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS "GuestDailyRollup_key"
+    ON "GuestDailyRollup" (day, dimension, group_id, status) NULLS NOT DISTINCT;
+-- One manager's / marketer's days (guest_rollup_daily) and whole-dimension
+-- sums (dashboard_kpis), answered from the index alone
+DROP INDEX IF EXISTS "GuestDailyRollup_group_idx";
+CREATE INDEX IF NOT EXISTS "GuestDailyRollup_group_sum_idx"
+    ON "GuestDailyRollup" (dimension, group_id, day) INCLUDE (status, guest_count);
+
+CREATE OR REPLACE FUNCTION guest_rollup_add(guest "Guest", delta bigint)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO "GuestDailyRollup" AS r (day, dimension, group_id, status, guest_count)
+    SELECT (guest.created_at AT TIME ZONE 'Asia/Ho_Chi_Minh')::date, d.dimension, d.group_id, guest.status, delta
+    FROM (VALUES
+        ('manager', (SELECT h.manager_id FROM "House" h WHERE h.id = guest.house_id)),
+        ('marketer', guest.marketer_id)
+    ) AS d (dimension, group_id)
+    ON CONFLICT (day, dimension, group_id, status)
+    DO UPDATE SET guest_count = r.guest_count + EXCLUDED.guest_count;
+$$;
+
+-- Rows that drop to zero are kept (the read function skips them) and
+-- cleared by the next rebuild_guest_rollup()
+CREATE OR REPLACE FUNCTION guest_rollup_apply()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM guest_rollup_add(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM guest_rollup_add(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER guest_rollup_apply
+AFTER INSERT OR DELETE OR UPDATE OF created_at, marketer_id, house_id, status ON "Guest"
+FOR EACH ROW EXECUTE FUNCTION guest_rollup_apply();
+
+-- Guests stay counted under their house's current manager, like the raw scan:
+-- move the house's guests from the old manager to the new one
+CREATE OR REPLACE FUNCTION guest_rollup_move_house()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO "GuestDailyRollup" AS r (day, dimension, group_id, status, guest_count)
+    SELECT (g.created_at AT TIME ZONE 'Asia/Ho_Chi_Minh')::date, 'manager', m.manager_id, g.status,
+           m.sign * count(*)
+    FROM "Guest" g
+    CROSS JOIN (VALUES (OLD.manager_id, -1), (NEW.manager_id, 1)) AS m (manager_id, sign)
+    WHERE g.house_id = NEW.id
+    GROUP BY 1, 3, 4, m.sign
+    ON CONFLICT (day, dimension, group_id, status)
+    DO UPDATE SET guest_count = r.guest_count + EXCLUDED.guest_count;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER guest_rollup_move_house
+AFTER UPDATE OF manager_id ON "House"
+FOR EACH ROW WHEN (OLD.manager_id IS DISTINCT FROM NEW.manager_id)
+EXECUTE FUNCTION guest_rollup_move_house();
+
+-- Recount everything from "Guest" (after bulk loads that bypassed the
+-- triggers, or to drop zero rows). Returns the number of rollup rows.
+CREATE OR REPLACE FUNCTION rebuild_guest_rollup()
+RETURNS bigint
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    rebuilt bigint;
+BEGIN
+    -- Writers wait until the recount is committed, so no change is counted twice or lost
+    LOCK TABLE "Guest" IN SHARE MODE;
+    DELETE FROM "GuestDailyRollup";
+    INSERT INTO "GuestDailyRollup" (day, dimension, group_id, status, guest_count)
+    SELECT (g.created_at AT TIME ZONE 'Asia/Ho_Chi_Minh')::date, 'manager', h.manager_id, g.status, count(*)
+    FROM "Guest" g
+    LEFT JOIN "House" h ON h.id = g.house_id
+    GROUP BY 1, 3, 4
+    UNION ALL
+    SELECT (g.created_at AT TIME ZONE 'Asia/Ho_Chi_Minh')::date, 'marketer', g.marketer_id, g.status, count(*)
+    FROM "Guest" g
+    GROUP BY 1, 3, 4;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$;
+
+-- Status counts per manager and/or marketer (group_by NULL for both) over
+-- whole days start_day..end_day (inclusive, Vietnam time). group_id and
+-- group_name are NULL for guests without a manager/marketer.
+CREATE OR REPLACE FUNCTION guest_rollup_counts(
+    start_day date DEFAULT NULL,
+    end_day date DEFAULT NULL,
+    group_by text DEFAULT NULL
+)
+RETURNS TABLE (dimension text, group_id bigint, group_name text, status text, guest_count bigint)
+LANGUAGE sql STABLE
+AS $$
+    -- Sum first, then look up the few resulting group names
+    SELECT r.dimension, r.group_id, a.full_name, r.status, r.guest_count
+    FROM (
+        SELECT d.dimension, d.group_id, d.status, sum(d.guest_count)::bigint AS guest_count
+        FROM "GuestDailyRollup" d
+        WHERE (start_day IS NULL OR d.day >= start_day)
+          AND (end_day IS NULL OR d.day <= end_day)
+          AND (group_by IS NULL OR d.dimension = group_by)
+        GROUP BY d.dimension, d.group_id, d.status
+        HAVING sum(d.guest_count) > 0
+    ) r
+    LEFT JOIN "Account" a ON a.id = r.group_id
+    ORDER BY r.dimension, r.group_id;
+$$;
+
+-- New guests per day and status for trend charts: all guests (group_by NULL)
+-- or those of one manager/marketer (group_by, group_id)
+CREATE OR REPLACE FUNCTION guest_rollup_daily(
+    start_day date DEFAULT NULL,
+    end_day date DEFAULT NULL,
+    group_by text DEFAULT NULL,
+    group_id bigint DEFAULT NULL
+)
+RETURNS TABLE (day date, status text, guest_count bigint)
+LANGUAGE sql STABLE
+AS $$
+    -- Every guest is counted once per dimension; 'manager' has the fewest rows
+    SELECT d.day, d.status, sum(d.guest_count)::bigint
+    FROM "GuestDailyRollup" d
+    WHERE d.dimension = coalesce(group_by, 'manager')
+      AND (group_by IS NULL OR d.group_id = guest_rollup_daily.group_id)
+      AND (start_day IS NULL OR d.day >= start_day)
+      AND (end_day IS NULL OR d.day <= end_day)
+    GROUP BY d.day, d.status
+    HAVING sum(d.guest_count) > 0
+    ORDER BY d.day;
+$$;
+
+-- Dashboard KPIs of one role scope, summed from the rollup instead of
+-- scanning "Guest". Pass scope_manager_id for a manager's houses or
+-- scope_marketer_id for a marketer's guests; both NULL for everything
+-- (admin: the 'manager' dimension counts every guest once). week_start is
+-- a Vietnam-time midnight, so whole rollup days split the weeks exactly.
+CREATE OR REPLACE FUNCTION dashboard_kpis(
+    week_start timestamptz,
+    scope_manager_id bigint DEFAULT NULL,
+    scope_marketer_id bigint DEFAULT NULL,
+    closed_status text DEFAULT 'Chốt'
+)
+RETURNS TABLE (
+    house_count bigint, account_count bigint, guest_count bigint,
+    new_this_week bigint, new_last_week bigint, closed_count bigint
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH week AS (
+        SELECT (week_start AT TIME ZONE 'Asia/Ho_Chi_Minh')::date AS first_day
+    )
+    SELECT
+        (SELECT count(*) FROM "House" h
+         WHERE scope_manager_id IS NULL OR h.manager_id = scope_manager_id),
+        (SELECT count(*) FROM "Account"),
+        coalesce(sum(d.guest_count), 0)::bigint,
+        coalesce(sum(d.guest_count) FILTER (WHERE d.day >= w.first_day), 0)::bigint,
+        coalesce(sum(d.guest_count) FILTER (WHERE d.day >= w.first_day - 7 AND d.day < w.first_day), 0)::bigint,
+        coalesce(sum(d.guest_count) FILTER (WHERE d.status = closed_status), 0)::bigint
+    FROM week w
+    LEFT JOIN "GuestDailyRollup" d
+        ON d.dimension = CASE WHEN scope_marketer_id IS NULL THEN 'manager' ELSE 'marketer' END
+       AND (scope_manager_id IS NULL OR d.group_id = scope_manager_id)
+       AND (scope_marketer_id IS NULL OR d.group_id = scope_marketer_id)
+    GROUP BY w.first_day;
+$$;
+
+SELECT rebuild_guest_rollup();
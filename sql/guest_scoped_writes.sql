@@ -0,0 +1,51 @@
+-- Guest writes scoped to a manager's houses. PostgREST cannot filter an
+-- UPDATE/DELETE on an embedded table (house.manager_id), and a house_id IN
+-- list grows with every house the manager has, so the scope is checked here
+-- in the same statement as the write.
+
+-- Apply ``updates`` to the guests among guest_ids that are in manager_id's
+-- houses; other ids are left alone. Moving guests (house_id) is only allowed
+-- to a house of the same manager. Returns the updated rows.
+CREATE OR REPLACE FUNCTION manager_update_guests(manager_id bigint, guest_ids bigint[], updates jsonb)
+RETURNS SETOF "Guest"
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    assignments text;
+BEGIN
+    IF updates ? 'house_id' AND NOT EXISTS (
+        SELECT 1 FROM "House" h
+        WHERE h.id = (updates ->> 'house_id')::bigint AND h.manager_id = manager_update_guests.manager_id
+    ) THEN
+        RAISE EXCEPTION 'Chỉ có thể chuyển khách sang nhà bạn quản lý' USING ERRCODE = '42501';
+    END IF;
+
+    -- Only the columns present in updates, so untouched ones do not fire column triggers
+    SELECT string_agg(format('%I = r.%I', key, key), ', ')
+    INTO assignments
+    FROM jsonb_object_keys(updates) AS key
+    WHERE key IN ('house_id', 'view_date', 'guest_name', 'guest_phone_number', 'status', 'admin_note', 'manager_note');
+    IF assignments IS NULL THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY EXECUTE format(
+        'UPDATE "Guest" g SET %s
+         FROM jsonb_populate_record(NULL::"Guest", $1) r, "House" h
+         WHERE g.id = ANY ($2) AND h.id = g.house_id AND h.manager_id = $3
+         RETURNING g.*', assignments)
+    USING updates, guest_ids, manager_id;
+END;
+$$;
+
+-- Delete the guests among guest_ids that are in manager_id's houses.
+-- Returns the deleted rows.
+CREATE OR REPLACE FUNCTION manager_delete_guests(manager_id bigint, guest_ids bigint[])
+RETURNS SETOF "Guest"
+LANGUAGE sql
+AS $$
+    DELETE FROM "Guest" g
+    USING "House" h
+    WHERE g.id = ANY (guest_ids) AND h.id = g.house_id AND h.manager_id = manager_delete_guests.manager_id
+    RETURNING g.*;
+$$;
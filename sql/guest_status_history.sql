@@ -0,0 +1,140 @@
+-- Append-only log of guest status changes, written by triggers on "Guest" in
+-- the same transaction as the insert/update, so funnel and time-to-close
+-- analytics can see every status a guest went through, not only the current one.
+-- Guests that exist when this file is run get a single creation event with
+-- their current status (their earlier changes were never recorded).
+
+CREATE TABLE IF NOT EXISTS "GuestStatusEvent" (
+    id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    guest_id bigint NOT NULL,  -- no foreign key: history outlives deleted guests
+    from_status text,
+    to_status text,
+    changed_at timestamptz NOT NULL DEFAULT now(),
+    is_created boolean NOT NULL DEFAULT false  -- the guest's first event, at its created_at
+);
+CREATE INDEX IF NOT EXISTS "GuestStatusEvent_guest_idx" ON "GuestStatusEvent" (guest_id, changed_at);
+CREATE INDEX IF NOT EXISTS "GuestStatusEvent_changed_at_idx" ON "GuestStatusEvent" (changed_at);
+-- Guests reaching a status within a range (guest_time_to_close)
+CREATE INDEX IF NOT EXISTS "GuestStatusEvent_to_status_idx" ON "GuestStatusEvent" (to_status, changed_at);
+-- Guests created within a range (guest_status_funnel)
+CREATE INDEX IF NOT EXISTS "GuestStatusEvent_created_idx" ON "GuestStatusEvent" (changed_at) WHERE is_created;
+
+-- Clients only read the log; rows come from the trigger below
+REVOKE ALL ON "GuestStatusEvent" FROM anon, authenticated;
+GRANT SELECT ON "GuestStatusEvent" TO anon, authenticated;
+
+CREATE OR REPLACE FUNCTION guest_log_status()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO "GuestStatusEvent" (guest_id, from_status, to_status, changed_at, is_created)
+        VALUES (NEW.id, NULL, NEW.status, NEW.created_at, true);
+    ELSE
+        INSERT INTO "GuestStatusEvent" (guest_id, from_status, to_status)
+        VALUES (NEW.id, OLD.status, NEW.status);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER guest_log_status_insert
+AFTER INSERT ON "Guest"
+FOR EACH ROW EXECUTE FUNCTION guest_log_status();
+
+CREATE OR REPLACE TRIGGER guest_log_status_update
+AFTER UPDATE OF status ON "Guest"
+FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status)
+EXECUTE FUNCTION guest_log_status();
+
+INSERT INTO "GuestStatusEvent" (guest_id, from_status, to_status, changed_at, is_created)
+SELECT g.id, NULL, g.status, g.created_at, true
+FROM "Guest" g
+WHERE NOT EXISTS (SELECT 1 FROM "GuestStatusEvent" e WHERE e.guest_id = g.id);
+
+-- Guests created within start_day..end_day (inclusive, Vietnam time) that
+-- ever reached each of ``stages`` (in funnel order; reaching a later stage
+-- counts for the earlier ones too). The first row (stage NULL) is the
+-- number of guests created.
+CREATE OR REPLACE FUNCTION guest_status_funnel(
+    stages text[],
+    start_day date DEFAULT NULL,
+    end_day date DEFAULT NULL
+)
+RETURNS TABLE (stage text, guest_count bigint)
+LANGUAGE sql STABLE
+AS $$
+    WITH cohort AS (
+        -- Range scan of the partial index; only these guests' events are read below
+        SELECT e.guest_id
+        FROM "GuestStatusEvent" e
+        WHERE e.is_created
+          AND e.changed_at >= coalesce(start_day::timestamp AT TIME ZONE 'Asia/Ho_Chi_Minh', '-infinity')
+          AND e.changed_at < coalesce((end_day + 1)::timestamp AT TIME ZONE 'Asia/Ho_Chi_Minh', 'infinity')
+    ), furthest AS (
+        SELECT e.guest_id, max(array_position(stages, e.to_status)) AS position
+        FROM cohort c
+        JOIN "GuestStatusEvent" e ON e.guest_id = c.guest_id
+        GROUP BY e.guest_id
+    )
+    SELECT NULL::text, count(*)::bigint FROM cohort
+    UNION ALL
+    (SELECT s.stage, count(f.guest_id)::bigint
+     FROM unnest(stages) WITH ORDINALITY AS s (stage, position)
+     LEFT JOIN furthest f ON f.position >= s.position
+     GROUP BY s.stage, s.position
+     ORDER BY s.position);
+$$;
+
+-- Guests first reaching closed_status within start_day..end_day: hours from
+-- creation to close (status NULL row) and hours spent in each status on the
+-- way. Guests created already closed have no time to close and are skipped.
+CREATE OR REPLACE FUNCTION guest_time_to_close(
+    closed_status text DEFAULT 'Chốt',
+    start_day date DEFAULT NULL,
+    end_day date DEFAULT NULL
+)
+RETURNS TABLE (
+    status text, guest_count bigint,
+    avg_hours double precision, median_hours double precision, p90_hours double precision
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH closes AS (
+        -- First close per guest, then the range: one pass over the closes
+        SELECT e.guest_id, min(e.changed_at) AS closed_at
+        FROM "GuestStatusEvent" e
+        WHERE e.to_status = closed_status
+        GROUP BY e.guest_id
+        HAVING (start_day IS NULL OR min(e.changed_at) >= start_day::timestamp AT TIME ZONE 'Asia/Ho_Chi_Minh')
+           AND (end_day IS NULL OR min(e.changed_at) < (end_day + 1)::timestamp AT TIME ZONE 'Asia/Ho_Chi_Minh')
+    ), spans AS (
+        -- Each event lasts until the next one, the last one until the close
+        SELECT e.guest_id, e.to_status AS status,
+               extract(epoch FROM coalesce(lead(e.changed_at) OVER (
+                   PARTITION BY e.guest_id ORDER BY e.changed_at, e.id
+               ), c.closed_at) - e.changed_at) / 3600 AS hours
+        FROM closes c
+        JOIN "GuestStatusEvent" e ON e.guest_id = c.guest_id AND e.changed_at < c.closed_at
+    ), per_status AS (
+        SELECT s.guest_id, s.status, sum(s.hours) AS hours
+        FROM spans s
+        WHERE s.status IS NOT NULL
+        GROUP BY s.guest_id, s.status
+    ), per_guest AS (
+        SELECT s.guest_id, sum(s.hours) AS hours FROM spans s GROUP BY s.guest_id
+    )
+    SELECT NULL::text, count(*)::bigint, avg(g.hours),
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY g.hours),
+           percentile_cont(0.9) WITHIN GROUP (ORDER BY g.hours)
+    FROM per_guest g
+    UNION ALL
+    SELECT p.status, count(*)::bigint, avg(p.hours),
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY p.hours),
+           percentile_cont(0.9) WITHIN GROUP (ORDER BY p.hours)
+    FROM per_status p
+    GROUP BY p.status;
+$$;
@@ -0,0 +1,43 @@
+-- Change tracking for incremental guest sync (settings.GUEST_SYNC).
+-- Clients keep the guest set in memory and only fetch rows whose updated_at
+-- passed their high-water mark, plus GuestTombstone rows for deletes.
+
+ALTER TABLE "Guest" ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+CREATE INDEX IF NOT EXISTS "Guest_updated_at_idx" ON "Guest" (updated_at);
+
+CREATE OR REPLACE FUNCTION guest_touch_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER guest_touch_updated_at
+BEFORE UPDATE ON "Guest"
+FOR EACH ROW EXECUTE FUNCTION guest_touch_updated_at();
+
+-- One row per deleted guest. Rows older than GUEST_SYNC_TTL_SECONDS are never
+-- read again (every sync cache reloads in full by then) and can be purged.
+CREATE TABLE IF NOT EXISTS "GuestTombstone" (
+    guest_id bigint PRIMARY KEY,
+    deleted_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS "GuestTombstone_deleted_at_idx" ON "GuestTombstone" (deleted_at);
+
+CREATE OR REPLACE FUNCTION guest_record_tombstone()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO "GuestTombstone" (guest_id, deleted_at) VALUES (OLD.id, now())
+    ON CONFLICT (guest_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN OLD;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER guest_record_tombstone
+AFTER DELETE ON "Guest"
+FOR EACH ROW EXECUTE FUNCTION guest_record_tombstone();
@@ -0,0 +1,9 @@
+-- Publish row changes to Supabase Realtime for the in-app change feed
+-- (settings.CHANGE_FEED, library/change_feed.py).
+
+ALTER PUBLICATION supabase_realtime ADD TABLE "Guest", "House", "Account";
+
+-- Send old values with UPDATE/DELETE so a change only refreshes the pages of the
+-- manager/marketer who could see the row; with the default replica identity the
+-- old record only carries the id and every guest page refreshes instead.
+ALTER TABLE "Guest" REPLICA IDENTITY FULL;
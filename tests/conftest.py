@@ -0,0 +1,42 @@
+"""
+Services run against the SQLite backend (library/local_backend.py): each test
+gets a fresh in-memory database and empty process-wide caches.
+"""
+import os
+
+os.environ["DATA_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = ":memory:"
+os.environ["GUEST_SYNC"] = "false"
+
+import pytest
+
+from benchmark.seed import seed
+from library import cache
+from library.local_backend import create_local_client
+from library.resilience import breaker
+
+# Modules holding their own reference to the shared client
+CLIENT_MODULES = (
+    "library.supabase",
+    "service.account_service",
+    "service.analytics_service",
+    "service.guest_service",
+    "service.house_service",
+)
+
+@pytest.fixture
+def client(monkeypatch):
+    local = create_local_client(":memory:")
+    for module in CLIENT_MODULES:
+        monkeypatch.setattr(f"{module}.supabase", local)
+    for namespace_cache in list(cache._caches.values()):
+        namespace_cache.clear()
+    breaker.record_success()
+    yield local
+    local.connection.close()
+
+@pytest.fixture
+def seeded(client):
+    """A small seeded dataset: 30 accounts, 40 houses, 600 guests with status history"""
+    seed(client, accounts=30, houses=40, guests=600, days=60, batch_size=250)
+    return client
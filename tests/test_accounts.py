@@ -0,0 +1,67 @@
+import pandas as pd
+
+from service.account_service import create_account, upsert_accounts
+from service.import_service import validate_account_import
+
+def accounts(client):
+    return {row["phone_number"]: (row["full_name"], row["role"])
+            for row in client.table("Account").select("phone_number, full_name, role").execute().data}
+
+def count_requests(client, monkeypatch):
+    requests = []
+    table = client.table
+    monkeypatch.setattr(client, "table", lambda name: requests.append(name) or table(name))
+    return requests
+
+def test_create_account_in_one_request(client, monkeypatch):
+    requests = count_requests(client, monkeypatch)
+
+    account, message = create_account("Marketing A", "0900000001", "Marketing")
+
+    assert account["phone_number"] == "0900000001" and message == "Tạo tài khoản thành công"
+    assert requests == ["Account"]
+
+def test_duplicate_phone_is_rejected(client):
+    create_account("Marketing A", "0900000001", "Marketing")
+
+    account, message = create_account("Marketing B", "0900000001", "Quản lý")
+
+    assert account is None
+    assert message == "Số điện thoại đã được sử dụng"
+    assert accounts(client) == {"0900000001": ("Marketing A", "Marketing")}
+
+def test_upsert_creates_and_updates_by_phone(client, monkeypatch):
+    create_account("Marketing A", "0900000001", "Marketing")
+    requests = count_requests(client, monkeypatch)
+
+    saved, message = upsert_accounts([
+        {"full_name": "Marketing A mới", "phone_number": "0900000001", "role": "Quản lý"},
+        {"full_name": "Marketing B", "phone_number": "0900000002", "role": "Marketing"},
+        # The same phone twice in one sheet: the last entry wins
+        {"full_name": "Marketing B mới", "phone_number": "0900000002", "role": "Marketing"},
+    ])
+
+    assert len(saved) == 2 and message == "Đã lưu 2 tài khoản"
+    assert requests == ["Account"]
+    assert accounts(client) == {"0900000001": ("Marketing A mới", "Quản lý"),
+                                "0900000002": ("Marketing B mới", "Marketing")}
+
+def test_upsert_without_accounts(client):
+    assert upsert_accounts([]) == (None, "Không có tài khoản nào để nhập")
+
+def test_account_sheet_validation():
+    df = pd.DataFrame({"Họ và tên": ["An", "", "Bình"],
+                       "Số điện thoại": ["912345678", "0912345679", "12"],
+                       "Vai trò": ["Marketing", "Quản lý", "Khách"]})
+
+    valid, errors = validate_account_import(df)
+
+    assert valid == [{"full_name": "An", "phone_number": "0912345678", "role": "Marketing"}]
+    assert errors.values.tolist() == [[3, "Thiếu họ và tên"], [4, "Số điện thoại không hợp lệ"],
+                                      [4, "Vai trò không hợp lệ"]]
+
+def test_account_sheet_missing_columns():
+    valid, errors = validate_account_import(pd.DataFrame({"Họ và tên": ["An"]}))
+
+    assert valid == []
+    assert errors["Lỗi"].tolist() == ["Thiếu cột: Số điện thoại, Vai trò"]
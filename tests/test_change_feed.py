@@ -0,0 +1,88 @@
+import pytest
+
+from config import settings
+from library import change_feed
+from library.change_feed import (ChangeEvent, data_version, event_topics, last_change, publish, publish_writes,
+                                 subscribe)
+from service.guest_service import get_houses_name_map
+
+@pytest.fixture
+def events():
+    received = []
+    unsubscribe = subscribe(received.append)
+    yield received
+    unsubscribe()
+
+@pytest.fixture
+def guests(client):
+    client.table("Account").insert([
+        {"full_name": "Quản lý", "phone_number": "0900000001", "role": "Quản lý"},
+        {"full_name": "Marketing A", "phone_number": "0900000002", "role": "Marketing"},
+        {"full_name": "Marketing B", "phone_number": "0900000003", "role": "Marketing"},
+    ]).execute()
+    client.table("House").insert([{"manager_id": 1, "address": "Nhà 1"}, {"manager_id": 1, "address": "Nhà 2"}]).execute()
+    client.table("Guest").insert({"house_id": 1, "marketer_id": 2, "guest_name": "Khách 1"}).execute()
+    return client
+
+def test_topics_cover_the_old_and_new_audience():
+    moved = ChangeEvent("Guest", "UPDATE", {"id": 1, "house_id": 2, "marketer_id": 5},
+                        {"id": 1, "house_id": 1, "marketer_id": 5})
+
+    assert set(event_topics(moved)) == {("Guest",), ("Guest", "house_id", 1), ("Guest", "house_id", 2),
+                                        ("Guest", "marketer_id", 5)}
+    # Realtime without REPLICA IDENTITY FULL: only the primary key of the old row
+    assert ("Guest", "unscoped") in event_topics(ChangeEvent("Guest", "DELETE", {}, {"id": 1}))
+    assert ("Guest", "unscoped") not in event_topics(ChangeEvent("Guest", "INSERT", {"id": 1, "house_id": 1}))
+    assert event_topics(ChangeEvent("House", "UPDATE", {"id": 1}, {"id": 1})) == [("House",)]
+
+def test_local_writes_are_published(guests, events):
+    marketer_a, marketer_b = last_change([("Guest", "marketer_id", 2)]), last_change([("Guest", "marketer_id", 3)])
+
+    guests.table("Guest").update({"house_id": 2}).eq("id", 1).execute()
+
+    assert [(event.type, event.record["house_id"], event.old_record["house_id"]) for event in events] == [
+        ("UPDATE", 2, 1)]
+    assert last_change([("Guest", "house_id", 1)]) == last_change([("Guest", "house_id", 2)]) > marketer_a
+    assert last_change([("Guest", "marketer_id", 3)]) == marketer_b
+    assert data_version([("Guest", "marketer_id", 3)]) == marketer_b
+
+def test_house_and_account_changes_refresh_the_reference_maps(guests):
+    assert list(get_houses_name_map()[0].values()) == ["Nhà 1", "Nhà 2"]
+
+    # Written behind the services' back, as another process would
+    guests.table("House").update({"address": "Nhà 2B"}).eq("id", 2).execute()
+
+    assert list(get_houses_name_map()[0].values()) == ["Nhà 1", "Nhà 2B"]
+
+def test_a_failing_subscriber_does_not_stop_the_others(events):
+    unsubscribe = subscribe(lambda event: 1 / 0)
+    try:
+        publish(ChangeEvent("Account", "INSERT", {"id": 1}))
+    finally:
+        unsubscribe()
+
+    assert len(events) == 1
+
+def test_own_writes_are_published_on_supabase_only(monkeypatch, events):
+    publish_writes("Guest", "UPDATE", [{"id": 1, "house_id": 1}])
+    assert events == []
+
+    monkeypatch.setattr(settings, "DATA_BACKEND", "supabase")
+    publish_writes("Guest", "UPDATE", [{"id": 1, "house_id": 1}])
+    publish_writes("Guest", "DELETE", [{"id": 2, "house_id": 1}])
+
+    assert [(event.type, event.record, event.old_record) for event in events] == [
+        ("UPDATE", {"id": 1, "house_id": 1}, {}), ("DELETE", {}, {"id": 2, "house_id": 1})]
+    # Updates may have moved the row out of some scope it had before
+    assert last_change([("Guest", "unscoped")]) == change_feed.current_sequence()
+
+def test_realtime_payloads_become_events(events):
+    change_feed._on_realtime_change({"data": {
+        "table": "Guest", "type": "DELETE", "record": None, "old_record": {"id": 3}}})
+
+    assert events == [ChangeEvent("Guest", "DELETE", {}, {"id": 3})]
+
+def test_no_data_version_without_a_listener(monkeypatch):
+    monkeypatch.setattr(settings, "DATA_BACKEND", "supabase")
+
+    assert data_version([("Guest",)]) is None
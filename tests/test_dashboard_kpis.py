@@ -0,0 +1,72 @@
+from datetime import timedelta, timezone
+
+import pytest
+
+from service.analytics_service import CLOSED_STATUS, _week_start, get_dashboard_kpis
+
+ROLES = ("Quản trị viên", "Quản lý", "Marketing")
+
+def scope_account(client, role):
+    """The first account of ``role`` that has guests (None for admins)"""
+    if role == "Quản lý":
+        return client.run('SELECT h.manager_id FROM "Guest" g JOIN "House" h ON h.id = g.house_id LIMIT 1')[0][0]
+    if role == "Marketing":
+        return client.run('SELECT marketer_id FROM "Guest" WHERE marketer_id IS NOT NULL LIMIT 1')[0][0]
+    return None
+
+def expected_kpis(client, role, account_id):
+    """The dashboard totals counted straight from Guest"""
+    bound = lambda moment: moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+    this_week = _week_start()
+    rows = [dict(row) for row in client.run(
+        'SELECT g.created_at, g.status, g.marketer_id, h.manager_id FROM "Guest" g LEFT JOIN "House" h ON h.id = g.house_id')]
+    houses = [dict(row) for row in client.run('SELECT manager_id FROM "House"')]
+    if role == "Quản lý":
+        rows = [row for row in rows if row["manager_id"] == account_id]
+        houses = [house for house in houses if house["manager_id"] == account_id]
+    elif role == "Marketing":
+        rows = [row for row in rows if row["marketer_id"] == account_id]
+    closed = sum(row["status"] == CLOSED_STATUS for row in rows)
+    return {
+        'houses': len(houses),
+        'accounts': client.run('SELECT COUNT(*) FROM "Account"')[0][0],
+        'guests': len(rows),
+        'new_this_week': sum(row["created_at"] >= bound(this_week) for row in rows),
+        'new_last_week': sum(bound(this_week - timedelta(days=7)) <= row["created_at"] < bound(this_week) for row in rows),
+        'close_rate': closed / len(rows) if rows else None,
+    }
+
+@pytest.mark.parametrize("role", ROLES)
+def test_kpis_match_the_guests_in_scope(seeded, role):
+    account_id = scope_account(seeded, role)
+
+    kpis, error = get_dashboard_kpis(account_id, role)
+
+    assert error is None
+    expected = expected_kpis(seeded, role, account_id)
+    assert kpis == dict(expected, close_rate=pytest.approx(expected['close_rate']))
+    assert kpis['new_this_week'] or kpis['new_last_week']
+
+def test_scopes_are_cached_separately(seeded):
+    manager_id = scope_account(seeded, "Quản lý")
+
+    admin, _ = get_dashboard_kpis(None, "Quản trị viên")
+    manager, _ = get_dashboard_kpis(manager_id, "Quản lý")
+
+    assert manager['guests'] < admin['guests']
+    assert manager['houses'] < admin['houses']
+
+def test_kpis_without_guests(client):
+    kpis, error = get_dashboard_kpis(None, "Quản trị viên")
+
+    assert error is None
+    assert kpis['guests'] == kpis['new_this_week'] == kpis['new_last_week'] == 0
+    assert kpis['close_rate'] is None
+
+def test_marketer_without_guests(seeded):
+    account_id = seeded.table("Account").insert(
+        {"full_name": "Marketing mới", "phone_number": "0999999999", "role": "Marketing"}).execute().data[0]["id"]
+
+    kpis, _ = get_dashboard_kpis(account_id, "Marketing")
+
+    assert kpis['guests'] == 0 and kpis['close_rate'] is None
@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+from config import settings
+from library import change_feed
+from service.import_service import DEFAULT_IMPORT_STATUS, import_guests, validate_guest_import
+
+MAPPING = {"guest_name": "Tên", "guest_phone_number": "SĐT", "house_address": "Nhà",
+           "marketer_name": "Marketing", "status": "Trạng thái", "view_date": "Ngày xem"}
+HOUSES = {1: "Nhà 1", 2: "Nhà 2"}
+MARKETERS = {4: "Marketing A"}
+STATUSES = ["Đang chăm sóc", "Chốt"]
+
+def sheet(*rows):
+    return pd.DataFrame(rows, columns=list(MAPPING.values()))
+
+def test_validation_reports_spreadsheet_rows():
+    df = sheet(
+        ["Khách 1", "912 345 678", "Nhà 1", "Marketing A", "", "01/05/2024"],
+        ["", "0912345678", "Nhà 2", "Marketing A", "Chốt", ""],
+        ["Khách 3", "123", "Nhà 9", "Marketing A", "Chốt", ""],
+        ["Khách 4", "0912345678", "Nhà 2", "Không ai", "Lạ", "hôm qua"],
+        ["Khách 5", "+84912345678", "Nhà 2", "Marketing A", "Chốt", ""],
+    )
+
+    valid, errors = validate_guest_import(df, MAPPING, HOUSES, STATUSES, MARKETERS)
+
+    assert valid.index.tolist() == [0, 4]
+    assert valid.loc[0].to_dict() == {
+        "guest_name": "Khách 1", "guest_phone_number": "0912345678", "house_id": 1, "marketer_id": 4,
+        "status": DEFAULT_IMPORT_STATUS, "view_date": "2024-05-01T00:00:00"}
+    assert valid.loc[4, "guest_phone_number"] == "0912345678"
+    assert errors.values.tolist() == [
+        [3, "Thiếu tên khách"],
+        [4, "Số điện thoại không hợp lệ"],
+        [4, "Không tìm thấy nhà theo địa chỉ"],
+        [5, "Không tìm thấy nhân viên marketing"],
+        [5, "Trạng thái không hợp lệ"],
+        [5, "Ngày xem không hợp lệ"],
+    ]
+
+def test_marketers_import_as_themselves():
+    df = sheet(["Khách 1", "0912345678", "Nhà 1", "", "Chốt", ""])
+
+    valid, errors = validate_guest_import(df, dict(MAPPING, marketer_name=None), HOUSES, STATUSES, marketer_id=5)
+
+    assert errors.empty
+    assert valid["marketer_id"].tolist() == [5]
+
+@pytest.fixture
+def houses(client):
+    client.table("Account").insert({"full_name": "Quản lý", "phone_number": "0900000001", "role": "Quản lý"}).execute()
+    client.table("House").insert([{"manager_id": 1, "address": address} for address in HOUSES.values()]).execute()
+    return client
+
+def count_inserts(client, monkeypatch):
+    inserts = []
+    table = client.table
+    def counted(name):
+        builder = table(name)
+        insert = builder.insert
+        builder.insert = lambda rows, **kwargs: inserts.append(len(rows)) or insert(rows, **kwargs)
+        return builder
+    monkeypatch.setattr(client, "table", counted)
+    return inserts
+
+def test_failed_rows_are_isolated_by_bisecting_chunks(houses, monkeypatch):
+    rows = pd.DataFrame({"guest_name": [f"Khách {i}" for i in range(10)], "house_id": 1, "marketer_id": 1},
+                        index=range(10, 20))
+    # Unknown houses violate the foreign key, as a house deleted after validation would
+    rows.loc[[13, 17], "house_id"] = 99
+    inserts = count_inserts(houses, monkeypatch)
+
+    inserted, errors = import_guests(rows, chunk_size=8)
+
+    assert inserted == 8
+    assert errors["Dòng"].tolist() == [15, 19]
+    assert houses.run('SELECT COUNT(*) FROM "Guest"')[0][0] == 8
+    # Chunks of 8 and 2; each half holding a bad row splits again until it is a single row
+    assert inserts == [8, 4, 2, 2, 1, 1, 4, 2, 2, 1, 1, 2]
+
+def test_bulk_inserts_bump_scope_topics_without_events(monkeypatch):
+    monkeypatch.setattr(settings, "DATA_BACKEND", "supabase")
+    events = []
+    unsubscribe = change_feed.subscribe(events.append)
+    before = change_feed.last_change([("Guest", "house_id", 1)])
+
+    try:
+        change_feed.publish_inserted("Guest", [{"house_id": 1, "marketer_id": 4}, {"house_id": 2, "marketer_id": 4}])
+    finally:
+        unsubscribe()
+
+    assert events == []
+    assert change_feed.last_change([("Guest", "house_id", 1)]) > before
+    assert change_feed.last_change([("Guest", "marketer_id", 4)]) == change_feed.last_change([("Guest",)])
+    assert change_feed.last_change([("Guest", "house_id", 3)]) < change_feed.current_sequence()
@@ -0,0 +1,91 @@
+from collections import Counter
+
+import pytest
+
+from config import settings
+from service.guest_service import GUEST_SORT_COLUMNS, get_guests_page
+
+ROLES = ("Quản trị viên", "Quản lý", "Marketing")
+
+def busiest_account(client, role):
+    """Account of ``role`` with the most guests in scope (None for admins: they see everyone)"""
+    if role == "Quản lý":
+        rows = client.run('SELECT h.manager_id AS id FROM "Guest" g JOIN "House" h ON h.id = g.house_id')
+    elif role == "Marketing":
+        rows = client.run('SELECT marketer_id AS id FROM "Guest"')
+    else:
+        return None
+    return Counter(row["id"] for row in rows).most_common(1)[0][0]
+
+def expected_order(client, role, account_id, sort_by, descending, statuses=None):
+    """Guest ids in the order get_guests_page must return them: sort_by NULLS LAST, then id"""
+    rows = [dict(row) for row in client.run(
+        'SELECT g.*, h.manager_id FROM "Guest" g LEFT JOIN "House" h ON h.id = g.house_id')]
+    if role == "Quản lý":
+        rows = [row for row in rows if row["manager_id"] == account_id]
+    elif role == "Marketing":
+        rows = [row for row in rows if row["marketer_id"] == account_id]
+    if statuses:
+        rows = [row for row in rows if row["status"] in statuses]
+    present = sorted((row for row in rows if row[sort_by] is not None),
+                     key=lambda row: (row[sort_by], row["id"]), reverse=descending)
+    missing = sorted((row["id"] for row in rows if row[sort_by] is None), reverse=descending)
+    return [row["id"] for row in present] + missing
+
+def walk_pages(account_id, role, sort_by, descending, filters=None, page_size=37):
+    ids, cursor, total = [], None, None
+    while True:
+        page, error = get_guests_page(account_id=account_id, role=role, filters=filters, sort_by=sort_by,
+                                      descending=descending, cursor=cursor, page_size=page_size)
+        assert error is None
+        if cursor is None:
+            total = page["total"]
+        assert len(page["rows"]) <= page_size
+        ids += [row["id"] for row in page["rows"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, total
+
+@pytest.mark.parametrize("sync", [False, True], ids=["query", "synced"])
+@pytest.mark.parametrize("descending", [True, False], ids=["desc", "asc"])
+@pytest.mark.parametrize("sort_by", GUEST_SORT_COLUMNS)
+@pytest.mark.parametrize("role", ROLES)
+def test_keyset_pages_cover_every_guest_once_in_order(seeded, monkeypatch, role, sort_by, descending, sync):
+    monkeypatch.setattr(settings, "GUEST_SYNC", sync)
+    account_id = busiest_account(seeded, role)
+    expected = expected_order(seeded, role, account_id, sort_by, descending)
+
+    ids, total = walk_pages(account_id, role, sort_by, descending)
+
+    assert ids == expected
+    assert total == len(expected)
+
+@pytest.mark.parametrize("sync", [False, True], ids=["query", "synced"])
+def test_keyset_pages_with_filters(seeded, monkeypatch, sync):
+    monkeypatch.setattr(settings, "GUEST_SYNC", sync)
+    statuses = ["Chốt", "Gần xem"]
+    expected = expected_order(seeded, "Quản trị viên", None, "view_date", True, statuses)
+
+    ids, total = walk_pages(None, "Quản trị viên", "view_date", True, filters={"status": statuses}, page_size=11)
+
+    assert ids == expected
+    assert total == len(expected)
+
+def test_synced_pages_follow_writes(seeded, monkeypatch):
+    monkeypatch.setattr(settings, "GUEST_SYNC", True)
+    walk_pages(None, "Quản trị viên", "created_at", True)
+
+    seeded.table("Guest").update({"status": "Chốt"}).eq("id", 5).execute()
+    seeded.table("Guest").delete().eq("id", 6).execute()
+    seeded.table("Guest").insert({"house_id": 1, "guest_name": "Khách mới", "guest_phone_number": "0900000000",
+                                  "status": "Mới"}).execute()
+
+    ids, total = walk_pages(None, "Quản trị viên", "created_at", True)
+    assert ids == expected_order(seeded, "Quản trị viên", None, "created_at", True)
+    assert 6 not in ids
+    rows, _ = get_guests_page(filters={"status": ["Chốt"]}, sort_by="id", page_size=1000)
+    assert 5 in [row["id"] for row in rows["rows"]]
+
+def test_unknown_sort_column_is_rejected(client):
+    page, error = get_guests_page(sort_by="phone")
+    assert page is None and error
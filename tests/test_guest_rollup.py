@@ -0,0 +1,72 @@
+from collections import Counter
+
+def rollup_counts(client, **params):
+    """guest_rollup_counts() as {(dimension, group_id, status): guest_count}"""
+    rows = client.rpc("guest_rollup_counts", params).execute().data
+    return {(row["dimension"], row["group_id"], row["status"]): row["guest_count"] for row in rows}
+
+def raw_counts(client, start_day=None, end_day=None):
+    """The same counts straight from Guest, grouped by the Vietnam day it was created"""
+    rows = client.run("""
+        SELECT date(g.created_at, '+7 hours') AS day, g.marketer_id, h.manager_id, g.status
+        FROM "Guest" g LEFT JOIN "House" h ON h.id = g.house_id
+    """)
+    counts = Counter()
+    for row in rows:
+        if (start_day and row["day"] < start_day) or (end_day and row["day"] > end_day):
+            continue
+        counts[("manager", row["manager_id"], row["status"])] += 1
+        counts[("marketer", row["marketer_id"], row["status"])] += 1
+    return dict(counts)
+
+def test_seeded_rollup_matches_guests(seeded):
+    assert rollup_counts(seeded) == raw_counts(seeded)
+
+def test_rollup_follows_inserts_updates_and_deletes(seeded):
+    guests = seeded.table("Guest")
+    guests.insert([
+        {"marketer_id": 3, "house_id": 2, "guest_name": "Khách A", "status": "Đang chăm sóc"},
+        {"marketer_id": None, "house_id": None, "guest_name": "Khách B", "status": None},
+    ]).execute()
+    guests.update({"status": "Chốt"}).eq("id", 10).execute()
+    guests.update({"house_id": 7, "marketer_id": 4}).eq("id", 11).execute()
+    guests.update({"created_at": "2020-01-01T16:30:00.000+00:00"}).eq("id", 12).execute()
+    guests.update({"status": "Gần xem"}).in_("id", [20, 21, 22]).execute()
+    guests.delete().eq("id", 13).execute()
+    guests.delete().in_("id", [30, 31]).execute()
+    assert rollup_counts(seeded) == raw_counts(seeded)
+
+    manager = seeded.run('SELECT manager_id FROM "House" WHERE id = 7')[0][0]
+    other = next(row["id"] for row in seeded.run('SELECT id FROM "Account"') if row["id"] != manager)
+    seeded.table("House").update({"manager_id": other}).eq("id", 7).execute()
+    assert rollup_counts(seeded) == raw_counts(seeded)
+
+def test_rollup_day_range_uses_vietnam_days(client):
+    client.table("Account").insert({"full_name": "Quản lý", "phone_number": "0900000001", "role": "Quản lý"}).execute()
+    client.table("House").insert({"manager_id": 1, "address": "Nhà 1"}).execute()
+    client.table("Guest").insert([
+        # 2024-05-01 23:30 and 2024-05-02 00:30 in Vietnam time
+        {"house_id": 1, "marketer_id": 1, "status": "Chốt", "created_at": "2024-05-01T16:30:00.000+00:00"},
+        {"house_id": 1, "marketer_id": 1, "status": "Chốt", "created_at": "2024-05-01T17:30:00.000+00:00"},
+    ]).execute()
+
+    assert rollup_counts(client, start_day="2024-05-02", group_by="manager") == {("manager", 1, "Chốt"): 1}
+    assert rollup_counts(client, end_day="2024-05-01", group_by="marketer") == {("marketer", 1, "Chốt"): 1}
+    assert rollup_counts(client, start_day="2024-05-01", end_day="2024-05-02") == raw_counts(client)
+
+def test_rebuild_keeps_the_counts(seeded):
+    seeded.table("Guest").update({"status": "Không chốt"}).in_("id", [1, 2, 3]).execute()
+    before = rollup_counts(seeded)
+
+    rebuilt = seeded.rpc("rebuild_guest_rollup", {}).execute().data
+
+    assert rebuilt == seeded.run('SELECT COUNT(*) FROM "GuestDailyRollup"')[0][0]
+    assert rollup_counts(seeded) == before == raw_counts(seeded)
+
+def test_rebuild_repairs_a_drifted_rollup(seeded):
+    seeded.run('UPDATE "GuestDailyRollup" SET guest_count = guest_count + 5')
+    assert rollup_counts(seeded) != raw_counts(seeded)
+
+    seeded.rpc("rebuild_guest_rollup", {}).execute()
+
+    assert rollup_counts(seeded) == raw_counts(seeded)
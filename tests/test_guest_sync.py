@@ -0,0 +1,75 @@
+import pytest
+
+import service.guest_service as guest_service
+from config import settings
+from service.guest_service import get_guests_with_details
+
+@pytest.fixture
+def synced(client, monkeypatch):
+    """Two managers with a house each and two marketers; GUEST_SYNC on, with full loads counted"""
+    monkeypatch.setattr(settings, "GUEST_SYNC", True)
+    client.table("Account").insert([
+        {"full_name": "Quản lý A", "phone_number": "0900000001", "role": "Quản lý"},
+        {"full_name": "Quản lý B", "phone_number": "0900000002", "role": "Quản lý"},
+        {"full_name": "Marketing A", "phone_number": "0900000003", "role": "Marketing"},
+        {"full_name": "Marketing B", "phone_number": "0900000004", "role": "Marketing"},
+    ]).execute()
+    client.table("House").insert([{"manager_id": 1, "address": "Nhà 1"}, {"manager_id": 2, "address": "Nhà 2"}]).execute()
+    client.table("Guest").insert([
+        {"house_id": 1, "marketer_id": 3, "guest_name": "Khách 1"},
+        {"house_id": 2, "marketer_id": 4, "guest_name": "Khách 2"},
+    ]).execute()
+
+    full_loads = []
+    full_sync = guest_service._full_sync
+    monkeypatch.setattr(guest_service, "_full_sync", lambda *args: full_loads.append(args[1:]) or full_sync(*args))
+    return full_loads
+
+def synced_ids(account_id=None, role=None):
+    rows, error = get_guests_with_details(account_id, role)
+    assert error is None
+    return sorted(row["id"] for row in rows)
+
+def test_an_empty_scope_is_loaded_once(client, synced):
+    account_id = client.table("Account").insert(
+        {"full_name": "Marketing C", "phone_number": "0900000005", "role": "Marketing"}).execute().data[0]["id"]
+
+    assert synced_ids(account_id, "Marketing") == []
+    assert synced_ids(account_id, "Marketing") == []
+    assert synced == [(account_id, "Marketing")]
+
+    client.table("Guest").update({"marketer_id": account_id}).eq("id", 1).execute()
+    assert synced_ids(account_id, "Marketing") == [1]
+    assert len(synced) == 1
+
+def test_guests_move_between_marketer_scopes(client, synced):
+    assert synced_ids(3, "Marketing") == [1]
+    assert synced_ids(4, "Marketing") == [2]
+
+    client.table("Guest").update({"marketer_id": 4}).eq("id", 1).execute()
+
+    assert synced_ids(3, "Marketing") == []
+    assert synced_ids(4, "Marketing") == [1, 2]
+    assert len(synced) == 2
+
+def test_guests_move_between_manager_scopes(client, synced):
+    assert synced_ids(1, "Quản lý") == [1]
+    assert synced_ids(2, "Quản lý") == [2]
+
+    client.table("Guest").update({"house_id": 1}).eq("id", 2).execute()
+    client.table("Guest").update({"guest_name": "Khách 1 mới"}).eq("id", 1).execute()
+
+    assert synced_ids(2, "Quản lý") == []
+    rows, _ = get_guests_with_details(1, "Quản lý")
+    assert {row["id"]: row["guest_name"] for row in rows} == {1: "Khách 1 mới", 2: "Khách 2"}
+
+def test_deletes_and_inserts_reach_every_scope(client, synced):
+    assert synced_ids() == [1, 2]
+    assert synced_ids(1, "Quản lý") == [1]
+
+    client.table("Guest").delete().eq("id", 1).execute()
+    client.table("Guest").insert({"house_id": 1, "marketer_id": 4, "guest_name": "Khách 3"}).execute()
+
+    assert synced_ids() == [2, 3]
+    assert synced_ids(1, "Quản lý") == [3]
+    assert len(synced) == 2
@@ -0,0 +1,14 @@
+import pandas as pd
+
+from component.guest_table import format_vietnam_datetimes
+
+def test_timestamps_are_shown_in_vietnam_time():
+    values = pd.Series(["2024-05-01T17:30:00.123+00:00", "2024-05-01T08:05:00", None, "không rõ"], index=[3, 5, 8, 9])
+
+    formatted = format_vietnam_datetimes(values)
+
+    assert formatted.index.tolist() == [3, 5, 8, 9]
+    assert formatted.tolist() == ["02/05/2024 00:30", "01/05/2024 15:05", "", "không rõ"]
+
+def test_formatting_an_empty_column():
+    assert format_vietnam_datetimes(pd.Series([], dtype=object)).empty
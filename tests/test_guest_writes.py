@@ -0,0 +1,112 @@
+import pandas as pd
+import pytest
+
+from component.table_with_dialog import selected_ids
+from service.guest_service import delete_guest, delete_guests, update_guest, update_guests
+
+ADMIN, MANAGER, OTHER_MANAGER, MARKETER, OTHER_MARKETER = 1, 2, 3, 4, 5
+
+@pytest.fixture
+def guests(client):
+    """Houses 1-2 belong to MANAGER, house 3 to OTHER_MANAGER; guests 1-4 spread over them"""
+    client.table("Account").insert([
+        {"full_name": "Admin", "phone_number": "0900000001", "role": "Quản trị viên"},
+        {"full_name": "Quản lý A", "phone_number": "0900000002", "role": "Quản lý"},
+        {"full_name": "Quản lý B", "phone_number": "0900000003", "role": "Quản lý"},
+        {"full_name": "Marketing A", "phone_number": "0900000004", "role": "Marketing"},
+        {"full_name": "Marketing B", "phone_number": "0900000005", "role": "Marketing"},
+    ]).execute()
+    client.table("House").insert([
+        {"manager_id": MANAGER, "address": "Nhà 1"},
+        {"manager_id": MANAGER, "address": "Nhà 2"},
+        {"manager_id": OTHER_MANAGER, "address": "Nhà 3"},
+    ]).execute()
+    client.table("Guest").insert([
+        {"house_id": 1, "marketer_id": MARKETER, "guest_name": "Khách 1", "status": "Đang chăm sóc"},
+        {"house_id": 2, "marketer_id": OTHER_MARKETER, "guest_name": "Khách 2", "status": "Đang chăm sóc"},
+        {"house_id": 3, "marketer_id": MARKETER, "guest_name": "Khách 3", "status": "Đang chăm sóc"},
+        {"house_id": 3, "marketer_id": OTHER_MARKETER, "guest_name": "Khách 4", "status": "Đang chăm sóc"},
+    ]).execute()
+    return client
+
+def guest(client, guest_id):
+    rows = client.table("Guest").select("*").eq("id", guest_id).execute().data
+    return rows[0] if rows else None
+
+def statuses(client):
+    return {row["id"]: row["status"] for row in client.table("Guest").select("id, status").execute().data}
+
+def test_admin_bulk_update_and_delete(guests):
+    rows, message = update_guests([1, 2, 3, 4], {"status": "Chốt", "marketer_id": OTHER_MARKETER}, role="Admin")
+
+    assert len(rows) == 4 and "4" in message
+    assert set(statuses(guests).values()) == {"Chốt"}
+    assert guest(guests, 1)["marketer_id"] == OTHER_MARKETER
+
+    success, message = delete_guests([1, 4])
+    assert success and "2" in message
+    assert set(statuses(guests)) == {2, 3}
+
+def test_manager_bulk_update_only_touches_their_houses(guests):
+    rows, _ = update_guests([1, 2, 3], {"status": "Gần xem"}, role="Quản lý", account_id=MANAGER)
+
+    assert sorted(row["id"] for row in rows) == [1, 2]
+    assert statuses(guests) == {1: "Gần xem", 2: "Gần xem", 3: "Đang chăm sóc", 4: "Đang chăm sóc"}
+
+def test_manager_cannot_edit_another_managers_guest(guests):
+    result, _ = update_guest(3, {"status": "Chốt"}, role="Quản lý", account_id=MANAGER)
+
+    assert result is None
+    assert guest(guests, 3)["status"] == "Đang chăm sóc"
+
+def test_manager_moves_guests_only_between_their_houses(guests):
+    rows, _ = update_guests([1], {"house_id": 2}, role="Quản lý", account_id=MANAGER)
+    assert rows[0]["house_id"] == 2
+
+    result, message = update_guests([1, 2], {"house_id": 3}, role="Quản lý", account_id=MANAGER)
+    assert result is None
+    assert message == "Chỉ có thể chuyển khách sang nhà bạn quản lý"
+    assert guest(guests, 1)["house_id"] == 2 and guest(guests, 2)["house_id"] == 2
+
+def test_non_admins_cannot_reassign_marketers(guests):
+    result, _ = update_guest(1, {"marketer_id": OTHER_MARKETER, "manager_note": "gọi lại"},
+                             role="Quản lý", account_id=MANAGER)
+
+    assert result["manager_note"] == "gọi lại"
+    assert result["marketer_id"] == MARKETER
+
+def test_marketer_updates_only_their_guests(guests):
+    rows, _ = update_guests([1, 2, 3, 4], {"status": "Không xem"}, role="Marketing", account_id=MARKETER)
+
+    assert sorted(row["id"] for row in rows) == [1, 3]
+    assert statuses(guests) == {1: "Không xem", 2: "Đang chăm sóc", 3: "Không xem", 4: "Đang chăm sóc"}
+
+def test_manager_cannot_delete_a_guest_in_another_managers_house(guests):
+    success, _ = delete_guest(3, role="Quản lý", account_id=MANAGER)
+
+    assert not success
+    assert guest(guests, 3) is not None
+
+def test_manager_bulk_delete_only_removes_their_guests(guests):
+    success, message = delete_guests([1, 2, 3, 4], role="Quản lý", account_id=MANAGER)
+
+    assert success and "2" in message
+    assert set(statuses(guests)) == {3, 4}
+
+def test_marketer_deletes_only_their_guests(guests):
+    success, _ = delete_guests([1, 2], role="Marketing", account_id=MARKETER)
+
+    assert success
+    assert set(statuses(guests)) == {2, 3, 4}
+
+def test_bulk_update_without_changes(guests):
+    result, message = update_guests([1, 2], {"marketer_id": OTHER_MARKETER}, role="Marketing", account_id=MARKETER)
+
+    assert result is None
+    assert message == "Không có thay đổi nào để lưu"
+
+def test_selection_is_kept_as_guest_ids():
+    df = pd.DataFrame({"id": [11, 12, 13], "guest_name": ["A", "B", "C"]})
+
+    # Positions past the end (a shorter page after a refresh) are dropped
+    assert selected_ids(df, [0, 2, 5]) == [11, 13]
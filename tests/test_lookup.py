@@ -0,0 +1,18 @@
+from library.lookup import LabelIndex
+
+def test_duplicate_labels_get_their_id():
+    index = LabelIndex({9: "12 Lê Lợi", 3: "5 Hai Bà Trưng", 7: "12 Lê Lợi"}, key="house_id")
+
+    assert index == {3: "5 Hai Bà Trưng", 7: "12 Lê Lợi (#7)", 9: "12 Lê Lợi (#9)"}
+    assert index.options == ["5 Hai Bà Trưng", "12 Lê Lợi (#7)", "12 Lê Lợi (#9)"]
+    assert index.id_of("12 Lê Lợi (#9)") == 9
+    assert index.position("12 Lê Lợi (#9)") == 2
+    assert index.id_of("12 Lê Lợi") is None and index.position("12 Lê Lợi", default=-1) == -1
+
+def test_a_name_that_looks_disambiguated_stays_distinct():
+    index = LabelIndex({7: "An", 8: "An", 2: "An (#7)"})
+
+    assert len(set(index.values())) == 3
+    assert index[7] == "An (#7)" and index[8] == "An (#8)"
+    assert index[2] == "An (#7) (#2)"
+    assert {label: index.id_of(label) for label in index.options} == {"An (#7) (#2)": 2, "An (#7)": 7, "An (#8)": 8}
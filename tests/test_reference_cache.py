@@ -0,0 +1,64 @@
+import pytest
+
+from library import cache, change_feed
+from library.cache import TTLCache
+from service.account_service import create_account, get_managers_name_map, update_account
+from service.guest_service import get_houses_name_map, get_houses_with_managers_map
+from service.house_service import create_house, delete_house, update_house
+
+@pytest.fixture
+def reference(client, monkeypatch):
+    """A manager with one house; reads counted per table, change feed muted so only explicit invalidation applies"""
+    client.table("Account").insert({"full_name": "Quản lý A", "phone_number": "0900000001", "role": "Quản lý"}).execute()
+    client.table("House").insert({"manager_id": 1, "address": "Nhà 1"}).execute()
+    monkeypatch.setattr(change_feed, "_subscribers", [])
+
+    reads = []
+    table = client.table
+    monkeypatch.setattr(client, "table", lambda name: reads.append(name) or table(name))
+    return reads
+
+def test_ttl_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    entries = TTLCache(ttl=10, max_entries=2)
+
+    entries.set("a", 1)
+    entries.set("b", 2)
+    assert entries.get("a") == 1
+    entries.set("c", 3)
+    assert entries.get("b") is None and entries.get("a") == 1 and len(entries) == 2
+
+    now[0] = 111
+    assert entries.get("a", "expired") == "expired"
+
+def test_name_maps_are_read_once(reference):
+    assert get_houses_name_map() == get_houses_name_map()
+    assert get_houses_with_managers_map()[0] == get_houses_with_managers_map()[0]
+    get_managers_name_map()
+    get_managers_name_map()
+
+    assert reference.count("House") == 2
+    assert reference.count("Account") == 1
+
+def test_house_mutations_invalidate_the_maps(reference):
+    assert list(get_houses_name_map()[0].values()) == ["Nhà 1"]
+
+    house, _ = create_house(1, "Nhà 2")
+    assert list(get_houses_name_map()[0].values()) == ["Nhà 1", "Nhà 2"]
+
+    update_house(house["id"], {"address": "Nhà 2B"})
+    assert list(get_houses_name_map()[0].values()) == ["Nhà 1", "Nhà 2B"]
+
+    delete_house(house["id"])
+    assert list(get_houses_name_map()[0].values()) == ["Nhà 1"]
+
+def test_account_mutations_invalidate_the_maps(reference):
+    assert list(get_managers_name_map()[0].values()) == ["Quản lý A"]
+
+    account, _ = create_account("Quản lý B", "0900000002", "Quản lý")
+    assert list(get_managers_name_map()[0].values()) == ["Quản lý A", "Quản lý B"]
+
+    update_account(1, {"full_name": "Quản lý C"})
+    assert list(get_managers_name_map()[0].values()) == ["Quản lý C", "Quản lý B"]
+    assert get_houses_with_managers_map()[0][1]["manager_name"] == "Quản lý C"
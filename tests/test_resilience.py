@@ -0,0 +1,106 @@
+import pytest
+
+from config import settings
+from library import resilience
+from library.resilience import (UNAVAILABLE_MESSAGE, CircuitBreaker, breaker, fresh_result, report_backend_error,
+                                resilient_read, track_stale_reads)
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+class Backend:
+    """Stand-in read service: returns ``result``, raises ``error``, or reports a backend error"""
+
+    def __init__(self):
+        self.calls = 0
+        self.result = ([1, 2], "ok")
+        self.error = None
+        self.report = False
+
+    def read(self, key):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        if self.report:
+            report_backend_error()
+        return self.result
+
+@pytest.fixture
+def backend(client, clock):
+    backend = Backend()
+    return backend, resilient_read(backend.read)
+
+def test_breaker_opens_then_lets_one_probe_through(clock):
+    circuit = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        assert circuit.allow()
+        circuit.record_failure()
+    assert circuit.is_open and not circuit.allow()
+
+    clock[0] += 30
+    assert circuit.allow()
+    assert not circuit.allow()  # a second call while the probe is in flight
+
+    circuit.record_failure()
+    assert not circuit.allow()  # the failed probe reopens for another reset_timeout
+    clock[0] += 30
+    assert circuit.allow()
+    circuit.record_success()
+    assert not circuit.is_open and circuit.allow() and circuit.allow()
+
+def test_failures_serve_the_last_good_result(backend):
+    service, read = backend
+    assert read("a") == ([1, 2], "ok")
+    stale_reads = track_stale_reads()
+
+    service.error = ConnectionError("timeout")
+    for _ in range(settings.BREAKER_FAILURE_THRESHOLD):
+        assert read("a") == ([1, 2], "ok")
+        assert not fresh_result(([1, 2], "ok"))
+    assert breaker.is_open
+
+    # Open: reads stop reaching the backend
+    calls = service.calls
+    assert read("a") == ([1, 2], "ok")
+    assert read("b") == (None, UNAVAILABLE_MESSAGE)
+    assert service.calls == calls
+    assert len(stale_reads) == settings.BREAKER_FAILURE_THRESHOLD + 1
+
+def test_a_successful_probe_closes_the_breaker(backend, clock):
+    service, read = backend
+    service.error = ConnectionError("timeout")
+    for _ in range(settings.BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(ConnectionError):
+            read("a")  # nothing stale to fall back to
+    assert breaker.is_open
+
+    clock[0] += settings.BREAKER_RESET_SECONDS
+    service.error = None
+    assert read("a") == ([1, 2], "ok")
+    assert fresh_result(([1, 2], "ok"))
+    assert not breaker.is_open
+
+def test_only_backend_errors_count_as_failures(backend):
+    service, read = backend
+    service.result = (None, "Tham số không hợp lệ")
+    for _ in range(settings.BREAKER_FAILURE_THRESHOLD):
+        assert read("a") == (None, "Tham số không hợp lệ")
+    assert not breaker.is_open
+
+    service.report = True
+    for _ in range(settings.BREAKER_FAILURE_THRESHOLD):
+        read("a")
+    assert breaker.is_open
+
+def test_slow_calls_count_as_failures(client, clock):
+    @resilient_read
+    def slow_read(key):
+        clock[0] += settings.BREAKER_SLOW_CALL_SECONDS + 1
+        return [1], "ok"
+
+    for _ in range(settings.BREAKER_FAILURE_THRESHOLD):
+        assert slow_read("a") == ([1], "ok")
+    assert breaker.is_open
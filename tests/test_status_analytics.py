@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from service.analytics_service import FUNNEL_STAGES, NEW_GUESTS_STAGE, TOTAL_TIME_LABEL, get_guest_funnel, get_time_to_close
+
+# 2024-05-01 08:00 in Vietnam time
+START = datetime(2024, 5, 1, 1, tzinfo=timezone.utc)
+
+def timestamp(moment: datetime) -> str:
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.000+00:00')
+
+def add_guest(client, created_at, path):
+    """
+    Guest created at ``created_at`` whose status history follows ``path``: the
+    first status at creation, then (hours after creation, status) steps
+    """
+    first, *steps = path
+    guest_id = client.table("Guest").insert({"created_at": timestamp(created_at), "status": first}).execute().data[0]["id"]
+    previous = first
+    for hours, status in steps:
+        client.run('INSERT INTO "GuestStatusEvent"(guest_id, from_status, to_status, changed_at) VALUES (?, ?, ?, ?)',
+                   (guest_id, previous, status, timestamp(created_at + timedelta(hours=hours))))
+        previous = status
+    return guest_id
+
+@pytest.fixture
+def history(client):
+    """
+    Five guests created on 2024-05-01 and one on 2024-06-10 (Vietnam time).
+    First closes: 2024-05-01 (6 h), 2024-05-02 (24 h and 30 h) and 2024-06-10 (2 h)
+    """
+    add_guest(client, START, ["Đang chăm sóc", (10, "Gần xem"), (30, "Chốt")])
+    add_guest(client, START, ["Đang chăm sóc", (6, "Chốt"), (20, "Không chốt"), (50, "Chốt")])
+    add_guest(client, START, ["Đang chăm sóc", (4, "Không xem")])
+    add_guest(client, START, ["Đang chăm sóc", (12, "Gần xem"), (24, "Chốt")])
+    add_guest(client, START, ["Không chốt"])
+    add_guest(client, datetime(2024, 6, 10, 2, tzinfo=timezone.utc), ["Đang chăm sóc", (2, "Chốt")])
+    return client
+
+def status_events(client, guest_id):
+    return [dict(row) for row in client.run(
+        'SELECT from_status, to_status, is_created FROM "GuestStatusEvent" WHERE guest_id = ? ORDER BY id',
+        (guest_id,))]
+
+def funnel_counts(client, **params):
+    rows = client.rpc("guest_status_funnel", {"stages": FUNNEL_STAGES, **params}).execute().data
+    return [(row["stage"], row["guest_count"]) for row in rows]
+
+def time_to_close(client, **params):
+    rows = client.rpc("guest_time_to_close", {"closed_status": "Chốt", **params}).execute().data
+    return {row["status"]: row for row in rows}
+
+@pytest.fixture
+def guest_id(client):
+    client.table("Account").insert({"full_name": "Marketing", "phone_number": "0900000002", "role": "Marketing"}).execute()
+    return client.table("Guest").insert({"marketer_id": 1, "guest_name": "Khách", "status": "Đang chăm sóc"}).execute().data[0]["id"]
+
+def test_insert_logs_a_creation_event(client, guest_id):
+    assert status_events(client, guest_id) == [{"from_status": None, "to_status": "Đang chăm sóc", "is_created": 1}]
+    created_at = client.run('SELECT created_at FROM "Guest" WHERE id = ?', (guest_id,))[0][0]
+    assert client.run('SELECT changed_at FROM "GuestStatusEvent" WHERE guest_id = ?', (guest_id,))[0][0] == created_at
+
+def test_status_updates_log_transitions_only(client, guest_id):
+    guests = client.table("Guest")
+    guests.update({"status": "Gần xem"}).eq("id", guest_id).execute()
+    guests.update({"status": "Gần xem", "admin_note": "gọi lại"}).eq("id", guest_id).execute()
+    guests.update({"guest_name": "Khách đổi tên"}).eq("id", guest_id).execute()
+    guests.update({"status": "Chốt"}).eq("id", guest_id).execute()
+
+    assert status_events(client, guest_id) == [
+        {"from_status": None, "to_status": "Đang chăm sóc", "is_created": 1},
+        {"from_status": "Đang chăm sóc", "to_status": "Gần xem", "is_created": 0},
+        {"from_status": "Gần xem", "to_status": "Chốt", "is_created": 0},
+    ]
+
+def test_deleting_a_guest_keeps_its_history(client, guest_id):
+    client.table("Guest").update({"status": "Chốt"}).eq("id", guest_id).execute()
+    client.table("Guest").delete().eq("id", guest_id).execute()
+
+    assert len(status_events(client, guest_id)) == 2
+    assert client.run('SELECT guest_id FROM "GuestTombstone"')[0][0] == guest_id
+
+def test_funnel_counts_the_furthest_stage_reached(history):
+    assert funnel_counts(history, start_day="2024-05-01", end_day="2024-05-01") == [
+        (None, 5), ("Đang chăm sóc", 4), ("Gần xem", 3), ("Chốt", 3)]
+    assert funnel_counts(history) == [(None, 6), ("Đang chăm sóc", 5), ("Gần xem", 4), ("Chốt", 4)]
+    assert funnel_counts(history, start_day="2024-05-02") == [(None, 1), ("Đang chăm sóc", 1), ("Gần xem", 1), ("Chốt", 1)]
+    assert funnel_counts(history, start_day="2024-07-01") == [(None, 0), ("Đang chăm sóc", 0), ("Gần xem", 0), ("Chốt", 0)]
+
+def test_time_to_close_summaries(history):
+    rows = time_to_close(history, start_day="2024-05-01", end_day="2024-05-03")
+
+    assert set(rows) == {None, "Đang chăm sóc", "Gần xem"}
+    total, caring, viewing = rows[None], rows["Đang chăm sóc"], rows["Gần xem"]
+    # Totals 6, 24 and 30 hours
+    assert total["guest_count"] == 3
+    assert total["avg_hours"] == pytest.approx(20)
+    assert total["median_hours"] == pytest.approx(24)
+    assert total["p90_hours"] == pytest.approx(28.8)
+    # 6, 10 and 12 hours before the first viewing or the close
+    assert caring["guest_count"] == 3
+    assert caring["avg_hours"] == pytest.approx(28 / 3)
+    assert caring["median_hours"] == pytest.approx(10)
+    assert caring["p90_hours"] == pytest.approx(11.6)
+    # 12 and 20 hours
+    assert viewing["guest_count"] == 2
+    assert viewing["avg_hours"] == pytest.approx(16)
+    assert viewing["p90_hours"] == pytest.approx(19.2)
+
+def test_time_to_close_ranges_over_the_first_close(history):
+    only_first_day = time_to_close(history, start_day="2024-05-01", end_day="2024-05-01")
+    assert only_first_day[None]["guest_count"] == 1
+    assert only_first_day[None]["avg_hours"] == pytest.approx(6)
+
+    # The second guest closes again on 2024-05-03; that close is not its first
+    assert time_to_close(history, start_day="2024-05-03", end_day="2024-05-03") == {
+        None: {"status": None, "guest_count": 0, "avg_hours": None, "median_hours": None, "p90_hours": None}}
+
+    assert time_to_close(history)[None]["guest_count"] == 4
+
+def test_get_guest_funnel(history):
+    funnel, error = get_guest_funnel("2024-05-01", "2024-05-01T23:59:59")
+
+    assert error is None
+    assert funnel["stage"].tolist() == [NEW_GUESTS_STAGE, *FUNNEL_STAGES]
+    assert funnel["guest_count"].tolist() == [5, 4, 3, 3]
+    assert funnel["rate"].tolist() == pytest.approx([1, 0.8, 0.6, 0.6])
+    assert funnel["step_rate"].tolist() == pytest.approx([1, 0.8, 0.75, 1])
+
+def test_get_guest_funnel_without_guests(history):
+    funnel, error = get_guest_funnel("2024-07-01", "2024-07-31")
+
+    assert error is None
+    assert funnel["guest_count"].tolist() == [0, 0, 0, 0]
+    assert funnel["rate"].tolist() == [0, 0, 0, 0]
+    assert funnel["step_rate"].tolist() == [0, 0, 0, 0]
+
+def test_get_time_to_close(history):
+    table, error = get_time_to_close("2024-05-01", "2024-05-03")
+
+    assert error is None
+    # Total first, then statuses in get_guest_status_options() order
+    assert table["status"].tolist() == [TOTAL_TIME_LABEL, "Gần xem", "Đang chăm sóc"]
+    assert table["guest_count"].tolist() == [3, 2, 3]
+    assert table["avg_days"].tolist() == pytest.approx([20 / 24, 16 / 24, 28 / 3 / 24])
+    assert table["median_days"].tolist() == pytest.approx([1, 16 / 24, 10 / 24])
+
+def test_get_time_to_close_without_closes(history):
+    table, error = get_time_to_close("2024-07-01", "2024-07-31")
+
+    assert error is None
+    assert table.empty